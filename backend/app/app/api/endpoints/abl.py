@@ -1,7 +1,6 @@
 from typing import List, Optional
 
 from fastapi import APIRouter, Depends
-from httpx import AsyncClient
 from sqlalchemy.orm import Session
 
 import app.service.abl as abl_service
@@ -13,13 +12,13 @@ from app.data_models.models import (
     UserSession,
 )
 from app.db.utils import get_db
-from app.github.client import github_client
+from app.github.client import get_http_client, github_client
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[ApprovedBook])
-async def get_abl_info(
+def get_abl_info(
     db: Session = Depends(get_db),
     consumer: Optional[str] = None,
     repo_name: Optional[str] = None,
@@ -46,8 +45,7 @@ async def add_to_abl(
     # Removes extraneous ApprovedBook entries for rex-web
     #   keeps any version that appears in rex-web
     # keeps newest version
-    async with AsyncClient() as client:
-        return await abl_service.add_new_entries(db, info, client)
+    return await abl_service.add_new_entries(db, info, get_http_client())
 
 
 @router.get("/rex-release-version")
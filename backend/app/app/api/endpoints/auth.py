@@ -1,24 +1,33 @@
+import asyncio
 import logging
+from datetime import datetime, timedelta, timezone
+from functools import partial
 from typing import Awaitable
 
 from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.responses import RedirectResponse
-from httpx import AsyncClient
 from sqlalchemy.orm import Session
 from starlette.datastructures import URL
 
-from app.core.auth import set_user_session_cookie
-from app.core.config import IS_DEV_ENV
+from app.core.auth import (
+    active_user,
+    create_api_token,
+    set_user_session_cookie,
+)
+from app.core.config import API_TOKEN_EXPIRE_MINUTES, IS_DEV_ENV
 from app.core.errors import CustomBaseError
+from app.data_models.models import ApiToken, UserSession
 from app.db.utils import get_db
 from app.github import (
     AccessDeniedError,
     authenticate_client,
+    get_http_client,
     get_user,
     github_oauth,
-    sync_user_repositories,
 )
+from app.service.repository_sync import user_repository_sync
 from app.service.user import user_service
+from app.service.user_teams import user_teams_cache
 
 router = APIRouter()
 
@@ -43,21 +52,24 @@ async def handle_auth_errors(thunk: Awaitable):
 
 
 async def authenticate_token_user(request: Request, token: str, db: Session):
-    async with AsyncClient() as client:
-        client = authenticate_client(client, token)
-        user = await get_user(client, token)
-        user_service.upsert_user(db, user)
-        set_user_session_cookie(request, user)
+    client = authenticate_client(get_http_client(), token)
+    user = await get_user(
+        client, token, partial(user_teams_cache.get_teams, db)
+    )
+    await asyncio.to_thread(user_service.upsert_user, db, user)
+    await asyncio.to_thread(set_user_session_cookie, request, user)
 
 
 async def authenticate_user(request: Request, db: Session):
     values = await github_oauth.authorize_access_token(request)
     token = values["access_token"]
-    async with AsyncClient() as client:
-        client = authenticate_client(client, token)
-        user = await get_user(client, token)
-        user_service.upsert_user(db, user)
-        await sync_user_repositories(client, db, user)
+    client = authenticate_client(get_http_client(), token)
+    user = await get_user(
+        client, token, partial(user_teams_cache.get_teams, db)
+    )
+    await asyncio.to_thread(user_service.upsert_user, db, user)
+    # Logging in does not wait for GitHub to list every repository
+    user_repository_sync.schedule(token, user)
     return user
 
 
@@ -88,7 +100,27 @@ async def callback(request: Request, db: Session = Depends(get_db)):
     except AuthenticationError:
         return RedirectResponse(url="/errors/auth-error")
 
-    set_user_session_cookie(request, user)
+    await asyncio.to_thread(set_user_session_cookie, request, user)
 
     response = RedirectResponse(url="/")
     return response
+
+
+@router.post("/api-token", response_model=ApiToken)
+async def api_token(user: UserSession = Depends(active_user)):
+    """Issue a token for machine clients to send as a Bearer token
+
+    Verifying it needs neither decryption nor the database. It carries the
+    user's role but cannot be used for requests that act on GitHub.
+    """
+    if not user.token:
+        # An API token cannot be renewed with itself
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden"
+        )
+    expires_at = datetime.now(timezone.utc) + timedelta(
+        minutes=API_TOKEN_EXPIRE_MINUTES
+    )
+    return ApiToken(
+        token=create_api_token(user, expires_at), expires_at=expires_at
+    )
@@ -3,16 +3,35 @@ from typing import List
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 
-from app.core.auth import active_user
-from app.data_models.models import RepositorySummary, UserSession
+from app.core.auth import RequiresRole, active_user
+from app.data_models.models import (
+    GitHubRateLimits,
+    RepositorySummary,
+    Role,
+    UserSession,
+)
 from app.db.utils import get_db
+from app.github import rate_limit_tracker
 from app.service.user import user_service
 
 router = APIRouter()
 
 
 @router.get("/repository-summary", response_model=List[RepositorySummary])
-async def repositories(
+def repositories(
     user: UserSession = Depends(active_user), db: Session = Depends(get_db)
 ):
     return user_service.get_user_repositories(db, user)
+
+
+@router.get(
+    "/rate-limit",
+    response_model=GitHubRateLimits,
+    dependencies=[Depends(RequiresRole(Role.ADMIN))],
+)
+async def rate_limit():
+    return GitHubRateLimits(
+        budgets=rate_limit_tracker.budgets(),
+        retried=rate_limit_tracker.retried,
+        deferred=rate_limit_tracker.deferred,
+    )
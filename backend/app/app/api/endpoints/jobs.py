@@ -1,99 +1,185 @@
+import asyncio
+import hashlib
+import json
 from datetime import datetime, timedelta, timezone
-from functools import update_wrapper
-from typing import List, Optional
+from typing import Iterable, Iterator, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import Response
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+)
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
+from app.core import config
 from app.core.auth import RequiresRole, active_user
 from app.data_models.models import (
     Job,
+    JobClaim,
     JobCreate,
+    JobFeed,
+    JobLease,
     JobMin,
+    JobPage,
     JobUpdate,
+    JobUpdateItem,
+    JobUpdateResult,
     Role,
     UserSession,
 )
+from app.db.session import Session as SessionFactory
 from app.db.utils import get_db
 from app.github import github_client
-from app.service.jobs import jobs_service
+from app.service.events import job_event_hub
+from app.service.job_snapshot import (
+    job_snapshot_service,
+    snapshot_cutoff,
+    start_of_day,
+)
+from app.service.jobs import guard_completed_status, jobs_service
 
 router = APIRouter()
 
+# updated_at is stamped before the transaction commits, so a job can become
+# visible slightly after another job with a later timestamp. Re-sending a short
+# window keeps the feed from missing those; clients merge jobs by id.
+_FEED_OVERLAP = timedelta(seconds=2)
+
+# Bytes of job JSON buffered before a chunk of the job list is sent
+_STREAM_CHUNK_SIZE = 64 * 1024
 
-def cache(skip_args=0):
-    def decorating_function(func):
-        last_hash = None
-        last_result = None
+# Most jobs returned by one page of /pages
+_MAX_PAGE_SIZE = 200
 
-        def wrapper(*args):
-            nonlocal last_hash, last_result
-            h = hash(tuple(hash(arg) for arg in args[skip_args:]))
-            if h != last_hash:
-                last_result = func(*args)
-                last_hash = h
-            return last_result
+# Comment lines keep idle event streams from being closed by proxies
+_EVENTS_KEEPALIVE_SECONDS = 15
 
-        return update_wrapper(wrapper, func)
 
-    return decorating_function
+def _json_array(fragments: Iterable[str]) -> Iterator[bytes]:
+    """Join JSON fragments into an array, yielding it in bounded chunks"""
+    chunk = ["["]
+    size = 0
+    for i, fragment in enumerate(fragments):
+        if i > 0:
+            chunk.append(",")
+        chunk.append(fragment)
+        size += len(fragment)
+        if size >= _STREAM_CHUNK_SIZE:
+            yield "".join(chunk).encode()
+            chunk, size = [], 0
+    chunk.append("]")
+    yield "".join(chunk).encode()
 
 
-@cache(skip_args=1)
-def get_old_jobs_json(db: Session, start: datetime, end: datetime, _: bool):
-    return ",".join(
-        Job.model_validate(j).model_dump_json()
-        for j in jobs_service.get_jobs_in_date_range(
-            db, start, end, order_by=[jobs_service.schema_model.id.asc()]
-        )
+def _etag(content) -> str:
+    digest = hashlib.sha1(
+        json.dumps(content, sort_keys=True).encode(), usedforsecurity=False
     )
+    # Weak because the body may be re-encoded (gzip) on the way out
+    return f'W/"{digest.hexdigest()}"'
+
+
+def _parse_if_none_match(header: Optional[str]) -> List[str]:
+    if header is None:
+        return []
+    # Proxies may strip the weak prefix from the tags they forward
+    return [
+        f"W/{tag}" if not tag.startswith("W/") else tag
+        for tag in (t.strip() for t in header.split(","))
+    ]
 
 
 @router.get("/", dependencies=[Depends(RequiresRole(Role.USER))])
-def list_jobs(
-    db: Session = Depends(get_db),
-    range_start: Optional[float] = None,
-    clear_cache: bool = False,
-):
+def list_jobs(range_start: Optional[float] = None, clear_cache: bool = False):
     """List jobs from start until now, up to a maximum of one year delta"""
     now = datetime.now(timezone.utc)
-    if range_start is None:
-        yesterday = datetime(
-            year=now.year, month=now.month, day=now.day, tzinfo=timezone.utc
-        ) - timedelta(days=1)
-        # Try to get old jobs from cache and then concatenate jobs from today
-        old_jobs = get_old_jobs_json(
-            db, yesterday - timedelta(days=364), yesterday, clear_cache
-        )
-        new_jobs = ",".join(
-            [
-                Job.model_validate(j).model_dump_json()
-                for j in jobs_service.get_jobs_in_date_range(
-                    db,
-                    yesterday,
-                    now,
-                    order_by=[jobs_service.schema_model.id.asc()],
+
+    def jobs_json():
+        # A session of its own, only open while the body is streamed. The
+        # services commit between chunks, so a connection is only checked
+        # out while a chunk is read, not while the client downloads it.
+        with SessionFactory() as db:
+            if range_start is None:
+                cutoff = snapshot_cutoff(now)
+                # Get old jobs from their daily snapshots and then concatenate
+                # jobs from yesterday and today
+                yield from job_snapshot_service.iter_jobs_json(
+                    db, cutoff - timedelta(days=364), cutoff, clear_cache
                 )
-            ]
-        )
-
-        # Only include lists that have at least 1 job
-        joined_jobs = ",".join(jobs for jobs in (old_jobs, new_jobs) if jobs)
-
-        return Response(
-            content=f"[{joined_jobs}]", media_type="application/json"
-        )
-    else:
-        return [
-            Job.model_validate(j)
-            for j in jobs_service.get_jobs_in_date_range(
-                db,
-                datetime.fromtimestamp(range_start, timezone.utc),
-                now,
-                order_by=[jobs_service.schema_model.id.asc()],
+                start = start_of_day(cutoff)
+            else:
+                start = datetime.fromtimestamp(range_start, timezone.utc)
+            yield from jobs_service.iter_rendered_jobs_in_date_range(
+                db, start, now
             )
-        ]
+
+    return StreamingResponse(
+        _json_array(jobs_json()), media_type="application/json"
+    )
+
+
+@router.get(
+    "/feed",
+    response_model=JobFeed,
+    dependencies=[Depends(RequiresRole(Role.USER))],
+)
+def job_feed(since: float, db: Session = Depends(get_db)):
+    """List jobs updated since the cursor along with the next cursor"""
+    jobs = jobs_service.get_jobs_updated_since(
+        db, datetime.fromtimestamp(since, timezone.utc) - _FEED_OVERLAP
+    )
+    cursor = max((j.updated_at.timestamp() for j in jobs), default=since)
+    return JobFeed(
+        cursor=max(cursor, since),
+        jobs=[Job.model_validate(j) for j in jobs],
+    )
+
+
+@router.get("/events", dependencies=[Depends(RequiresRole(Role.USER))])
+async def job_events():
+    """Stream created and updated jobs as server-sent events"""
+
+    # StreamingResponse cancels the stream when the client disconnects
+    async def event_stream():
+        async with job_event_hub.subscribe() as queue:
+            while True:
+                try:
+                    message = await asyncio.wait_for(
+                        queue.get(), _EVENTS_KEEPALIVE_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                else:
+                    yield f"data: {message}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get(
+    "/pages",
+    response_model=JobPage,
+    dependencies=[Depends(RequiresRole(Role.USER))],
+)
+def list_jobs_before(
+    db: Session = Depends(get_db),
+    before: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=_MAX_PAGE_SIZE),
+):
+    """List jobs, newest first, starting after the cursor of a previous page"""
+    jobs, next_cursor = jobs_service.get_items_before(
+        db, before=before, limit=limit
+    )
+    return JobPage(
+        jobs=[Job.model_validate(j) for j in jobs], next_cursor=next_cursor
+    )
 
 
 @router.get(
@@ -115,6 +201,8 @@ def list_job_page(
 
 @router.get("/check", response_model=List[JobMin])
 def check(
+    request: Request,
+    response: Response,
     job_type_id: Optional[str] = None,
     status_id: Optional[str] = None,
     db: Session = Depends(get_db),
@@ -124,7 +212,16 @@ def check(
         filter_by["job_type_id"] = job_type_id
     if status_id is not None:
         filter_by["status_id"] = status_id
-    return list(jobs_service.get_items_by(db, limit=20, **filter_by))
+    jobs = [
+        JobMin.model_validate(j)
+        for j in jobs_service.get_job_mins(db, limit=20, **filter_by)
+    ]
+    # Pipelines poll this constantly; skip the body when nothing changed
+    etag = _etag([j.model_dump() for j in jobs])
+    if etag in _parse_if_none_match(request.headers.get("If-None-Match")):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return jobs
 
 
 @router.get("/{id}", response_model=Job)
@@ -148,7 +245,69 @@ async def create_job(
     """Create new job"""
     async with github_client(user) as client:
         job = await jobs_service.create(client, db, job_in, user)
-        return job
+
+    def publish() -> Job:
+        # The commit expired the job, so reading it queries the database,
+        # and NOTIFY opens a connection; both stay off the event loop
+        created = Job.model_validate(job)
+        job_event_hub.publish(created)
+        return created
+
+    return await asyncio.to_thread(publish)
+
+
+@router.post("/claim", response_model=JobLease)
+def claim_jobs(*, db: Session = Depends(get_db), claim_in: JobClaim):
+    """Assign queued jobs to the calling worker for a limited time"""
+    jobs, lease_expires_at = jobs_service.claim(
+        db,
+        claim_in.job_type_id,
+        claim_in.count,
+        timedelta(seconds=config.JOB_LEASE_SECONDS),
+        claim_in.worker_version,
+    )
+    claimed = [Job.model_validate(job) for job in jobs]
+    for job in claimed:
+        job_event_hub.publish(job)
+    return JobLease(lease_expires_at=lease_expires_at, jobs=claimed)
+
+
+@router.post("/{id}/heartbeat", response_model=JobLease)
+def heartbeat(*, db: Session = Depends(get_db), id: int):
+    """Extend the lease of a job the calling worker is running"""
+    lease_expires_at = jobs_service.renew_lease(
+        db, id, timedelta(seconds=config.JOB_LEASE_SECONDS)
+    )
+    if lease_expires_at is None:
+        if jobs_service.get(db, id) is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        # The job finished or its lease expired and it was released
+        raise HTTPException(status_code=409, detail="Job is not leased")
+    return JobLease(lease_expires_at=lease_expires_at)
+
+
+@router.patch("/", response_model=List[JobUpdateResult])
+def update_jobs(*, db: Session = Depends(get_db), jobs_in: List[JobUpdateItem]):
+    """Update many jobs at once"""
+    jobs = {
+        int(job.id): Job.model_validate(job)
+        for job in jobs_service.bulk_update(db, jobs_in)
+    }
+    for job in jobs.values():
+        job_event_hub.publish(job)
+    results = []
+    for job_in in jobs_in:
+        job = jobs.get(job_in.id)
+        if job is None:
+            result = JobUpdateResult(
+                id=str(job_in.id), status_code=404, detail="Job not found"
+            )
+        else:
+            result = JobUpdateResult(
+                id=job.id, status_code=200, status_id=job.status_id
+            )
+        results.append(result)
+    return results
 
 
 @router.put("/{id}", response_model=Job)
@@ -157,17 +316,12 @@ def update_job(*, db: Session = Depends(get_db), id: int, job_in: JobUpdate):
     job = jobs_service.get(db_session=db, obj_id=id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
-    # If current job status is completed state
-    if int(job.status_id) in [4, 5, 6]:
-        # Pipelines will try to override an completed state with
-        # assigned, processing status if unlucky
-        # Only allow updating to completed states to prevent this
-        # Don't raise HTTPException since other fields are likely valid
-        incoming_status = int(job_in.status_id)
-        job_in.status_id = str(
-            incoming_status if incoming_status in [4, 5, 6] else job.status_id
-        )
+    # Don't raise HTTPException since other fields are likely valid
+    job_in.status_id = str(
+        guard_completed_status(int(job.status_id), int(job_in.status_id))
+    )
     job = jobs_service.update(db, job, job_in)
+    job_event_hub.publish(Job.model_validate(job))
     return job
 
 
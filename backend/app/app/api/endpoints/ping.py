@@ -1,4 +1,8 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+
+from app.core.auth import RequiresRole
+from app.core.loop_monitor import event_loop_monitor
+from app.data_models.models import EventLoopStats, Role
 
 router = APIRouter()
 
@@ -6,3 +10,17 @@ router = APIRouter()
 @router.get("/")
 async def pong():
     return {"message": "pong"}
+
+
+@router.get(
+    "/event-loop",
+    response_model=EventLoopStats,
+    dependencies=[Depends(RequiresRole(Role.ADMIN))],
+)
+async def event_loop():
+    return EventLoopStats(
+        samples=event_loop_monitor.samples,
+        mean_lag=event_loop_monitor.mean_lag,
+        max_lag=event_loop_monitor.max_lag,
+        stalls=event_loop_monitor.stalls,
+    )
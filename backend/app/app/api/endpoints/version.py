@@ -2,13 +2,13 @@ import asyncio
 from enum import Enum
 
 from fastapi import APIRouter, Depends
-from httpx import AsyncClient
 
 from app.api.utils import async_memoize_timed
 from app.core.auth import RequiresRole
 from app.core.config import DEPLOYED_AT, REVISION, STACK_NAME, TAG
 from app.data_models.models import Role
 from app.github.api import get_tags
+from app.github.client import get_http_client
 from app.service import docker_hub
 
 _MAX_TAGS_FETCH = 50
@@ -40,9 +40,10 @@ async def _get_dockerhub_tags(repo: str, pattern: str) -> set[str]:
 
 
 async def _get_github_tags(owner: str, repo: str, pattern: str) -> set[str]:
-    async with AsyncClient() as client:
-        tags = await get_tags(client, owner, repo, _MAX_TAGS_FETCH, pattern)
-        return set(tags)
+    tags = await get_tags(
+        get_http_client(), owner, repo, _MAX_TAGS_FETCH, pattern
+    )
+    return set(tags)
 
 
 @async_memoize_timed(ttl=5 * 60)
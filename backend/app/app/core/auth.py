@@ -1,19 +1,33 @@
 import binascii
+import hashlib
+import hmac
+import json
+import secrets
+import threading
+import time
 from base64 import b64decode, b64encode, urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
-from typing import List, Optional, cast
+from functools import lru_cache
+from typing import List, Optional, Tuple, cast
 
 from cryptography.fernet import Fernet
 from fastapi import Depends, HTTPException, Request, status
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
 
 from app.core.config import (
     ACCESS_TOKEN_EXPIRE_MINUTES,
     ADMIN_TEAMS,
+    SESSION_RECHECK_SECONDS,
     SESSION_SECRET,
 )
 from app.data_models.models import Role, UserSession
+from app.db.schema import LoginSession
+from app.db.utils import get_db, release_connection
 
 COOKIE_NAME = "user"
+API_TOKEN_PREFIX = "corgi_"
 
 
 def new_fernet_key(secret: str | None):
@@ -41,14 +55,131 @@ class Crypto:
         return Crypto.f.decrypt(msg.encode(encoding)).decode(encoding)
 
 
+class SessionStore:
+    """Server-side user sessions; the session cookie only holds their id
+
+    Sessions are stored encrypted in the login_session table and decoded
+    sessions are kept in an in-process LRU, so most requests need neither
+    the database nor any decryption. Remembered sessions are checked
+    against the table again every `recheck_seconds`, so a session deleted
+    by one process stops working in the others after at most that long.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        recheck_seconds: float = SESSION_RECHECK_SECONDS,
+    ):
+        self.maxsize = maxsize
+        self.recheck_seconds = recheck_seconds
+        # sid -> (monotonic time of the last check, expiry, session)
+        self._memory: OrderedDict[str, Tuple[float, datetime, UserSession]] = (
+            OrderedDict()
+        )
+        # Sessions are looked up from the threads of sync endpoints
+        self._lock = threading.Lock()
+
+    def _remember(self, sid: str, expires_at: datetime, user: UserSession):
+        with self._lock:
+            self._memory[sid] = (time.monotonic(), expires_at, user)
+            self._memory.move_to_end(sid)
+            while len(self._memory) > self.maxsize:
+                self._memory.popitem(last=False)
+
+    def _forget(self, sid: str):
+        with self._lock:
+            self._memory.pop(sid, None)
+
+    def _insert(
+        self,
+        db: Session,
+        sid: str,
+        user_id: int,
+        content: str,
+        expires_at: datetime,
+    ):
+        # Expired sessions are removed as new ones are created
+        db.execute(
+            delete(LoginSession).where(
+                LoginSession.expires_at <= datetime.now(timezone.utc)
+            )
+        )
+        db.execute(
+            insert(LoginSession).values(
+                id=sid, user_id=user_id, content=content, expires_at=expires_at
+            )
+        )
+        db.commit()
+
+    def _select(self, db: Session, sid: str) -> Optional[Tuple[datetime, str]]:
+        row = db.execute(
+            select(LoginSession.expires_at, LoginSession.content).where(
+                LoginSession.id == sid
+            )
+        ).first()
+        return None if row is None else (row[0], row[1])
+
+    def _delete(self, db: Session, sid: str):
+        db.execute(delete(LoginSession).where(LoginSession.id == sid))
+        db.commit()
+
+    def create(
+        self, db: Session, user: UserSession, expires_at: datetime
+    ) -> str:
+        sid = secrets.token_urlsafe(32)
+        content = Crypto.encrypt(user.model_dump_json())
+        self._insert(db, sid, user.id, content, expires_at)
+        self._remember(sid, expires_at, user)
+        return sid
+
+    def get(self, db: Session, sid: str) -> Optional[UserSession]:
+        with self._lock:
+            remembered = self._memory.get(sid)
+            checked = (
+                remembered is not None
+                and time.monotonic() - remembered[0] < self.recheck_seconds
+            )
+            if checked:
+                self._memory.move_to_end(sid)
+        if remembered is not None and checked:
+            _, expires_at, user = remembered
+        else:
+            row = self._select(db, sid)
+            # Sessions are looked up before the endpoint runs; the
+            # connection should not be held for the rest of the request
+            release_connection(db)
+            if row is None:
+                # Deleted, possibly by another process
+                self._forget(sid)
+                return None
+            expires_at, content = row
+            if remembered is None:
+                user = UserSession.model_validate_json(Crypto.decrypt(content))
+            else:
+                # The content of a session never changes
+                user = remembered[2]
+            self._remember(sid, expires_at, user)
+        if expires_at <= datetime.now(timezone.utc):
+            return None
+        return user
+
+    def delete(self, db: Session, sid: str):
+        self._forget(sid)
+        self._delete(db, sid)
+
+
+session_store = SessionStore()
+
+
 def set_user_session_cookie(request: Request, user: UserSession):
     expiration = datetime.now(timezone.utc) + timedelta(
         minutes=ACCESS_TOKEN_EXPIRE_MINUTES
     )
+    sid = session_store.create(get_db(request), user, expiration)
 
     request.session[COOKIE_NAME] = {
         "exp": expiration.timestamp(),
-        "session": Crypto.encrypt(user.model_dump_json()),
+        "sid": sid,
     }
 
 
@@ -65,7 +196,89 @@ def get_user_role(user_teams: List[str]) -> Optional[Role]:
     return role
 
 
+def _b64encode(data: bytes) -> str:
+    return urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    return urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _api_token_signature(payload: str) -> str:
+    assert SESSION_SECRET is not None, "Expected a session secret, got None"
+    digest = hmac.new(
+        SESSION_SECRET.encode("utf-8"),
+        f"api-token.{payload}".encode(),
+        hashlib.sha256,
+    ).digest()
+    return _b64encode(digest)
+
+
+def create_api_token(user: UserSession, expires_at: datetime) -> str:
+    """A signed token for machine clients carrying the user's id and role
+
+    Nothing in it is secret: it is verified with an HMAC instead of being
+    decrypted, and it cannot be used to make GitHub requests.
+    """
+    claims = {
+        "sub": user.id,
+        "name": user.name,
+        "role": user.role.value,
+        "exp": int(expires_at.timestamp()),
+    }
+    payload = _b64encode(json.dumps(claims, separators=(",", ":")).encode())
+    return f"{API_TOKEN_PREFIX}{payload}.{_api_token_signature(payload)}"
+
+
+@lru_cache(maxsize=1024)
+def _decode_api_token(token: str) -> Optional[Tuple[float, UserSession]]:
+    # Tokens are decoded once; only the expiry is checked for each request
+    payload, _, signature = token[len(API_TOKEN_PREFIX) :].partition(".")
+    # compare_digest only takes ASCII strings; headers may hold any text
+    if not hmac.compare_digest(
+        signature.encode(),
+        _api_token_signature(payload).encode(),
+    ):
+        return None
+    try:
+        claims = json.loads(_b64decode(payload))
+        user = UserSession(
+            id=claims["sub"],
+            token="",
+            role=Role(claims["role"]),
+            avatar_url="",
+            name=claims["name"],
+        )
+        return float(claims["exp"]), user
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def api_token_user(token: str) -> Optional[UserSession]:
+    decoded = _decode_api_token(token)
+    if decoded is None:
+        return None
+    expires_at, user = decoded
+    if expires_at <= datetime.now(timezone.utc).timestamp():
+        return None
+    return user
+
+
 def active_user(request: Request) -> UserSession:
+    authorization = request.headers.get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() == "bearer" and token.startswith(API_TOKEN_PREFIX):
+        user = api_token_user(token)
+        if user is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid API token",
+            )
+        return user
+    # Dependencies share one decoded session per request
+    user_session = getattr(request.state, "user", None)
+    if user_session is not None:
+        return user_session
     session = request.session
     user = None
     if session is not None:
@@ -74,7 +287,20 @@ def active_user(request: Request) -> UserSession:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Not logged in"
         )
-    return UserSession.model_validate_json(Crypto.decrypt(user["session"]))
+    if "sid" in user:
+        user_session = session_store.get(get_db(request), user["sid"])
+        if user_session is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Not logged in",
+            )
+    else:
+        # Cookies from before sessions were stored server-side
+        user_session = UserSession.model_validate_json(
+            Crypto.decrypt(user["session"])
+        )
+    request.state.user = user_session
+    return user_session
 
 
 class RequiresRole:
@@ -9,6 +9,27 @@ SQLALCHEMY_DATABASE_URI = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{PO
 SQLALCHEMY_POOL_SIZE = os.getenv("SQLALCHEMY_POOL_SIZE", 10)
 SQLALCHEMY_MAX_OVERFLOW = os.getenv("SQLALCHEMY_MAX_OVERFLOW", 5)
 
+# JOB EVENTS
+# Postgres NOTIFY channel used to share job events between workers/replicas
+# Set to an empty string to only deliver events within the same process
+JOB_EVENTS_CHANNEL = os.getenv("JOB_EVENTS_CHANNEL", "job_events")
+
+# JOB LEASES
+# How long a worker owns a job it claimed through /api/jobs/claim
+# Workers extend it with heartbeats or any update to the job. Jobs that
+# were not claimed are never leased, so the reaper leaves them alone.
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", 30 * 60))
+# How often expired leases are released; 0 disables the reaper
+JOB_REAPER_INTERVAL_SECONDS = int(os.getenv("JOB_REAPER_INTERVAL_SECONDS", 60))
+
+# EVENT LOOP MONITORING
+# How often the event loop is checked for blocking work; 0 disables it
+EVENT_LOOP_MONITOR_INTERVAL_SECONDS = float(
+    os.getenv("EVENT_LOOP_MONITOR_INTERVAL_SECONDS", 1)
+)
+# Lag that is logged as a blocked event loop
+EVENT_LOOP_STALL_SECONDS = float(os.getenv("EVENT_LOOP_STALL_SECONDS", 0.25))
+
 # CORS SETTINGS
 # a string of origins separated by commas, e.g: "http://localhost, http://localhost:4200"
 BACKEND_CORS_ORIGINS = os.getenv("BACKEND_CORS_ORIGINS")
@@ -32,6 +53,42 @@ GITHUB_API_TOKEN = os.getenv("GITHUB_API_TOKEN")
 GITHUB_ORG = os.getenv("GITHUB_ORG", "openstax")
 GITHUB_REPO_PREFIX = os.getenv("GITHUB_REPO_PREFIX", "osbooks")
 
+# How long a branch or tag stays resolved to the same commit
+GITHUB_REF_CACHE_SECONDS = float(os.getenv("GITHUB_REF_CACHE_SECONDS", 10))
+# How long a ref or repository that does not exist is remembered
+GITHUB_REF_MISS_CACHE_SECONDS = float(
+    os.getenv("GITHUB_REF_MISS_CACHE_SECONDS", 30)
+)
+
+# Requests kept for users; calls that can wait (like syncing repositories
+# at login) wait for the rate limit to reset once fewer are left
+GITHUB_RATE_LIMIT_RESERVE = int(os.getenv("GITHUB_RATE_LIMIT_RESERVE", 100))
+# Longest wait for a rate limit before giving up instead
+GITHUB_RATE_LIMIT_MAX_WAIT_SECONDS = float(
+    os.getenv("GITHUB_RATE_LIMIT_MAX_WAIT_SECONDS", 60)
+)
+# Retries of a request that hit a rate limit
+GITHUB_RATE_LIMIT_RETRIES = int(os.getenv("GITHUB_RATE_LIMIT_RETRIES", 3))
+
+# Repositories of a user are synced in the background at login, at most
+# this often
+REPOSITORY_SYNC_INTERVAL_SECONDS = int(
+    os.getenv("REPOSITORY_SYNC_INTERVAL_SECONDS", 5 * 60)
+)
+# Other syncs only fetch repositories pushed to since the last one, which
+# misses permission changes; every repository is fetched again this often
+REPOSITORY_FULL_SYNC_INTERVAL_SECONDS = int(
+    os.getenv("REPOSITORY_FULL_SYNC_INTERVAL_SECONDS", 24 * 60 * 60)
+)
+
+# GitHub teams (and so roles) of users are reused at login for this long
+USER_TEAMS_CACHE_SECONDS = int(os.getenv("USER_TEAMS_CACHE_SECONDS", 15 * 60))
+# Older teams are still used once while they are refreshed in the
+# background; past this age login waits for GitHub instead
+USER_TEAMS_MAX_AGE_SECONDS = int(
+    os.getenv("USER_TEAMS_MAX_AGE_SECONDS", 24 * 60 * 60)
+)
+
 # Rex web
 REX_WEB_RELEASE_URL = os.getenv(
     "REX_WEB_RELEASE_URL", "https://openstax.org/rex/release.json"
@@ -50,3 +107,8 @@ ADMIN_TEAMS = ("ce-tech", "ce-admins", "content-managers")
 # To encrypt session cookie
 SESSION_SECRET = os.getenv("SESSION_SECRET")
 ACCESS_TOKEN_EXPIRE_MINUTES = 480
+# Sessions remembered by a process are checked against the database this
+# often, so a session revoked by another process ends within this time
+SESSION_RECHECK_SECONDS = float(os.getenv("SESSION_RECHECK_SECONDS", 60))
+# Lifetime of API tokens for machine clients (see /api/auth/api-token)
+API_TOKEN_EXPIRE_MINUTES = int(os.getenv("API_TOKEN_EXPIRE_MINUTES", 24 * 60))
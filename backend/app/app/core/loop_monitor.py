@@ -0,0 +1,62 @@
+import asyncio
+import logging
+from contextlib import suppress
+from typing import Optional
+
+from app.core import config
+
+
+class EventLoopMonitor:
+    """Measure how late the event loop wakes up from a sleep.
+
+    Anything that blocks the loop (a synchronous database call in an async
+    endpoint, for example) delays every other request by the same amount,
+    so the lag is a direct measure of time lost to blocking work.
+    """
+
+    def __init__(self, interval: float, threshold: float):
+        self.interval = interval
+        self.threshold = threshold
+        self.samples = 0
+        self.total_lag = 0.0
+        self.max_lag = 0.0
+        # Samples where the loop was blocked for longer than the threshold
+        self.stalls = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def record(self, lag: float):
+        lag = max(lag, 0.0)
+        self.samples += 1
+        self.total_lag += lag
+        self.max_lag = max(self.max_lag, lag)
+        if lag >= self.threshold:
+            self.stalls += 1
+            logging.warning(f"Event loop blocked for {lag:.3f}s")
+
+    @property
+    def mean_lag(self) -> float:
+        return self.total_lag / self.samples if self.samples else 0.0
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.record(loop.time() - start - self.interval)
+
+    def start(self):
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+
+event_loop_monitor = EventLoopMonitor(
+    config.EVENT_LOOP_MONITOR_INTERVAL_SECONDS,
+    config.EVENT_LOOP_STALL_SECONDS,
+)
@@ -2,7 +2,13 @@ from datetime import datetime
 from enum import Enum
 from typing import Any, List, Optional, Union
 
-from pydantic import BaseModel, ConfigDict, field_validator, model_validator
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    Field,
+    field_validator,
+    model_validator,
+)
 
 
 class Role(int, Enum):
@@ -22,6 +28,11 @@ class UserSession(BaseModel):
         return self.role == Role.ADMIN
 
 
+class ApiToken(BaseModel):
+    token: str
+    expires_at: datetime
+
+
 class StatusBase(BaseModel):
     name: str
 
@@ -207,6 +218,23 @@ class JobUpdate(BaseModel):
     error_message: Optional[str] = None
 
 
+class JobUpdateItem(JobUpdate):
+    id: int
+
+
+class JobUpdateResult(BaseModel):
+    id: str
+    status_code: int
+    status_id: Optional[str] = None
+    detail: Optional[str] = None
+
+
+class JobClaim(BaseModel):
+    job_type_id: int
+    count: int = Field(default=1, ge=1, le=20)
+    worker_version: Optional[str] = None
+
+
 class JobMin(BaseModel):
     id: str
     status_id: str
@@ -217,7 +245,7 @@ class JobMin(BaseModel):
     @model_validator(mode="before")
     @classmethod
     def extract_from_orm(cls, data: Any) -> Any:
-        if hasattr(data, "books"):  # ORM object
+        if hasattr(data, "job_type_id"):  # ORM object or row
             return {
                 "id": str(data.id),
                 "status_id": str(data.status_id),
@@ -267,3 +295,41 @@ class Job(JobBase):
                 else None,
             }
         return data
+
+
+class JobFeed(BaseModel):
+    cursor: float
+    jobs: List[Job] = []
+
+
+class JobPage(BaseModel):
+    jobs: List[Job] = []
+    next_cursor: Optional[str] = None
+
+
+class JobLease(BaseModel):
+    lease_expires_at: datetime
+    jobs: List[Job] = []
+
+
+class GitHubRateLimit(BaseModel):
+    token: str
+    resource: str
+    limit: int
+    remaining: int
+    reset_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class GitHubRateLimits(BaseModel):
+    budgets: List[GitHubRateLimit] = []
+    retried: int
+    deferred: int
+
+
+class EventLoopStats(BaseModel):
+    samples: int
+    mean_lag: float
+    max_lag: float
+    stalls: int
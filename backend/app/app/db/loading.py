@@ -0,0 +1,69 @@
+"""Loader options for the ways the API reads jobs, books and repositories
+
+Relationships on the mapping load lazily. Queries list what they need here:
+selectinload for collections, joinedload for the rows they point to, and
+raiseload for everything else. An attribute that a query did not plan for
+raises instead of quietly issuing one query per row. Identity map hits,
+which need no SQL, are still allowed.
+"""
+
+from sqlalchemy import and_, exists
+from sqlalchemy.orm import aliased, joinedload, raiseload, selectinload
+
+from app.db.schema import ApprovedBook, Book, BookJob, Commit, Jobs, Repository
+
+
+def _raise_unlisted(load):
+    return load.raiseload("*", sql_only=True)
+
+
+_job_books = selectinload(Jobs.books)
+_job_book = _job_books.joinedload(BookJob.book)
+_job_commit = _job_book.joinedload(Book.commit)
+_job_repository = _job_commit.joinedload(Commit.repository)
+
+# Everything the Job API model reads
+JOB_OPTIONS = (
+    _raise_unlisted(joinedload(Jobs.status)),
+    _raise_unlisted(joinedload(Jobs.job_type)),
+    _raise_unlisted(joinedload(Jobs.user)),
+    _raise_unlisted(_job_books),
+    _raise_unlisted(_job_book),
+    _raise_unlisted(_job_commit),
+    _raise_unlisted(_job_repository),
+    raiseload("*", sql_only=True),
+)
+
+_approved_book = joinedload(ApprovedBook.book)
+_approved_commit = _approved_book.joinedload(Book.commit)
+
+# Everything the ApprovedBook API model reads
+APPROVED_BOOK_OPTIONS = (
+    _raise_unlisted(_approved_book),
+    _raise_unlisted(_approved_commit),
+    _raise_unlisted(_approved_commit.joinedload(Commit.repository)),
+    _raise_unlisted(joinedload(ApprovedBook.consumer)),
+    _raise_unlisted(joinedload(ApprovedBook.code_version)),
+    raiseload("*", sql_only=True),
+)
+
+
+_newer = aliased(Commit)
+# Whether a commit is the newest commit with books of its repository
+_newest_with_books = and_(
+    exists().where(Book.commit_id == Commit.id),
+    ~exists().where(
+        _newer.repository_id == Commit.repository_id,
+        _newer.timestamp > Commit.timestamp,
+        exists().where(Book.commit_id == _newer.id),
+    ),
+)
+_summary_commits = selectinload(Repository.commits.and_(_newest_with_books))
+
+# What the RepositorySummary API model reads. Only the newest commit with
+# books is loaded into Repository.commits instead of the whole history.
+REPOSITORY_SUMMARY_OPTIONS = (
+    _raise_unlisted(_summary_commits),
+    _raise_unlisted(_summary_commits.selectinload(Commit.books)),
+    raiseload("*", sql_only=True),
+)
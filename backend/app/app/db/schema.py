@@ -15,6 +15,8 @@ class DateTimeUTC(sa.types.TypeDecorator):
     cache_ok = True
 
     def process_bind_param(self, value, dialect):
+        if value is None:
+            return value
         # Convert values to utc or fail
         if isinstance(value, datetime) and (
             value.tzinfo is None or value.tzinfo.utcoffset(value) is None
@@ -64,27 +66,99 @@ class Jobs(Base):
     git_ref = sa.Column(sa.String)
     worker_version = sa.Column(sa.String)
     error_message = sa.Column(sa.String)
+    # Set when a worker claims the job; assigned jobs past it are abandoned
+    lease_expires_at = sa.Column(DateTimeUTC)
     created_at = sa.Column(
         DateTimeUTC,
         nullable=False,
         default=utcnow,
-        index=True,
     )
     updated_at = sa.Column(
         DateTimeUTC,
         nullable=False,
         default=utcnow,
         onupdate=utcnow,
+        index=True,
     )
 
-    status = relationship("Status", back_populates="jobs", lazy="joined")
-    job_type = relationship("JobTypes", back_populates="jobs", lazy="joined")
-    user = relationship("User", back_populates="jobs", lazy="joined")
+    # Relationships of jobs, books, commits and repositories load lazily;
+    # queries choose what to load with the options in app.db.loading
+    status = relationship("Status", back_populates="jobs")
+    job_type = relationship("JobTypes", back_populates="jobs")
+    user = relationship("User", back_populates="jobs")
     books = relationship(
-        "BookJob",
-        back_populates="job",
-        lazy="joined",
-        order_by="asc(BookJob.book_id)",
+        "BookJob", back_populates="job", order_by="asc(BookJob.book_id)"
+    )
+    __table_args__ = (
+        # Serves created_at ranges and keyset pagination by (created_at, id)
+        sa.Index("ix_jobs_created_at_id", "created_at", "id"),
+        # Only queued and assigned jobs, which pipelines poll for
+        sa.Index(
+            "ix_jobs_pending",
+            "status_id",
+            "job_type_id",
+            "id",
+            postgresql_where=sa.text("status_id IN (1, 2)"),
+        ),
+    )
+
+
+class CommitCache(Base):
+    """Data read from a commit; commits never change, so neither does this"""
+
+    owner = sa.Column(sa.String, primary_key=True)
+    repo = sa.Column(sa.String, primary_key=True)
+    sha = sa.Column(sa.String, primary_key=True)
+    committed_at = sa.Column(DateTimeUTC, nullable=False)
+    # slug and style of each book in META-INF/books.xml
+    books = sa.Column(sa.JSON, nullable=False)
+    # UUID by collection file name, stored the first time it is needed
+    collection_uuids = sa.Column(sa.JSON)
+    created_at = sa.Column(DateTimeUTC, nullable=False, default=utcnow)
+
+
+class LoginSession(Base):
+    """A logged in user; the session cookie only holds the id"""
+
+    id = sa.Column(sa.String, primary_key=True)
+    user_id = sa.Column(sa.ForeignKey("user.id"), nullable=False, index=True)
+    # Encrypted UserSession JSON (it contains the user's GitHub token)
+    content = sa.Column(sa.Text, nullable=False)
+    expires_at = sa.Column(DateTimeUTC, nullable=False, index=True)
+
+
+class UserTeams(Base):
+    """GitHub teams of a user, refreshed when a login finds them stale"""
+
+    # Not a foreign key: teams are read before the user is stored
+    user_id = sa.Column(sa.Integer, primary_key=True)
+    teams = sa.Column(sa.JSON, nullable=False)
+    synced_at = sa.Column(DateTimeUTC, nullable=False)
+
+
+class RenderedJob(Base):
+    """The API representation of a job, refreshed whenever the job changes"""
+
+    job_id = sa.Column(sa.ForeignKey("jobs.id"), primary_key=True)
+    content = sa.Column(sa.Text, nullable=False)
+    # The jobs.updated_at that content was rendered from. Rows that do not
+    # match the job anymore are rendered again when they are read.
+    job_updated_at = sa.Column(DateTimeUTC, nullable=False)
+
+
+class JobSnapshot(Base):
+    """Pre-serialized jobs created on one day, shared by every worker"""
+
+    day = sa.Column(sa.Date, primary_key=True)
+    # Bumped whenever a job from this day changes so that snapshots built
+    # from older data cannot overwrite the invalidation
+    version = sa.Column(sa.Integer, nullable=False, default=0)
+    content = sa.Column(sa.Text, nullable=True)
+    updated_at = sa.Column(
+        DateTimeUTC,
+        nullable=False,
+        default=utcnow,
+        onupdate=utcnow,
     )
 
 
@@ -108,7 +182,7 @@ class Repository(Base):
     name = sa.Column(sa.String, nullable=False)
     owner = sa.Column(sa.String, nullable=False)
 
-    commits = relationship("Commit", back_populates="repository", lazy="joined")
+    commits = relationship("Commit", back_populates="repository")
     users = relationship("UserRepository", back_populates="repository")
 
 
@@ -118,10 +192,8 @@ class Commit(Base):
     sha = sa.Column(sa.String, nullable=False)
     timestamp = sa.Column(DateTimeUTC, nullable=False)
 
-    repository = relationship(
-        "Repository", back_populates="commits", lazy="joined"
-    )
-    books = relationship("Book", back_populates="commit", lazy="joined")
+    repository = relationship("Repository", back_populates="commits")
+    books = relationship("Book", back_populates="commit")
     # We do not need to store a commit more than once
     __table_args__ = (
         sa.UniqueConstraint("repository_id", "sha", name="_repository_commit"),
@@ -138,7 +210,7 @@ class Book(Base):
     slug = sa.Column(sa.String, nullable=False)
     style = sa.Column(sa.String, nullable=False)
 
-    commit = relationship("Commit", back_populates="books", lazy="joined")
+    commit = relationship("Commit", back_populates="books")
     jobs = relationship("BookJob", back_populates="book")
     approved_versions = relationship("ApprovedBook", back_populates="book")
     __table_args__ = (
@@ -219,6 +291,10 @@ class User(Base):
     id = sa.Column(sa.Integer, primary_key=True, index=True)
     name = sa.Column(sa.String, nullable=False)
     avatar_url = sa.Column(sa.String, nullable=False)
+    # When repositories were last fetched from GitHub, and when all of them
+    # were (instead of only those pushed to since the last sync)
+    repositories_synced_at = sa.Column(DateTimeUTC, nullable=True)
+    repositories_full_synced_at = sa.Column(DateTimeUTC, nullable=True)
 
     jobs = relationship("Jobs", back_populates="user")
     repositories = relationship("UserRepository", back_populates="user")
@@ -229,8 +305,8 @@ class BookJob(Base):
     job_id = sa.Column(sa.ForeignKey("jobs.id"), primary_key=True, index=True)
     artifact_url = sa.Column(sa.String, nullable=True)
 
-    job = relationship("Jobs", back_populates="books", lazy="joined")
-    book = relationship("Book", back_populates="jobs", lazy="joined")
+    job = relationship("Jobs", back_populates="books")
+    book = relationship("Book", back_populates="jobs")
 
 
 class RepositoryPermission(Base):
@@ -1,5 +1,32 @@
+import logging
+
+from sqlalchemy.orm import Session
 from starlette.requests import Request
 
+from app.db.session import Session as SessionFactory
+
+
+def get_db(request: Request) -> Session:
+    """The request's database session, created the first time it is used
+
+    Requests that never touch the database never create one.
+    DBSessionMiddleware closes it when the response is sent.
+    """
+    db = getattr(request.state, "db", None)
+    if db is None:
+        logging.debug(f"Creating Database session for {request.url}")
+        db = request.state.db = SessionFactory()
+    return db
+
+
+def release_connection(db: Session):
+    """End the session's transaction so its connection returns to the pool
 
-def get_db(request: Request):
-    return request.state.db
+    A session holds its connection until the transaction ends. Call this
+    between database work and slow I/O like GitHub requests, so waiting
+    requests do not exhaust the pool. It commits rather than rolls back,
+    so statements that already ran are kept. Loaded objects are expired
+    and reload on next use.
+    """
+    if db.in_transaction():
+        db.commit()
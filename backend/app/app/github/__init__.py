@@ -1,8 +1,10 @@
 from app.github.api import (
     AccessDeniedError,
-    get_book_repository,
-    get_collections,
+    NotFoundError,
+    get_book_commit,
+    get_collection_uuids,
     get_file_content,
+    get_repository_commit,
     get_user,
     get_user_repositories,
     get_user_role,
@@ -11,8 +13,12 @@ from app.github.api import (
 from app.github.client import (
     AuthenticatedClient,
     authenticate_client,
+    close_http_client,
+    get_http_client,
     github_client,
 )
 from app.github.models import GitHubRepo, RepositoryPermission
 from app.github.oauth import github_oauth
+from app.github.rate_limit import RateLimitError, rate_limit_tracker
+from app.github.refs import ref_cache
 from app.github.utils import sync_user_repositories
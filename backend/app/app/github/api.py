@@ -2,11 +2,10 @@ import base64
 import json
 import re
 from datetime import datetime
-from typing import Any, Dict, List, Tuple
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 from urllib.parse import urlencode
 
 from httpx import AsyncClient
-from lxml import etree
 
 from app.core.auth import get_user_role
 from app.core.config import GITHUB_ORG, IS_DEV_ENV
@@ -14,7 +13,13 @@ from app.core.errors import CustomBaseError
 from app.data_models.models import UserSession
 from app.github.client import AuthenticatedClient
 from app.github.models import GitHubRepo
-from app.xml_utils import get_attr, parse_xml_doc, xpath_some
+from app.github.single_flight import single_flight
+from app.xml_utils import (
+    find_first_text,
+    get_attr,
+    parse_xml_doc,
+    xpath_some,
+)
 
 
 class AccessDeniedError(CustomBaseError):
@@ -25,6 +30,33 @@ class GraphQLError(CustomBaseError):
     pass
 
 
+class NotFoundError(GraphQLError):
+    pass
+
+
+def request_key(*args: Any, **kwargs: Any):
+    """Identify a call by its arguments and the credentials of its client
+
+    Every request gets its own client, so clients are compared by the token
+    they send instead. Urgent calls never join a deferrable call, which may
+    be waiting for the rate limit to reset.
+    """
+
+    def identify(arg: Any):
+        if isinstance(arg, AuthenticatedClient):
+            return ("client", arg.headers.get("Authorization"), arg.urgent)
+        if isinstance(arg, AsyncClient):
+            return ("client", arg.headers.get("Authorization"))
+        if isinstance(arg, list):
+            return tuple(arg)
+        return arg
+
+    return (
+        tuple(identify(arg) for arg in args),
+        tuple(sorted((k, identify(v)) for k, v in kwargs.items())),
+    )
+
+
 async def graphql(client: AuthenticatedClient, query: str):
     response = await client.post(
         "https://api.github.com/graphql", json={"query": query}
@@ -32,13 +64,31 @@ async def graphql(client: AuthenticatedClient, query: str):
     response.raise_for_status()
     payload = response.json()
     if "errors" in payload:  # pragma: no cover
-        raise GraphQLError(", ".join(e["message"] for e in payload["errors"]))
+        errors = payload["errors"]
+        message = ", ".join(e["message"] for e in errors)
+        if all(e.get("type") == "NOT_FOUND" for e in errors):
+            raise NotFoundError(message)
+        raise GraphQLError(message)
     return payload
 
 
-async def get_book_repository(
+def parse_books_xml(books_xml: str) -> List[Dict[str, Any]]:
+    meta = parse_xml_doc(books_xml)
+    return [
+        {k: get_attr(el, k) for k in ("slug", "style")}
+        for el in xpath_some(meta, "//*[local-name()='book']")
+    ]
+
+
+def parse_committed_date(committed_date: str) -> datetime:
+    return datetime.fromisoformat(f"{committed_date[:-1]}+00:00")
+
+
+@single_flight(request_key)
+async def get_repository_commit(
     client: AuthenticatedClient, repo_name: str, repo_owner: str, version: str
-) -> Tuple[GitHubRepo, str, datetime, List[Dict[str, Any]]]:
+) -> Tuple[GitHubRepo, str]:
+    """Resolve a ref to a commit sha without downloading any files"""
     query = f"""
         query {{
             repository(name: "{repo_name}", owner: "{repo_owner}") {{
@@ -46,16 +96,6 @@ async def get_book_repository(
                 viewerPermission
                 object(expression: "{version}") {{
                     oid
-                    ... on Commit {{
-                        committedDate
-                        file (path: "META-INF/books.xml") {{
-                            object {{
-                                ... on Blob {{
-                                    text
-                                }}
-                            }}
-                        }}
-                    }}
                 }}
             }}
         }}
@@ -68,43 +108,29 @@ async def get_book_repository(
         viewer_permission=repository["viewerPermission"],
     )
     commit = repository["object"]
-    if commit is None:  # pragma: no cover
-        raise CustomBaseError(f"Could not find commit '{version}'")
-    commit_sha = commit["oid"]
-    commit_timestamp = commit["committedDate"]
-    fixed_timestamp = f"{commit_timestamp[:-1]}+00:00"
-    books_xml = commit["file"]["object"]["text"]
-    meta = parse_xml_doc(books_xml)
-
-    books = [
-        {k: get_attr(el, k) for k in ("slug", "style")}
-        for el in xpath_some(meta, "//*[local-name()='book']")
-    ]
-    return (repo, commit_sha, datetime.fromisoformat(fixed_timestamp), books)
+    if commit is None:
+        raise NotFoundError(f"Could not find commit '{version}'")
+    return repo, commit["oid"]
 
 
-async def get_collections(
+@single_flight(request_key)
+async def get_book_commit(
     client: AuthenticatedClient,
     repo_name: str,
     repo_owner: str,
     commit_sha: str,
-) -> Dict[str, etree.ElementBase]:
+) -> Tuple[datetime, List[Dict[str, Any]]]:
+    """Commit date and books.xml entries of a commit"""
     query = f"""
         query {{
             repository(name: "{repo_name}", owner: "{repo_owner}") {{
                 object(expression: "{commit_sha}") {{
                     ... on Commit {{
-                        file (path: "collections") {{
+                        committedDate
+                        file (path: "META-INF/books.xml") {{
                             object {{
-                                ... on Tree {{
-                                    entries {{
-                                        name
-                                        object {{
-                                            ... on Blob {{
-                                                text
-                                            }}
-                                        }}
-                                    }}
+                                ... on Blob {{
+                                    text
                                 }}
                             }}
                         }}
@@ -114,12 +140,59 @@ async def get_collections(
         }}
     """
     payload = await graphql(client, query)
-    files_entries = payload["data"]["repository"]["object"]["file"]["object"][
-        "entries"
-    ]
+    commit = payload["data"]["repository"]["object"]
+    if commit is None:  # pragma: no cover
+        raise CustomBaseError(f"Could not find commit '{commit_sha}'")
+    return (
+        parse_committed_date(commit["committedDate"]),
+        parse_books_xml(commit["file"]["object"]["text"]),
+    )
+
+
+@single_flight(request_key)
+async def get_collection_uuids(
+    client: AuthenticatedClient,
+    repo_name: str,
+    repo_owner: str,
+    commit_sha: str,
+    names: List[str],
+) -> Dict[str, Optional[str]]:
+    """UUID of each named collection file that exists in the commit
+
+    Only the requested files are downloaded, one GraphQL alias per file.
+    """
+    if not names:
+        return {}
+    paths = [json.dumps(f"collections/{name}") for name in names]
+    files = "".join(
+        f"""
+                        c{i}: file (path: {path}) {{
+                            object {{
+                                ... on Blob {{
+                                    text
+                                }}
+                            }}
+                        }}"""
+        for i, path in enumerate(paths)
+    )
+    query = f"""
+        query {{
+            repository(name: "{repo_name}", owner: "{repo_owner}") {{
+                object(expression: "{commit_sha}") {{
+                    ... on Commit {{{files}
+                    }}
+                }}
+            }}
+        }}
+    """
+    payload = await graphql(client, query)
+    commit = payload["data"]["repository"]["object"]
+    if commit is None:  # pragma: no cover
+        raise CustomBaseError(f"Could not find commit '{commit_sha}'")
     return {
-        entry["name"]: parse_xml_doc(entry["object"]["text"])
-        for entry in files_entries
+        name: find_first_text(commit[f"c{i}"]["object"]["text"], "uuid")
+        for i, name in enumerate(names)
+        if commit[f"c{i}"] is not None
     }
 
 
@@ -148,6 +221,7 @@ async def get_file_response(
     return response
 
 
+@single_flight(request_key)
 async def get_file_content(
     client: AuthenticatedClient,
     owner: str,
@@ -199,9 +273,26 @@ async def push_to_github(
     response.raise_for_status()
 
 
+# GitHub returns at most this many results of a search
+SEARCH_RESULT_LIMIT = 1000
+
+
 async def get_user_repositories(
     client: AuthenticatedClient, search_query: str
 ) -> List[GitHubRepo]:
+    repos, _ = await search_user_repositories(client, search_query)
+    return repos
+
+
+@single_flight(request_key)
+async def search_user_repositories(
+    client: AuthenticatedClient, search_query: str
+) -> Tuple[List[GitHubRepo], int]:
+    """Repositories matching a search, and how many repositories matched
+
+    Fewer repositories than matched are returned when the search hits
+    SEARCH_RESULT_LIMIT.
+    """
     query_args = {
         "query": f'"{search_query}"',
         "first": "100",
@@ -228,6 +319,7 @@ async def get_user_repositories(
         }}
     """
     repos = []
+    repository_count = 0
     has_next = True
     while has_next:
         # response = await graphql(client, )
@@ -242,15 +334,18 @@ async def get_user_repositories(
         response.raise_for_status()
         payload = response.json()
 
-        for node in payload["data"]["search"]["edges"]:
+        search = payload["data"]["search"]
+        repository_count = search["repositoryCount"]
+        for node in search["edges"]:
             repos.append(GitHubRepo.from_node(node["node"]))
 
-        page_info = payload["data"]["search"]["pageInfo"]
+        page_info = search["pageInfo"]
         has_next = page_info["hasNextPage"]
         query_args["after"] = f'"{page_info["endCursor"]}"'
-    return repos
+    return repos, repository_count
 
 
+@single_flight(request_key)
 async def get_user_teams(client: AuthenticatedClient, user: str) -> List[str]:
     if IS_DEV_ENV:  # pragma: no cover
         return ["ce-tech"]
@@ -279,14 +374,25 @@ async def get_user_teams(client: AuthenticatedClient, user: str) -> List[str]:
         ]
 
 
-async def get_user(client: AuthenticatedClient, token: str) -> UserSession:
+# Teams of a user given their id and login
+TeamsGetter = Callable[[AuthenticatedClient, int, str], Awaitable[List[str]]]
+
+
+async def get_user(
+    client: AuthenticatedClient,
+    token: str,
+    get_teams: Optional[TeamsGetter] = None,
+) -> UserSession:
     response = await client.get("https://api.github.com/user")
     response.raise_for_status()
     json = response.json()
     name = json["login"]
     avatar_url = json["avatar_url"]
     id_ = json["id"]
-    user_teams = await get_user_teams(client, name)
+    if get_teams is None:
+        user_teams = await get_user_teams(client, name)
+    else:
+        user_teams = await get_teams(client, id_, name)
     role = get_user_role(user_teams)
     if role is None:
         raise AccessDeniedError("Bad role")
@@ -295,6 +401,7 @@ async def get_user(client: AuthenticatedClient, token: str) -> UserSession:
     )
 
 
+@single_flight(request_key)
 async def get_tags(
     client: AsyncClient,
     owner: str,
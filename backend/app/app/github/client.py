@@ -1,24 +1,105 @@
+import copy
 from contextlib import asynccontextmanager
-from typing import cast
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from importlib.util import find_spec
+from typing import Any, Optional
 
-from httpx import AsyncClient
+from httpx import AsyncClient, Headers, Limits, Response
 
+from app.core.errors import CustomBaseError
 from app.data_models.models import UserSession
+from app.github.rate_limit import rate_limit_tracker, resource_for, token_id
 
+# HTTP/2 needs the optional h2 package (httpx[http2])
+_HTTP2 = find_spec("h2") is not None
 
-class AuthenticatedClient(AsyncClient):
-    pass
+_http_client: Optional[AsyncClient] = None
+
+
+def get_http_client() -> AsyncClient:
+    """The connection pool shared by every request for the app's lifetime"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = AsyncClient(
+            http2=_HTTP2,
+            # Every user shares this client; a cookie one user's response
+            # sets must never be sent with another user's token
+            cookies=CookieJar(policy=DefaultCookiePolicy(allowed_domains=[])),
+            # Keep idle connections around between requests so most calls
+            # skip the TCP and TLS handshakes
+            limits=Limits(
+                max_connections=100,
+                max_keepalive_connections=20,
+                keepalive_expiry=60,
+            ),
+        )
+    return _http_client
+
+
+async def close_http_client():
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+class AuthenticatedClient:
+    """Send requests through a shared client as a GitHub user
+
+    Authentication is added to each request instead of the client, so one
+    connection pool serves every user. Every response updates the rate limit
+    budget of the token.
+    """
+
+    def __init__(self, client: AsyncClient, token: str, urgent: bool = True):
+        self.client = client
+        self.token_id = token_id(token)
+        self.urgent = urgent
+        self.headers = Headers(
+            {
+                "Authorization": f"Bearer {token}",
+                "Accept": "application/vnd.github+json",
+            }
+        )
+
+    async def request(
+        self, method: str, url: Any, *, headers: Any = None, **kwargs: Any
+    ) -> Response:
+        request_headers = self.headers.copy()
+        if headers is not None:
+            request_headers.update(headers)
+        return await rate_limit_tracker.send(
+            self.token_id,
+            resource_for(url),
+            lambda: self.client.request(
+                method, url, headers=request_headers, **kwargs
+            ),
+            urgent=self.urgent,
+        )
+
+    def deferrable(self) -> "AuthenticatedClient":
+        """This client for calls that can wait for the rate limit to reset"""
+        deferrable = copy.copy(self)
+        deferrable.urgent = False
+        return deferrable
+
+    async def get(self, url: Any, **kwargs: Any) -> Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: Any, **kwargs: Any) -> Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def put(self, url: Any, **kwargs: Any) -> Response:
+        return await self.request("PUT", url, **kwargs)
 
 
 def authenticate_client(client: AsyncClient, token: str) -> AuthenticatedClient:
-    client.headers = {
-        "Authorization": f"Bearer {token}",
-        "Accept": "application/vnd.github+json",
-    }
-    return cast(AuthenticatedClient, client)
+    return AuthenticatedClient(client, token)
 
 
 @asynccontextmanager
 async def github_client(user: UserSession):  # pragma: no cover
-    async with AsyncClient() as client:
-        yield authenticate_client(client, user.token)
+    if not user.token:
+        # API token users are not logged in to GitHub
+        raise CustomBaseError("Requires a GitHub login", status_code=403)
+    yield authenticate_client(get_http_client(), user.token)
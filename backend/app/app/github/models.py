@@ -1,4 +1,6 @@
+from datetime import datetime
 from enum import Enum
+from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel, field_validator
 
@@ -34,3 +36,11 @@ class GitHubRepo(BaseModel):
             return "".join(ret)
 
         return cls(**{to_snake_case(k): v for k, v in node.items()})
+
+
+class BookCommit(BaseModel):
+    committed_at: datetime
+    # slug and style of each book in META-INF/books.xml
+    books: List[Dict[str, Any]]
+    # UUID by collection file name (None when the collection has no UUID)
+    collection_uuids: Optional[Dict[str, Optional[str]]] = None
@@ -0,0 +1,157 @@
+import asyncio
+import hashlib
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from httpx import URL, Response
+
+from app.core import config
+from app.core.errors import CustomBaseError
+
+
+class RateLimitError(CustomBaseError):
+    def __init__(self, message: str):
+        super().__init__(message, status_code=429)
+
+
+def token_id(token: str) -> str:
+    """Identify a token in metrics without revealing it"""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()[:12]
+
+
+def resource_for(url: Any) -> str:
+    """The rate limit resource GitHub counts a request against"""
+    path = URL(url).path
+    if path == "/graphql":
+        return "graphql"
+    if path.startswith("/search/"):
+        return "search"
+    return "core"
+
+
+@dataclass
+class RateLimitBudget:
+    token: str
+    resource: str
+    limit: int
+    remaining: int
+    # Unix time when the budget is refilled
+    reset_at: float
+
+
+class RateLimitTracker:
+    """Track the GitHub rate limit budget of each token
+
+    The budget is read from the x-ratelimit-* headers of every response.
+    Calls that are not urgent wait for the budget to reset once fewer than
+    `reserve` requests are left, so the rest stays available for users.
+    Secondary rate limits are retried with jittered exponential backoff.
+    """
+
+    def __init__(
+        self,
+        reserve: int,
+        max_wait: float,
+        retries: int,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        maxsize: int = 1024,
+    ):
+        self.reserve = reserve
+        self.max_wait = max_wait
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.maxsize = maxsize
+        self._budgets: Dict[Tuple[str, str], RateLimitBudget] = {}
+        # Requests retried because of a rate limit
+        self.retried = 0
+        # Calls that were not urgent and waited for the budget to reset
+        self.deferred = 0
+
+    def record(self, token: str, response: Response):
+        headers = response.headers
+        remaining = headers.get("x-ratelimit-remaining")
+        if remaining is None:
+            return
+        resource = headers.get(
+            "x-ratelimit-resource", resource_for(response.request.url)
+        )
+        if len(self._budgets) >= self.maxsize:
+            now = time.time()
+            self._budgets = {
+                k: v for k, v in self._budgets.items() if v.reset_at > now
+            }
+        self._budgets[(token, resource)] = RateLimitBudget(
+            token=token,
+            resource=resource,
+            limit=int(headers.get("x-ratelimit-limit", 0)),
+            remaining=int(remaining),
+            reset_at=float(headers.get("x-ratelimit-reset", 0)),
+        )
+
+    def budgets(self) -> List[RateLimitBudget]:
+        return list(self._budgets.values())
+
+    def wait_time(self, token: str, resource: str) -> float:
+        """Seconds a call that is not urgent should wait before starting"""
+        budget = self._budgets.get((token, resource))
+        if budget is None or budget.remaining > self.reserve:
+            return 0
+        return max(0.0, budget.reset_at - time.time())
+
+    def retry_delay(self, response: Response, attempt: int) -> Optional[float]:
+        """Seconds to wait before retrying a rate limited response"""
+        if response.status_code not in (403, 429):
+            return None
+        headers = response.headers
+        retry_after = headers.get("retry-after")
+        if retry_after is not None:
+            return float(retry_after)
+        if headers.get("x-ratelimit-remaining") == "0":
+            # The primary limit: nothing succeeds before the reset
+            reset_at = float(headers.get("x-ratelimit-reset", 0))
+            return max(0.0, reset_at - time.time())
+        if "secondary rate limit" in response.text.lower():
+            backoff = self.base_delay * 2**attempt
+            return random.uniform(0, min(self.max_delay, backoff))
+        return None
+
+    async def send(
+        self,
+        token: str,
+        resource: str,
+        send: Callable[[], Awaitable[Response]],
+        urgent: bool = True,
+    ) -> Response:
+        if not urgent:
+            wait = self.wait_time(token, resource)
+            if wait > self.max_wait:
+                raise RateLimitError(
+                    f"GitHub {resource} rate limit is nearly exhausted"
+                )
+            if wait > 0:
+                self.deferred += 1
+                await asyncio.sleep(wait)
+        attempt = 0
+        while True:
+            response = await send()
+            self.record(token, response)
+            delay = self.retry_delay(response, attempt)
+            if delay is None or attempt >= self.retries:
+                return response
+            if delay > self.max_wait:
+                return response
+            attempt += 1
+            self.retried += 1
+            # Spread out retries from concurrent requests
+            await asyncio.sleep(delay + random.uniform(0, self.base_delay))
+
+
+rate_limit_tracker = RateLimitTracker(
+    config.GITHUB_RATE_LIMIT_RESERVE,
+    config.GITHUB_RATE_LIMIT_MAX_WAIT_SECONDS,
+    config.GITHUB_RATE_LIMIT_RETRIES,
+)
@@ -0,0 +1,86 @@
+import asyncio
+import time
+from typing import Dict, Tuple, Union
+
+from app.core import config
+from app.github.api import NotFoundError, get_repository_commit
+from app.github.client import AuthenticatedClient
+from app.github.models import GitHubRepo
+
+# Viewer, owner, repository, ref
+RefKey = Tuple[int, str, str, str]
+Resolution = Tuple[GitHubRepo, str]
+
+
+class RefCache:
+    """Resolve refs to commits with a short lived cache
+
+    Concurrent lookups of the same ref share one GraphQL request, and
+    refs or repositories that do not exist are remembered as well. Entries
+    are per viewer because the repository permission is part of the result.
+    """
+
+    def __init__(self, ttl: float, miss_ttl: float, maxsize: int = 1024):
+        self.ttl = ttl
+        self.miss_ttl = miss_ttl
+        self.maxsize = maxsize
+        # Expiry time and either the resolution or the not found message
+        self._entries: Dict[RefKey, Tuple[float, Union[Resolution, str]]] = {}
+        self._pending: Dict[RefKey, asyncio.Task[Resolution]] = {}
+
+    def _store(self, key: RefKey, value: Union[Resolution, str], ttl: float):
+        now = time.monotonic()
+        if len(self._entries) >= self.maxsize:
+            self._entries = {
+                k: v for k, v in self._entries.items() if v[0] > now
+            }
+            if len(self._entries) >= self.maxsize:
+                del self._entries[next(iter(self._entries))]
+        self._entries[key] = (now + ttl, value)
+
+    async def _resolve(
+        self, key: RefKey, client: AuthenticatedClient
+    ) -> Resolution:
+        _, repo_owner, repo_name, version = key
+        try:
+            resolution = await get_repository_commit(
+                client, repo_name, repo_owner, version
+            )
+        except NotFoundError as e:
+            self._store(key, str(e), self.miss_ttl)
+            raise
+        self._store(key, resolution, self.ttl)
+        return resolution
+
+    def _done(self, key: RefKey, task: asyncio.Task[Resolution]):
+        self._pending.pop(key, None)
+        # Every waiter may have been cancelled; do not warn about it
+        if not task.cancelled():
+            task.exception()
+
+    async def get_repository_commit(
+        self,
+        client: AuthenticatedClient,
+        viewer_id: int,
+        repo_name: str,
+        repo_owner: str,
+        version: str,
+    ) -> Resolution:
+        key = (viewer_id, repo_owner, repo_name, version)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            if isinstance(entry[1], str):
+                raise NotFoundError(entry[1])
+            return entry[1]
+        task = self._pending.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._resolve(key, client))
+            task.add_done_callback(lambda t: self._done(key, t))
+            self._pending[key] = task
+        # A cancelled caller must not cancel the request the others wait on
+        return await asyncio.shield(task)
+
+
+ref_cache = RefCache(
+    config.GITHUB_REF_CACHE_SECONDS, config.GITHUB_REF_MISS_CACHE_SECONDS
+)
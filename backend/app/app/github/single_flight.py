@@ -0,0 +1,64 @@
+import asyncio
+import functools
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass
+from typing import Any, Awaitable, Dict, Optional, ParamSpec, TypeVar
+
+T = TypeVar("T")
+P = ParamSpec("P")
+
+
+@dataclass
+class SingleFlightStats:
+    # Every call of the decorated function
+    calls: int = 0
+    # Calls that waited for an identical call already in flight
+    coalesced: int = 0
+
+
+# Stats of every single flight function by qualified name
+single_flight_stats: Dict[str, SingleFlightStats] = {}
+
+
+def _default_key(*args: Any, **kwargs: Any) -> Hashable:
+    return (args, tuple(sorted(kwargs.items())))
+
+
+def single_flight(key: Optional[Callable[..., Hashable]] = None):
+    """Share one call between concurrent calls with the same arguments
+
+    Callers that arrive while an identical call is running await its result
+    instead of starting another one. Nothing is cached once it finishes.
+    """
+    make_key = _default_key if key is None else key
+
+    def wrapper(f: Callable[P, Awaitable[T]]) -> Callable[P, Awaitable[T]]:
+        name = f"{f.__module__}.{f.__qualname__}"
+        stats = single_flight_stats.setdefault(name, SingleFlightStats())
+        in_flight: Dict[Hashable, asyncio.Future[T]] = {}
+
+        def done(call_key: Hashable, future: asyncio.Future[T]):
+            in_flight.pop(call_key, None)
+            # Every caller may have been cancelled; do not warn about it
+            if not future.cancelled():
+                future.exception()
+
+        @functools.wraps(f)
+        async def inner(*args: P.args, **kwargs: P.kwargs) -> T:
+            # Futures belong to one event loop
+            call_key = (asyncio.get_running_loop(), make_key(*args, **kwargs))
+            stats.calls += 1
+            future = in_flight.get(call_key)
+            if future is None:
+                future = asyncio.ensure_future(f(*args, **kwargs))
+                future.add_done_callback(functools.partial(done, call_key))
+                in_flight[call_key] = future
+            else:
+                stats.coalesced += 1
+            # A cancelled caller must not cancel the call others wait on
+            return await asyncio.shield(future)
+
+        inner.stats = stats  # type: ignore[attr-defined]
+        return inner
+
+    return wrapper
@@ -1,40 +1,74 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Optional
+
 from sqlalchemy.orm import Session
 
 from app.core.config import GITHUB_ORG, GITHUB_REPO_PREFIX
 from app.data_models.models import UserSession
 from app.db.schema import Repository
-from app.github.api import get_user_repositories
+from app.github.api import SEARCH_RESULT_LIMIT, search_user_repositories
 from app.github.client import AuthenticatedClient
 from app.service.repository import repository_service
 from app.service.user import RepositoryPermission, user_service
 
 
 async def sync_user_repositories(
-    client: AuthenticatedClient, db: Session, user: UserSession
+    client: AuthenticatedClient,
+    db: Session,
+    user: UserSession,
+    pushed_since: Optional[datetime] = None,
 ):
-    """A utility function to fetch and store user data"""
+    """A utility function to fetch and store user data
 
-    user_repos = await get_user_repositories(
-        client, f"org:{GITHUB_ORG} {GITHUB_REPO_PREFIX} in:name"
+    With pushed_since, only repositories pushed to since then are fetched.
+    Permissions on repositories that are not found are only removed when
+    every repository was fetched.
+    """
+    search_query = f"org:{GITHUB_ORG} {GITHUB_REPO_PREFIX} in:name"
+    if pushed_since is not None:
+        search_query += f" pushed:>={pushed_since:%Y-%m-%dT%H:%M:%SZ}"
+    user_repos, repository_count = await search_user_repositories(
+        client, search_query
+    )
+    # Search results stop at a limit; a repository missing from a
+    # truncated listing may still be the user's
+    complete = (
+        repository_count <= SEARCH_RESULT_LIMIT
+        and len(user_repos) >= repository_count
     )
-    user_repos = [
-        r for r in user_repos if r.name.startswith(f"{GITHUB_REPO_PREFIX}-")
-    ]
+    if not complete:
+        logging.warning(
+            f"Found {len(user_repos)} of {repository_count} repositories "
+            f"of {user.name}; keeping permissions on the others"
+        )
+    prefix = f"{GITHUB_REPO_PREFIX}-"
+    user_repos = [r for r in user_repos if r.name.startswith(prefix)]
+    permissions = None
     if not user.is_admin():
+        permissions = [RepositoryPermission.ADMIN, RepositoryPermission.WRITE]
         user_repos = [
             r
             for r in user_repos
-            if r.viewer_permission
-            in (
-                RepositoryPermission.ADMIN.name,
-                RepositoryPermission.WRITE.name,
-            )
+            if r.viewer_permission in (p.name for p in permissions)
         ]
-    repository_service.upsert_repositories(
+    await asyncio.to_thread(
+        repository_service.upsert_repositories,
         db,
         [
             Repository(id=repo.database_id, name=repo.name, owner=GITHUB_ORG)
             for repo in user_repos
         ],
     )
-    user_service.upsert_user_repositories(db, user, user_repos)
+    # Only a full listing shows which permissions the user no longer has
+    await asyncio.to_thread(
+        user_service.upsert_user_repositories,
+        db,
+        user,
+        user_repos,
+        prune=pushed_since is None and complete,
+        # The listing only covers these, so only these can be pruned
+        prune_prefix=prefix,
+        prune_permissions=permissions,
+    )
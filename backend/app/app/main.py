@@ -1,3 +1,6 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 from httpx import HTTPStatusError
@@ -7,10 +10,37 @@ from starlette.middleware.sessions import SessionMiddleware
 
 from app.api import api_router
 from app.core import config
+from app.core.auth import COOKIE_NAME, session_store
 from app.core.errors import CustomBaseError
+from app.core.loop_monitor import event_loop_monitor
+from app.db.utils import get_db
+from app.github import close_http_client, get_http_client
 from app.middleware import DBSessionMiddleware
+from app.service.events import job_event_hub
+from app.service.lease_reaper import job_lease_reaper
+from app.service.repository_sync import user_repository_sync
+from app.service.user_teams import user_teams_cache
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    get_http_client()
+    event_loop_monitor.start()
+    job_event_hub.start()
+    job_lease_reaper.start()
+    yield
+    await user_repository_sync.stop()
+    await user_teams_cache.stop()
+    await job_lease_reaper.stop()
+    job_event_hub.stop()
+    await event_loop_monitor.stop()
+    await close_http_client()
 
-server = FastAPI(title="CORGI - Content Output Review and Generation Interface")
+
+server = FastAPI(
+    title="CORGI - Content Output Review and Generation Interface",
+    lifespan=lifespan,
+)
 
 # Add API endpoints
 server.include_router(api_router, prefix="/api")
@@ -51,7 +81,11 @@ async def unauthorized_exception_handler(
 ):
     status_code = exc.response.status_code
     if status_code == 401 or status_code == 403:
-        del request.session["user"]
+        user = request.session.pop(COOKIE_NAME, None)
+        if user is not None and "sid" in user:
+            await asyncio.to_thread(
+                session_store.delete, get_db(request), user["sid"]
+            )
         return JSONResponse(status_code=status_code)
 
 
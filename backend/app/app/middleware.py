@@ -1,24 +1,49 @@
 import logging
 
 from fastapi import Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-from app.db.session import Session
 
+class DBSessionMiddleware:
+    """Close the request's database session and log unhandled errors
+
+    A plain ASGI middleware: messages are passed straight through, so
+    streamed bodies are not buffered and no task group is created per
+    request. The session is closed once the whole response has been sent.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+
+        async def send_wrapper(message: Message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
 
-class DBSessionMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request, call_next):
-        logging.debug(f"Creating Database session for {request.url}")
-        response = Response("Internal server error", status_code=500)
-        # https://fastapi.tiangolo.com/tutorial/sql-databases/#create-a-middleware
         try:
-            request.state.db = Session()
-            response = await call_next(request)
+            await self.app(scope, receive, send_wrapper)
         # We log the exception because it could be one of many.
         except Exception as e:
             logging.exception(e)
+            # Too late for an error response once the body has started
+            if not response_started:
+                response = Response("Internal server error", status_code=500)
+                await response(scope, receive, send)
         # Always close the db session, even after an exception
         finally:
-            logging.debug(f"Closing Database session for {request.url}")
-            request.state.db.close()
-        return response
+            # Sessions are created lazily by get_db; there may be none
+            db = scope.get("state", {}).get("db")
+            if db is not None:
+                logging.debug(
+                    f"Closing Database session for {Request(scope).url}"
+                )
+                db.close()
@@ -1,13 +1,15 @@
+import asyncio
 import json
 from typing import Any, Dict, List, Optional
 
 from httpx import AsyncClient, HTTPStatusError
 from sqlalchemy import and_, delete, func, or_, select
-from sqlalchemy.orm import Session, lazyload
+from sqlalchemy.orm import Session, contains_eager, raiseload
 
 from app.core import config
 from app.core.errors import CustomBaseError
 from app.data_models.models import BaseApprovedBook, RequestApproveBook
+from app.db.loading import APPROVED_BOOK_OPTIONS
 from app.db.schema import (
     ApprovedBook,
     Book,
@@ -81,9 +83,12 @@ def remove_old_versions(
     intersection = add_uuid_sha.intersection(keep_uuid_sha)
     query = (
         select(ApprovedBook)
-        .options(lazyload("*"))
         .join(Book)
         .join(Commit)
+        .options(
+            contains_eager(ApprovedBook.book).contains_eager(Book.commit),
+            raiseload("*", sql_only=True),
+        )
         .where(func.lower(Book.uuid).in_([b.uuid for b in to_add]))
         .where(ApprovedBook.consumer_id == consumer_id)
     )
@@ -171,6 +176,25 @@ def groupby(items, key):
     return groups
 
 
+def get_books_to_add(db: Session, to_add: List[RequestApproveBook]):
+    return db.scalars(
+        select(Book)
+        .options(raiseload("*", sql_only=True))
+        .join(Commit)
+        .where(
+            or_(
+                *[
+                    and_(
+                        func.lower(Book.uuid) == entry.uuid,
+                        func.lower(Commit.sha) == entry.commit_sha,
+                    )
+                    for entry in to_add
+                ]
+            )
+        )
+    ).all()
+
+
 async def add_new_entries(
     db: Session,
     to_add: List[RequestApproveBook],
@@ -191,22 +215,8 @@ async def add_new_entries(
         )
         for entry in to_add
     ]
-    db_books = db.scalars(
-        select(Book)
-        .options(lazyload("*"))
-        .join(Commit)
-        .where(
-            or_(
-                *[
-                    and_(
-                        func.lower(Book.uuid) == entry.uuid,
-                        func.lower(Commit.sha) == entry.commit_sha,
-                    )
-                    for entry in to_add
-                ]
-            )
-        )
-    ).all()
+    # Database work runs in a thread so it never blocks the event loop
+    db_books = await asyncio.to_thread(get_books_to_add, db, to_add)
     db_books_by_uuid = {dbb.uuid.lower(): dbb for dbb in db_books}
     book_info_by_consumer = groupby(
         to_add, lambda entry: guess_consumer(db_books_by_uuid[entry.uuid].slug)
@@ -219,12 +229,17 @@ async def add_new_entries(
                 to_keep = get_rex_book_versions(
                     rex_books, [b.uuid for b in to_add]
                 )
-            update_versions_by_consumer(
-                db, consumer, db_books_by_uuid, entries, to_keep
+            await asyncio.to_thread(
+                update_versions_by_consumer,
+                db,
+                consumer,
+                db_books_by_uuid,
+                entries,
+                to_keep,
             )
-        db.commit()
+        await asyncio.to_thread(db.commit)
     except Exception:
-        db.rollback()
+        await asyncio.to_thread(db.rollback)
         raise
 
 
@@ -247,7 +262,7 @@ def get_abl_info_database(
     version: Optional[str] = None,
     code_version: Optional[str] = None,
 ):
-    query = select(ApprovedBook).options(lazyload("*"))
+    query = select(ApprovedBook).options(*APPROVED_BOOK_OPTIONS)
     join = stable_join()
     if consumer:
         query = join(query, Consumer).where(Consumer.name == consumer)
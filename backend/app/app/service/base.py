@@ -1,38 +1,65 @@
-from typing import Any, List, Optional
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
 
 import sqlalchemy as sa
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
 from sqlalchemy.orm import Session as BaseSession
+from sqlalchemy.orm.interfaces import ORMOption
 
+from app.core.errors import CustomBaseError
 from app.db.base_class import Base as BaseSchema
 
 
+def encode_cursor(sort_value: datetime, obj_id: int) -> str:
+    key = json.dumps([sort_value.isoformat(), obj_id])
+    return base64.urlsafe_b64encode(key.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        sort_value, obj_id = json.loads(base64.urlsafe_b64decode(cursor))
+        return datetime.fromisoformat(sort_value), int(obj_id)
+    except (binascii.Error, TypeError, ValueError) as e:
+        raise CustomBaseError("Invalid cursor", status_code=400) from e
+
+
 class ServiceBase:
-    def __init__(self, schema_model: BaseSchema, data_model: BaseModel):
+    def __init__(
+        self,
+        schema_model: BaseSchema,
+        data_model: BaseModel,
+        load_options: Sequence[ORMOption] = (),
+    ):
         self.schema_model = schema_model
         self.data_model = data_model
+        # Loader options applied whenever items are loaded (app.db.loading)
+        self.load_options = load_options
+
+    def query(self, db_session: BaseSession):
+        return db_session.query(self.schema_model).options(*self.load_options)
 
     def get(self, db_session: BaseSession, obj_id: int) -> Optional[BaseSchema]:
         return (
-            db_session.query(self.schema_model)
+            self.query(db_session)
             .filter(self.schema_model.id == obj_id)
             .first()
         )
 
     def get_first_by(self, db_session: BaseSession, **kwargs: Any):
-        return db_session.query(self.schema_model).filter_by(**kwargs).first()
+        return self.query(db_session).filter_by(**kwargs).first()
 
     def get_items(self, db_session: BaseSession, *, skip=0, limit=100):
-        return (
-            db_session.query(self.schema_model).offset(skip).limit(limit).all()
-        )
+        return self.query(db_session).offset(skip).limit(limit).all()
 
     def get_items_by(
         self, db_session: BaseSession, *, skip=0, limit=100, **kwargs
     ):
         return (
-            db_session.query(self.schema_model)
+            self.query(db_session)
             .filter_by(**kwargs)
             .offset(skip)
             .limit(limit)
@@ -60,13 +87,46 @@ class ServiceBase:
         self, db_session: BaseSession, *, skip=0, limit=100, order_by=[]
     ):
         return (
-            db_session.query(self.schema_model)
+            self.query(db_session)
             .order_by(*order_by)
             .offset(skip)
             .limit(limit)
             .all()
         )
 
+    def get_items_before(
+        self,
+        db_session: BaseSession,
+        *,
+        before: Optional[str] = None,
+        limit=100,
+        sort_column: Optional[sa.Column] = None,
+    ) -> Tuple[List[BaseSchema], Optional[str]]:
+        """Keyset pagination over (sort_column, id), newest first
+
+        Returns a page of items and the cursor of the next page, or None on
+        the last page. Pages stay stable while new items are added and are
+        read from an index on (sort_column, id) without an OFFSET scan.
+        """
+        if sort_column is None:
+            sort_column = self.schema_model.created_at
+        query = self.query(db_session)
+        if before is not None:
+            query = query.filter(
+                sa.tuple_(sort_column, self.schema_model.id)
+                < decode_cursor(before)
+            )
+        items = (
+            query.order_by(sort_column.desc(), self.schema_model.id.desc())
+            .limit(limit)
+            .all()
+        )
+        next_cursor = None
+        if items and len(items) == limit:
+            last = items[-1]
+            next_cursor = encode_cursor(getattr(last, sort_column.key), last.id)
+        return items, next_cursor
+
     def create(self, db_session: BaseSession, obj_in: BaseModel) -> BaseSchema:
         obj_data = jsonable_encoder(obj_in)
 
@@ -0,0 +1,137 @@
+import asyncio
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.db.schema import CommitCache
+from app.db.utils import release_connection
+from app.github import (
+    AuthenticatedClient,
+    get_book_commit,
+    get_collection_uuids,
+)
+from app.github.models import BookCommit
+
+CommitKey = Tuple[str, str, str]
+
+
+class CommitCacheService:
+    """Data read from commits, cached by (owner, repo, sha)
+
+    Lookups try an in-process LRU, then the commit_cache table shared by
+    every worker, and only then GitHub. Rows are written in the caller's
+    transaction, which is committed before each GitHub request so no
+    connection is held while waiting.
+    """
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._memory: OrderedDict[CommitKey, BookCommit] = OrderedDict()
+
+    def _remember(self, key: CommitKey, commit: BookCommit):
+        self._memory[key] = commit
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def _select(self, db: Session, key: CommitKey) -> Optional[BookCommit]:
+        row = db.execute(
+            select(
+                CommitCache.committed_at,
+                CommitCache.books,
+                CommitCache.collection_uuids,
+            ).where(
+                CommitCache.owner == key[0],
+                CommitCache.repo == key[1],
+                CommitCache.sha == key[2],
+            )
+        ).first()
+        if row is None:
+            return None
+        return BookCommit(
+            committed_at=row.committed_at,
+            books=row.books,
+            collection_uuids=row.collection_uuids,
+        )
+
+    async def get_book_commit(
+        self,
+        db: Session,
+        client: AuthenticatedClient,
+        repo_owner: str,
+        repo_name: str,
+        sha: str,
+    ) -> BookCommit:
+        key = (repo_owner, repo_name, sha)
+        commit = self._memory.get(key)
+        if commit is not None:
+            self._memory.move_to_end(key)
+            return commit
+        # Database work runs in a thread so it never blocks the event loop
+        commit = await asyncio.to_thread(self._select, db, key)
+        if commit is None:
+            # Hand the connection back while waiting on GitHub
+            await asyncio.to_thread(release_connection, db)
+            committed_at, books = await get_book_commit(
+                client, repo_name, repo_owner, sha
+            )
+            commit = BookCommit(committed_at=committed_at, books=books)
+            await asyncio.to_thread(
+                db.execute,
+                insert(CommitCache)
+                .values(
+                    owner=repo_owner,
+                    repo=repo_name,
+                    sha=sha,
+                    committed_at=committed_at,
+                    books=books,
+                )
+                .on_conflict_do_nothing(),
+            )
+        self._remember(key, commit)
+        return commit
+
+    async def get_collection_uuids(
+        self,
+        db: Session,
+        client: AuthenticatedClient,
+        repo_owner: str,
+        repo_name: str,
+        sha: str,
+    ) -> Dict[str, Optional[str]]:
+        """UUID of each collection by file name"""
+        commit = await self.get_book_commit(
+            db, client, repo_owner, repo_name, sha
+        )
+        if commit.collection_uuids is None:
+            await asyncio.to_thread(release_connection, db)
+            # Only the collections books.xml refers to are needed
+            collection_uuids = await get_collection_uuids(
+                client,
+                repo_name,
+                repo_owner,
+                sha,
+                [f"{book['slug']}.collection.xml" for book in commit.books],
+            )
+            await asyncio.to_thread(
+                db.execute,
+                update(CommitCache)
+                .where(
+                    CommitCache.owner == repo_owner,
+                    CommitCache.repo == repo_name,
+                    CommitCache.sha == sha,
+                )
+                .values(collection_uuids=collection_uuids),
+            )
+            commit = commit.model_copy(
+                update={"collection_uuids": collection_uuids}
+            )
+            self._remember((repo_owner, repo_name, sha), commit)
+            return collection_uuids
+        return commit.collection_uuids
+
+
+commit_cache_service = CommitCacheService()
@@ -0,0 +1,127 @@
+import asyncio
+import logging
+import select
+import threading
+from contextlib import asynccontextmanager, suppress
+from typing import Optional, Set, Tuple
+
+import psycopg2
+from sqlalchemy import text
+
+from app.core import config
+from app.data_models.models import Job
+from app.db.session import Session, engine
+from app.service.jobs import jobs_service
+
+Subscriber = Tuple[asyncio.AbstractEventLoop, "asyncio.Queue[str]"]
+
+
+class JobEventHub:
+    """Fan out serialized job changes to every subscriber in this process.
+
+    When a channel is configured, events are published with Postgres NOTIFY
+    instead and a listener thread relays them to local subscribers, so every
+    worker and replica sees changes made by any other one.
+    """
+
+    def __init__(
+        self, channel: Optional[str] = None, max_queue_size: int = 100
+    ):
+        self.channel = channel
+        self.max_queue_size = max_queue_size
+        self._subscribers: Set[Subscriber] = set()
+        self._lock = threading.Lock()
+        self._listener: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    @asynccontextmanager
+    async def subscribe(self):
+        queue: asyncio.Queue[str] = asyncio.Queue(self.max_queue_size)
+        subscriber = (asyncio.get_running_loop(), queue)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        try:
+            yield queue
+        finally:
+            with self._lock:
+                self._subscribers.discard(subscriber)
+
+    @staticmethod
+    def _put(queue: "asyncio.Queue[str]", message: str):
+        # Slow subscribers lose their oldest events instead of growing forever
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(message)
+
+    def broadcast(self, message: str):
+        """Deliver a message to local subscribers (safe from any thread)"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for loop, queue in subscribers:
+            # The subscriber's event loop may already be closed
+            with suppress(RuntimeError):
+                loop.call_soon_threadsafe(self._put, queue, message)
+
+    def publish(self, job: Job):
+        if not self.channel:
+            self.broadcast(job.model_dump_json())
+            return
+        # NOTIFY payloads are limited to 8000 bytes, so only send the id and
+        # let each listener load the job itself
+        try:
+            with engine.connect() as conn:
+                conn.execute(
+                    text("SELECT pg_notify(:channel, :payload)"),
+                    {"channel": self.channel, "payload": job.id},
+                )
+                conn.commit()
+        except Exception as e:
+            logging.exception(e)
+
+    def _relay(self, job_id: str):
+        # Every process is notified; only load the job if someone listens
+        with self._lock:
+            if not self._subscribers:
+                return
+        with Session() as db:
+            job = jobs_service.get(db, int(job_id))
+            if job is not None:
+                self.broadcast(Job.model_validate(job).model_dump_json())
+
+    def _listen(self):
+        while not self._stopping.is_set():
+            try:
+                # A dedicated connection: LISTEN must outlive pool checkouts
+                conn = psycopg2.connect(config.SQLALCHEMY_DATABASE_URI)
+                try:
+                    conn.autocommit = True
+                    with conn.cursor() as cursor:
+                        cursor.execute(f'LISTEN "{self.channel}"')
+                    while not self._stopping.is_set():
+                        if select.select([conn], [], [], 5) == ([], [], []):
+                            continue
+                        conn.poll()
+                        while conn.notifies:
+                            self._relay(conn.notifies.pop(0).payload)
+                finally:
+                    conn.close()
+            except Exception as e:
+                logging.exception(e)
+                self._stopping.wait(5)
+
+    def start(self):
+        if self.channel and self._listener is None:
+            self._stopping.clear()
+            self._listener = threading.Thread(
+                target=self._listen, name="job-events", daemon=True
+            )
+            self._listener.start()
+
+    def stop(self):
+        if self._listener is not None:
+            self._stopping.set()
+            self._listener.join(timeout=10)
+            self._listener = None
+
+
+job_event_hub = JobEventHub(config.JOB_EVENTS_CHANNEL)
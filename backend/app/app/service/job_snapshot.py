@@ -0,0 +1,198 @@
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import ColumnElement, and_, delete, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.db.schema import Jobs as JobSchema
+from app.db.schema import JobSnapshot, utcnow
+from app.db.utils import release_connection
+from app.service.rendered_job import rendered_job_service
+
+# Days rendered per batch when building missing snapshots
+_STORE_CHUNK_DAYS = 31
+# Snapshot rows held in memory at once while streaming
+_STREAM_CHUNK_DAYS = 7
+
+
+def snapshot_cutoff(now: Optional[datetime] = None) -> date:
+    """Jobs created before this day are served from snapshots"""
+    if now is None:
+        now = datetime.now(timezone.utc)
+    return now.date() - timedelta(days=1)
+
+
+def start_of_day(day: date) -> datetime:
+    return datetime.combine(day, time(), tzinfo=timezone.utc)
+
+
+def group_consecutive_days(days: Iterable[date]) -> List[Tuple[date, date]]:
+    """Group days into [start, end) ranges of consecutive days"""
+    ranges: List[Tuple[date, date]] = []
+    for day in sorted(days):
+        if ranges and ranges[-1][1] == day:
+            ranges[-1] = (ranges[-1][0], day + timedelta(days=1))
+        else:
+            ranges.append((day, day + timedelta(days=1)))
+    return ranges
+
+
+class JobSnapshotService:
+    def render_days(self, db: Session, days: List[date]) -> Dict[date, str]:
+        conditions = [
+            and_(
+                JobSchema.created_at >= start_of_day(start),
+                JobSchema.created_at < start_of_day(end),
+            )
+            for start, end in group_consecutive_days(days)
+        ]
+        rendered: Dict[date, List[str]] = {day: [] for day in days}
+        for created_at, content in rendered_job_service.iter_jobs_json(
+            db, or_(*conditions)
+        ):
+            rendered[created_at.date()].append(content)
+        return {day: ",".join(jobs) for day, jobs in rendered.items()}
+
+    def _store_days(
+        self, db: Session, days: List[date], versions: Dict[date, int]
+    ):
+        rendered = self.render_days(db, days)
+        new_days = [day for day in days if day not in versions]
+        if new_days:
+            db.execute(
+                insert(JobSnapshot)
+                .values(
+                    [
+                        {"day": day, "version": 0, "content": rendered[day]}
+                        for day in new_days
+                    ]
+                )
+                .on_conflict_do_nothing(index_elements=["day"])
+            )
+        for day in days:
+            if day in versions:
+                # Skipped if the day was invalidated while rendering
+                db.execute(
+                    update(JobSnapshot)
+                    .where(
+                        JobSnapshot.day == day,
+                        JobSnapshot.version == versions[day],
+                    )
+                    .values(content=rendered[day])
+                )
+
+    def iter_jobs_json(
+        self, db: Session, start: date, end: date, rebuild: bool = False
+    ) -> Iterator[str]:
+        """Comma separated job JSON for jobs created in [start, end)
+
+        Days without a current snapshot are rendered and stored, so only new
+        or invalidated days are built from the jobs table. Snapshots are then
+        read back a few days at a time, and the transaction is committed
+        before each chunk is handed to the caller, so no connection is held
+        while a slow client downloads it.
+        """
+        in_range = and_(JobSnapshot.day >= start, JobSnapshot.day < end)
+        if rebuild:
+            db.execute(delete(JobSnapshot).where(in_range))
+            # Render every job again too, in case a stored rendering is
+            # stale without its job having changed
+            rendered_job_service.invalidate(
+                db,
+                JobSchema.created_at >= start_of_day(start),
+                JobSchema.created_at < start_of_day(end),
+            )
+        versions: Dict[date, int] = {}
+        current: Set[date] = set()
+        for day, version, is_current in db.execute(
+            select(
+                JobSnapshot.day,
+                JobSnapshot.version,
+                JobSnapshot.content.is_not(None),
+            ).where(in_range)
+        ):
+            versions[day] = version
+            if is_current:
+                current.add(day)
+        days = [start + timedelta(days=i) for i in range((end - start).days)]
+        missing = [day for day in days if day not in current]
+        if missing:
+            for i in range(0, len(missing), _STORE_CHUNK_DAYS):
+                self._store_days(
+                    db, missing[i : i + _STORE_CHUNK_DAYS], versions
+                )
+            # Days that fell out of the window will never be read again
+            db.execute(delete(JobSnapshot).where(JobSnapshot.day < start))
+            db.commit()
+        next_day = start
+        while True:
+            rows = db.execute(
+                select(JobSnapshot.day, JobSnapshot.content)
+                .where(
+                    in_range,
+                    JobSnapshot.day >= next_day,
+                    # Days without jobs have nothing to send
+                    or_(
+                        JobSnapshot.content.is_(None), JobSnapshot.content != ""
+                    ),
+                )
+                .order_by(JobSnapshot.day.asc())
+                .limit(_STREAM_CHUNK_DAYS)
+            ).all()
+            release_connection(db)
+            for day, content in rows:
+                if content is None:
+                    # Invalidated after it was stored; render it just once
+                    content = self.render_days(db, [day])[day]
+                if content:
+                    yield content
+            if len(rows) < _STREAM_CHUNK_DAYS:
+                return
+            next_day = rows[-1][0] + timedelta(days=1)
+
+    def invalidate(self, db: Session, job: JobSchema):
+        """Mark the snapshot containing this job as stale
+
+        Runs in the caller's transaction so the snapshot is invalidated
+        exactly when the job change commits.
+        """
+        self.invalidate_days(db, [job.created_at.date()])
+
+    def invalidate_days(self, db: Session, days: Iterable[date]):
+        cutoff = snapshot_cutoff()
+        stale = sorted({day for day in days if day < cutoff})
+        if not stale:
+            return
+        statement = insert(JobSnapshot).values(
+            [{"day": day, "version": 1, "content": None} for day in stale]
+        )
+        db.execute(
+            statement.on_conflict_do_update(
+                index_elements=["day"],
+                set_={
+                    "version": JobSnapshot.version + 1,
+                    "content": None,
+                    "updated_at": utcnow(),
+                },
+            )
+        )
+
+    def invalidate_jobs(self, db: Session, *conditions: ColumnElement[bool]):
+        """Forget every rendering of matching jobs
+
+        For changes to users or repositories, which appear in the JSON of
+        their jobs without changing the jobs themselves.
+        """
+        rendered_job_service.invalidate(db, *conditions)
+        self.invalidate_days(
+            db,
+            db.scalars(
+                select(func.date(JobSchema.created_at))
+                .where(*conditions)
+                .distinct()
+            ).all(),
+        )
+
+
+job_snapshot_service = JobSnapshotService()
@@ -1,31 +1,58 @@
 import asyncio
 import logging
-from datetime import datetime
-from typing import Dict, Generator, List, Optional, Union, cast
+from datetime import datetime, timedelta
+from typing import (
+    Any,
+    Dict,
+    Generator,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+    cast,
+)
 from uuid import NAMESPACE_OID, UUID, uuid5
 
-from lxml import etree
+from sqlalchemy import Row, bindparam, case, func, select, update
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, aliased, joinedload, selectinload
 
+from app.core import config
 from app.core.errors import CustomBaseError
 from app.data_models.models import Job as JobModel
-from app.data_models.models import JobCreate, JobUpdate, UserSession
-from app.db.schema import Book, BookJob, Commit, Repository
+from app.data_models.models import (
+    JobCreate,
+    JobUpdate,
+    JobUpdateItem,
+    UserSession,
+)
+from app.db.loading import JOB_OPTIONS
+from app.db.schema import Book, BookJob, Commit, Repository, utcnow
 from app.db.schema import Jobs as JobSchema
 from app.github import (
     AuthenticatedClient,
     GitHubRepo,
-    get_book_repository,
-    get_collections,
+    ref_cache,
 )
 from app.service.base import ServiceBase
+from app.service.commit_cache import commit_cache_service
+from app.service.job_snapshot import job_snapshot_service
+from app.service.rendered_job import rendered_job_service
 from app.service.repository import repository_service
 from app.service.user import user_service
-from app.xml_utils import xpath1
 
+QUEUED_STATUS_ID = 1
+ASSIGNED_STATUS_ID = 2
+PROCESSING_STATUS_ID = 3
+FAILED_STATUS_ID = 4
+# Jobs in these states are owned by a worker and carry a lease
+LEASED_STATUS_IDS = (ASSIGNED_STATUS_ID, PROCESSING_STATUS_ID)
+# failed, completed and aborted
+COMPLETED_STATUS_IDS = (FAILED_STATUS_ID, 5, 6)
 
-async def get_or_create_repository(
+
+def get_or_create_repository(
     db: Session,
     repo_name: str,
     repo_owner: str,
@@ -53,24 +80,23 @@ def add_books_to_commit(
     db: Session,
     commit: Commit,
     repo_books: List[dict],
-    collections_by_name: Dict[str, etree.ElementBase],
+    collection_uuids: Dict[str, Optional[str]],
 ):
     for repo_book in repo_books:
         slug = repo_book["slug"]
         style = repo_book["style"]
         collection_name = f"{slug}.collection.xml"
-        if collection_name not in collections_by_name:
+        if collection_name not in collection_uuids:
             raise CustomBaseError(f'Collection not found "{collection_name}"')
-        collection = collections_by_name[f"{slug}.collection.xml"]
-        uuid = xpath1(collection, "//*[local-name()='uuid']")
-        if uuid is None or not uuid.text:
+        uuid = collection_uuids[collection_name]
+        if not uuid:
             raise CustomBaseError("Could not get uuid from collection xml")
         try:
-            _ = UUID(uuid.text)
+            _ = UUID(uuid)
         except ValueError as ve:
-            raise CustomBaseError(f"Invalid UUID: {uuid.text}") from ve
+            raise CustomBaseError(f"Invalid UUID: {uuid}") from ve
         # TODO: Edition should be either nullable or in a different table
-        db_book = Book(uuid=uuid.text, slug=slug, edition=0, style=style)
+        db_book = Book(uuid=uuid, slug=slug, edition=0, style=style)
         commit.books.append(db_book)
         db.add(db_book)
 
@@ -89,6 +115,32 @@ def get_or_add_book(db: Session, book: Book):
     return book
 
 
+def new_ephemeral_book(commit_id: int, slug: str) -> Book:
+    """A book that was not in the collection, but created during the build"""
+    return Book(
+        uuid=str(uuid5(NAMESPACE_OID, slug)),
+        commit_id=commit_id,
+        edition=0,
+        slug=slug,
+        style="super" if slug.startswith("super--") else "unknown",
+    )
+
+
+def guard_completed_status(current_status_id: int, incoming_status_id: int):
+    """Status a job should be updated to
+
+    Pipelines will try to override a completed state with assigned,
+    processing status if unlucky. Only allow updating to completed states to
+    prevent this.
+    """
+    if (
+        current_status_id in COMPLETED_STATUS_IDS
+        and incoming_status_id not in COMPLETED_STATUS_IDS
+    ):
+        return current_status_id
+    return incoming_status_id
+
+
 def add_books_to_job(
     db: Session,
     job: JobSchema,
@@ -115,9 +167,15 @@ class JobsService(ServiceBase):
         version = job_in.version is not None and job_in.version or "main"
         repo_book_in = job_in.book
 
-        github_repo, sha, timestamp, repo_books = await get_book_repository(
-            client, repo_name, repo_owner, version
+        # Only the ref is resolved on GitHub, at most once every few
+        # seconds; what a commit contains never changes
+        github_repo, sha = await ref_cache.get_repository_commit(
+            client, user.id, repo_name, repo_owner, version
         )
+        book_commit = await commit_cache_service.get_book_commit(
+            db, client, repo_owner, repo_name, sha
+        )
+        repo_books = book_commit.books
 
         # If the user supplied an invalid argument for book
         if repo_book_in is not None and not any(
@@ -125,31 +183,45 @@ class JobsService(ServiceBase):
         ):
             raise CustomBaseError(f"Book not in repository '{repo_book_in}'")
 
-        async def insert_job():
+        def find_commit() -> Optional[Commit]:
             commit = cast(
                 Optional[Commit],
-                db.query(Commit).filter(Commit.sha == sha).first(),
+                db.query(Commit)
+                .options(
+                    selectinload(Commit.books),
+                    joinedload(Commit.repository).selectinload(
+                        Repository.users
+                    ),
+                )
+                .filter(Commit.sha == sha)
+                .first(),
             )
             # If the commit has been recorded and has books, reuse the
             # existing data
             if (
-                commit is not None
-                and len(commit.books) != 0
-                and commit.repository.owner == repo_owner
+                commit is None
+                or len(commit.books) == 0
+                or commit.repository.owner != repo_owner
             ):
-                db_repo = commit.repository
-                # Check to see if the user has been associated with this repo
-                if not any(ur.user.id == user.id for ur in db_repo.users):
-                    # If not, get the information we need and add the
-                    # association. Use `get_repository` to get the
-                    # viewer_permission
-                    user_service.upsert_user_repositories(
-                        db, user, [github_repo]
-                    )
-            else:
+                return None
+            db_repo = commit.repository
+            # Check to see if the user has been associated with this repo
+            if not any(ur.user_id == user.id for ur in db_repo.users):
+                # If not, get the information we need and add the
+                # association. Use `get_repository` to get the
+                # viewer_permission
+                user_service.upsert_user_repositories(db, user, [github_repo])
+            return commit
+
+        def store_job(
+            commit: Optional[Commit],
+            uuids: Optional[Dict[str, Optional[str]]],
+        ) -> JobSchema:
+            if commit is None:
+                assert uuids is not None
                 # Could cause integrity error because it commits the
                 # repository to the database before returning
-                db_repo = await get_or_create_repository(
+                db_repo = get_or_create_repository(
                     db, repo_name, repo_owner, github_repo, user
                 )
 
@@ -157,16 +229,13 @@ class JobsService(ServiceBase):
                 commit = Commit(
                     repository_id=db_repo.id,
                     sha=sha,
-                    timestamp=timestamp,
+                    timestamp=book_commit.committed_at,
                     books=[],
                 )
                 db.add(commit)
 
                 # And record all the book metadata
-                collections_by_name = await get_collections(
-                    client, repo_name, repo_owner, sha
-                )
-                add_books_to_commit(db, commit, repo_books, collections_by_name)
+                add_books_to_commit(db, commit, repo_books, uuids)
 
                 # Flush the db to populate autogenerated book and commit ids
                 db.flush()
@@ -188,19 +257,36 @@ class JobsService(ServiceBase):
             add_books_to_job(db, db_job, books_for_job)
 
             db.commit()
-            return db_job
+            # Load everything the API model reads at once
+            return cast(JobSchema, self.get(db, db_job.id))
+
+        async def insert_job() -> JobSchema:
+            # Database work runs in a thread so it never blocks the event
+            # loop; the session is only ever used by one thread at a time
+            commit = await asyncio.to_thread(find_commit)
+            uuids = None
+            if commit is None:
+                # Releases the connection before waiting on GitHub
+                uuids = await commit_cache_service.get_collection_uuids(
+                    db, client, repo_owner, repo_name, sha
+                )
+            return await asyncio.to_thread(store_job, commit, uuids)
 
         # Very rarely, an integrity error will occur due to asynchronism
         # in those cases, we can wait about 100ms and try again
         for _ in range(3):
             try:
-                return await insert_job()
+                job = await insert_job()
+                break
             except IntegrityError as ie:
                 # Make these errors visible, but clarify that they were caught
                 logging.error(f"Handled integrity error: {ie}")
-                db.rollback()
+                await asyncio.to_thread(db.rollback)
                 await asyncio.sleep(0.1)
-        raise CustomBaseError("Could not create job")
+        else:
+            raise CustomBaseError("Could not create job")
+        await asyncio.to_thread(rendered_job_service.refresh, db, job)
+        return job
 
     def update(self, db_session: Session, job: JobSchema, job_in: JobUpdate):
         if isinstance(job_in.artifact_urls, list):
@@ -216,18 +302,8 @@ class JobsService(ServiceBase):
             }
             if ephemeral_book_slugs:
                 for book_slug in ephemeral_book_slugs:
-                    book_uuid = str(uuid5(NAMESPACE_OID, book_slug))
-                    style = (
-                        "super"
-                        if book_slug.startswith("super--")
-                        else "unknown"
-                    )
-                    book = Book(
-                        uuid=book_uuid,
-                        commit_id=job.books[0].book.commit_id,
-                        edition=0,
-                        slug=book_slug,
-                        style=style,
+                    book = new_ephemeral_book(
+                        job.books[0].book.commit_id, book_slug
                     )
                     book = get_or_add_book(db_session, book)
                     add_books_to_job(db_session, job, [book])
@@ -238,7 +314,147 @@ class JobsService(ServiceBase):
                     book_job.artifact_url = artifact_url
         elif job_in.artifact_urls is not None:
             job.books[0].artifact_url = job_in.artifact_urls
-        return super().update(db_session, job, job_in, JobUpdate)
+        now = utcnow()
+        if int(job_in.status_id) not in LEASED_STATUS_IDS:
+            job.lease_expires_at = None
+        elif job.lease_expires_at is not None:
+            # Any update from a worker that claimed the job shows it is
+            # still alive. Jobs taken without a claim are never leased:
+            # their workers do not send heartbeats.
+            job.lease_expires_at = now + timedelta(
+                seconds=config.JOB_LEASE_SECONDS
+            )
+        # Artifact changes alone would not touch the job row, but they do
+        # change what clients see
+        job.updated_at = now
+        job_snapshot_service.invalidate(db_session, job)
+        job = super().update(db_session, job, job_in, JobUpdate)
+        rendered_job_service.refresh(db_session, job)
+        return job
+
+    def bulk_update(
+        self, db: Session, updates: List[JobUpdateItem]
+    ) -> List[JobSchema]:
+        """Apply a batch of updates in a single transaction
+
+        Each kind of change is written with one set-based statement instead
+        of loading and merging every job. Updates to the same job apply in
+        order; jobs that do not exist are left out of the result.
+        """
+        # Lock in id order so that concurrent batches cannot deadlock
+        status_by_id: Dict[int, int] = {}
+        claimed_ids = set()
+        for job_id, status_id, lease in db.execute(
+            select(
+                JobSchema.id, JobSchema.status_id, JobSchema.lease_expires_at
+            )
+            .where(JobSchema.id.in_({u.id for u in updates}))
+            .order_by(JobSchema.id.asc())
+            .with_for_update()
+        ).all():
+            status_by_id[job_id] = status_id
+            if lease is not None:
+                claimed_ids.add(job_id)
+        now = utcnow()
+        lease_expires_at = now + timedelta(seconds=config.JOB_LEASE_SECONDS)
+        job_rows: Dict[int, Dict[str, Any]] = {}
+        first_book_urls: Dict[int, str] = {}
+        book_urls: Dict[Tuple[int, str], str] = {}
+        for job_in in updates:
+            if job_in.id not in status_by_id:
+                continue
+            status_id = guard_completed_status(
+                status_by_id[job_in.id], int(job_in.status_id)
+            )
+            status_by_id[job_in.id] = status_id
+            row = job_rows.setdefault(job_in.id, {"id": job_in.id})
+            row.update(
+                job_in.model_dump(
+                    include={"worker_version", "error_message"},
+                    exclude_unset=True,
+                ),
+                status_id=status_id,
+                lease_expires_at=(
+                    lease_expires_at
+                    if status_id in LEASED_STATUS_IDS
+                    and job_in.id in claimed_ids
+                    else None
+                ),
+                updated_at=now,
+            )
+            if isinstance(job_in.artifact_urls, list):
+                for artifact in job_in.artifact_urls:
+                    book_urls[(job_in.id, artifact.slug)] = artifact.url
+            elif job_in.artifact_urls is not None:
+                first_book_urls[job_in.id] = job_in.artifact_urls
+        if not job_rows:
+            return []
+
+        # Rows that set the same columns are sent as one executemany
+        rows_by_columns: Dict[frozenset, List[Dict[str, Any]]] = {}
+        for row in job_rows.values():
+            rows_by_columns.setdefault(frozenset(row), []).append(row)
+        for rows in rows_by_columns.values():
+            db.execute(update(JobSchema), rows)
+        if book_urls:
+            self._set_book_artifact_urls(db, book_urls)
+        if first_book_urls:
+            first_book = aliased(BookJob)
+            db.connection().execute(
+                update(BookJob)
+                .where(
+                    BookJob.job_id == bindparam("b_job_id"),
+                    BookJob.book_id
+                    == select(func.min(first_book.book_id))
+                    .where(first_book.job_id == bindparam("b_job_id"))
+                    .scalar_subquery(),
+                )
+                .values(artifact_url=bindparam("b_url")),
+                [
+                    {"b_job_id": job_id, "b_url": url}
+                    for job_id, url in first_book_urls.items()
+                ],
+            )
+        jobs = self._load_changed(db, list(job_rows))
+        db.commit()
+        return jobs
+
+    def _set_book_artifact_urls(
+        self, db: Session, book_urls: Dict[Tuple[int, str], str]
+    ):
+        book_jobs = db.execute(
+            select(BookJob.job_id, Book.slug, Book.commit_id)
+            .join(Book, Book.id == BookJob.book_id)
+            .where(BookJob.job_id.in_({job_id for job_id, _ in book_urls}))
+        ).all()
+        known = {(job_id, slug) for job_id, slug, _ in book_jobs}
+        commit_by_job = {
+            job_id: commit_id for job_id, _, commit_id in book_jobs
+        }
+        for job_id, slug in book_urls.keys() - known:
+            if job_id not in commit_by_job:
+                # Without books there is no commit to add the book to
+                logging.warning(f"Job {job_id} has no books for {slug}")
+                continue
+            book = get_or_add_book(
+                db, new_ephemeral_book(commit_by_job[job_id], slug)
+            )
+            db.add(BookJob(job_id=job_id, book_id=book.id))
+        db.flush()
+        db.connection().execute(
+            update(BookJob)
+            .where(
+                BookJob.job_id == bindparam("b_job_id"),
+                BookJob.book_id.in_(
+                    select(Book.id).where(Book.slug == bindparam("b_slug"))
+                ),
+            )
+            .values(artifact_url=bindparam("b_url")),
+            [
+                {"b_job_id": job_id, "b_slug": slug, "b_url": url}
+                for (job_id, slug), url in book_urls.items()
+            ],
+        )
 
     def get_jobs_in_date_range(
         self,
@@ -247,12 +463,170 @@ class JobsService(ServiceBase):
         end: datetime,
         order_by: Optional[List] = None,
     ) -> List[JobSchema]:
-        query = db.query(JobSchema).filter(
+        query = self.query(db).filter(
             JobSchema.created_at >= start, JobSchema.created_at <= end
         )
         if order_by is not None:
             query = query.order_by(*order_by)
         return query.all()
 
+    def iter_rendered_jobs_in_date_range(
+        self, db: Session, start: datetime, end: datetime
+    ) -> Iterator[str]:
+        """Stored API JSON of each job in the range, ordered by id"""
+        for _, content in rendered_job_service.iter_jobs_json(
+            db, JobSchema.created_at >= start, JobSchema.created_at <= end
+        ):
+            yield content
+
+    def claim(
+        self,
+        db: Session,
+        job_type_id: int,
+        count: int,
+        lease: timedelta,
+        worker_version: Optional[str] = None,
+    ) -> Tuple[List[JobSchema], datetime]:
+        """Assign up to `count` queued jobs of a type and lease them
+
+        Candidate rows are locked with SKIP LOCKED, so concurrent claims
+        never hand out the same job and never wait on each other.
+        """
+        now = utcnow()
+        lease_expires_at = now + lease
+        claimable = (
+            select(JobSchema.id)
+            .where(
+                JobSchema.status_id == QUEUED_STATUS_ID,
+                JobSchema.job_type_id == job_type_id,
+            )
+            .order_by(JobSchema.id.asc())
+            .limit(count)
+            .with_for_update(skip_locked=True)
+        )
+        values = {
+            "status_id": ASSIGNED_STATUS_ID,
+            "lease_expires_at": lease_expires_at,
+            "updated_at": now,
+        }
+        if worker_version is not None:
+            values["worker_version"] = worker_version
+        claimed_ids = db.scalars(
+            update(JobSchema)
+            .where(JobSchema.id.in_(claimable.scalar_subquery()))
+            .values(**values)
+            .returning(JobSchema.id)
+            .execution_options(synchronize_session=False)
+        ).all()
+        jobs = self._load_changed(db, claimed_ids)
+        db.commit()
+        return jobs, lease_expires_at
+
+    def renew_lease(
+        self, db: Session, job_id: int, lease: timedelta
+    ) -> Optional[datetime]:
+        """Extend the lease of an assigned or processing job
+
+        Only jobs that were claimed have a lease to extend. Returns the new
+        expiry, or None when the job is not leased.
+        The lease is not part of the API representation of a job, so
+        updated_at is left alone.
+        """
+        lease_expires_at = utcnow() + lease
+        renewed_id = db.scalars(
+            update(JobSchema)
+            .where(
+                JobSchema.id == job_id,
+                JobSchema.status_id.in_(LEASED_STATUS_IDS),
+                JobSchema.lease_expires_at.is_not(None),
+            )
+            .values(
+                lease_expires_at=lease_expires_at,
+                updated_at=JobSchema.updated_at,
+            )
+            .returning(JobSchema.id)
+            .execution_options(synchronize_session=False)
+        ).first()
+        db.commit()
+        return lease_expires_at if renewed_id is not None else None
+
+    def reap_expired_leases(self, db: Session) -> List[JobSchema]:
+        """Release jobs whose worker stopped renewing the lease
+
+        Assigned jobs never started, so they are queued again for another
+        worker. Processing jobs may have partially run, so they are failed.
+        """
+        now = utcnow()
+        expired = (
+            select(JobSchema.id)
+            .where(
+                JobSchema.status_id.in_(LEASED_STATUS_IDS),
+                JobSchema.lease_expires_at < now,
+            )
+            .with_for_update(skip_locked=True)
+        )
+        was_assigned = JobSchema.status_id == ASSIGNED_STATUS_ID
+        reaped_ids = db.scalars(
+            update(JobSchema)
+            .where(JobSchema.id.in_(expired.scalar_subquery()))
+            .values(
+                status_id=case(
+                    (was_assigned, QUEUED_STATUS_ID), else_=FAILED_STATUS_ID
+                ),
+                error_message=case(
+                    (was_assigned, JobSchema.error_message),
+                    else_="Lease expired: the worker stopped responding",
+                ),
+                lease_expires_at=None,
+                updated_at=now,
+            )
+            .returning(JobSchema.id)
+            .execution_options(synchronize_session=False)
+        ).all()
+        jobs = self._load_changed(db, reaped_ids)
+        db.commit()
+        return jobs
+
+    def _load_changed(self, db: Session, job_ids: List[int]) -> List[JobSchema]:
+        """Load jobs changed by a bulk statement and refresh derived data"""
+        if not job_ids:
+            return []
+        jobs = (
+            self.query(db)
+            .filter(JobSchema.id.in_(job_ids))
+            .order_by(JobSchema.id.asc())
+            # The session may hold these jobs from before the change
+            .populate_existing()
+            .all()
+        )
+        for job in jobs:
+            job_snapshot_service.invalidate(db, job)
+        rendered_job_service.render(db, jobs)
+        return jobs
+
+    def get_job_mins(self, db: Session, *, limit=20, **kwargs) -> List[Row]:
+        """id, status_id and job_type_id of matching jobs ordered by id
+
+        Only these columns are selected, so no relationships are loaded.
+        Queued and assigned jobs are read from ix_jobs_pending.
+        """
+        return (
+            db.query(JobSchema.id, JobSchema.status_id, JobSchema.job_type_id)
+            .filter_by(**kwargs)
+            .order_by(JobSchema.id.asc())
+            .limit(limit)
+            .all()
+        )
+
+    def get_jobs_updated_since(
+        self, db: Session, since: datetime
+    ) -> List[JobSchema]:
+        return (
+            self.query(db)
+            .filter(JobSchema.updated_at >= since)
+            .order_by(JobSchema.updated_at.asc(), JobSchema.id.asc())
+            .all()
+        )
+
 
-jobs_service = JobsService(JobSchema, JobModel)
+jobs_service = JobsService(JobSchema, JobModel, JOB_OPTIONS)
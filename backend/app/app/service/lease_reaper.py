@@ -0,0 +1,51 @@
+import asyncio
+import logging
+from contextlib import suppress
+from typing import Optional
+
+from app.core import config
+from app.data_models.models import Job
+from app.db.session import Session
+from app.service.events import job_event_hub
+from app.service.jobs import jobs_service
+
+
+class JobLeaseReaper:
+    """Periodically release jobs whose worker stopped renewing the lease.
+
+    Every process runs one; reaping locks jobs with SKIP LOCKED, so
+    concurrent reapers split the work instead of repeating it.
+    """
+
+    def __init__(self, interval: int):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def reap(self):
+        with Session() as db:
+            jobs = jobs_service.reap_expired_leases(db)
+            for job in jobs:
+                logging.warning(f"Released job {job.id}: lease expired")
+                job_event_hub.publish(Job.model_validate(job))
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await asyncio.to_thread(self.reap)
+            except Exception as e:
+                logging.exception(e)
+
+    def start(self):
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+
+job_lease_reaper = JobLeaseReaper(config.JOB_REAPER_INTERVAL_SECONDS)
@@ -0,0 +1,107 @@
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, Tuple
+
+from sqlalchemy import ColumnElement, delete, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.data_models.models import Job as JobModel
+from app.db.loading import JOB_OPTIONS
+from app.db.schema import Jobs as JobSchema
+from app.db.schema import RenderedJob
+from app.db.utils import release_connection
+
+_RENDER_CHUNK_SIZE = 500
+
+
+class RenderedJobService:
+    def render(self, db: Session, jobs: Iterable[JobSchema]) -> Dict[int, str]:
+        """Serialize jobs and store the result in the caller's transaction"""
+        rows = [
+            {
+                "job_id": job.id,
+                "content": JobModel.model_validate(job).model_dump_json(),
+                "job_updated_at": job.updated_at,
+            }
+            for job in jobs
+        ]
+        if rows:
+            statement = insert(RenderedJob).values(rows)
+            db.execute(
+                statement.on_conflict_do_update(
+                    index_elements=["job_id"],
+                    set_={
+                        "content": statement.excluded.content,
+                        "job_updated_at": statement.excluded.job_updated_at,
+                    },
+                    # Never replace a rendering of a newer version of the job
+                    where=(
+                        RenderedJob.job_updated_at
+                        <= statement.excluded.job_updated_at
+                    ),
+                )
+            )
+        return {row["job_id"]: row["content"] for row in rows}
+
+    def refresh(self, db: Session, job: JobSchema) -> str:
+        content = self.render(db, [job])[job.id]
+        db.commit()
+        return content
+
+    def invalidate(self, db: Session, *conditions: ColumnElement[bool]):
+        """Drop the stored JSON of matching jobs in the caller's transaction
+
+        For changes to data a rendering embeds, like a user's name, that do
+        not touch jobs.updated_at. The jobs are rendered again when read.
+        """
+        db.execute(
+            delete(RenderedJob).where(
+                RenderedJob.job_id.in_(select(JobSchema.id).where(*conditions))
+            )
+        )
+
+    def iter_jobs_json(
+        self, db: Session, *conditions: ColumnElement[bool]
+    ) -> Iterator[Tuple[datetime, str]]:
+        """(created_at, json) of the matching jobs ordered by id
+
+        Rows are read in chunks keyed on the job id. Jobs that were never
+        rendered or changed since they were rendered are loaded and rendered
+        again. The transaction is committed after every chunk, so the
+        connection goes back to the pool while the caller consumes it.
+        """
+        last_id = None
+        while True:
+            query = (
+                select(
+                    JobSchema.id,
+                    JobSchema.created_at,
+                    RenderedJob.content,
+                    RenderedJob.job_updated_at == JobSchema.updated_at,
+                )
+                .outerjoin(RenderedJob, RenderedJob.job_id == JobSchema.id)
+                .where(*conditions)
+                .order_by(JobSchema.id.asc())
+                .limit(_RENDER_CHUNK_SIZE)
+            )
+            if last_id is not None:
+                query = query.where(JobSchema.id > last_id)
+            rows = db.execute(query).all()
+            stale_ids = [job_id for job_id, _, _, fresh in rows if not fresh]
+            rendered: Dict[int, str] = {}
+            if stale_ids:
+                rendered = self.render(
+                    db,
+                    db.query(JobSchema)
+                    .options(*JOB_OPTIONS)
+                    .filter(JobSchema.id.in_(stale_ids)),
+                )
+            release_connection(db)
+            for job_id, created_at, content, fresh in rows:
+                yield created_at, content if fresh else rendered[job_id]
+            if len(rows) < _RENDER_CHUNK_SIZE:
+                return
+            last_id = rows[-1][0]
+
+
+rendered_job_service = RenderedJobService()
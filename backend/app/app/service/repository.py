@@ -1,18 +1,62 @@
 from typing import List
 
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
 from app.data_models.models import Repository as RepositoryModel
+from app.db.schema import Book, BookJob, Commit
+from app.db.schema import Jobs as JobSchema
 from app.db.schema import Repository as RepositorySchema
 from app.service.base import ServiceBase
+from app.service.job_snapshot import job_snapshot_service
+
+# Rows per INSERT statement
+_UPSERT_CHUNK_SIZE = 1000
 
 
 class RepositoryService(ServiceBase):
     def upsert_repositories(
         self, db: Session, repositories: List[RepositorySchema]
     ):
-        for repo in repositories:
-            db.merge(repo)
+        # One row per id: a statement cannot update the same row twice
+        rows = list(
+            {
+                repo.id: {"id": repo.id, "name": repo.name, "owner": repo.owner}
+                for repo in repositories
+            }.values()
+        )
+        changed_ids: List[int] = []
+        for i in range(0, len(rows), _UPSERT_CHUNK_SIZE):
+            statement = insert(RepositorySchema).values(
+                rows[i : i + _UPSERT_CHUNK_SIZE]
+            )
+            excluded = statement.excluded
+            changed = db.scalars(
+                statement.on_conflict_do_update(
+                    index_elements=["id"],
+                    set_={"name": excluded.name, "owner": excluded.owner},
+                    # Leave unchanged rows alone
+                    where=(
+                        RepositorySchema.name.is_distinct_from(excluded.name)
+                        | RepositorySchema.owner.is_distinct_from(
+                            excluded.owner
+                        )
+                    ),
+                ).returning(RepositorySchema.id)
+            ).all()
+            changed_ids.extend(changed)
+        if changed_ids:
+            # Jobs embed the repository of their books
+            job_snapshot_service.invalidate_jobs(
+                db,
+                JobSchema.id.in_(
+                    select(BookJob.job_id)
+                    .join(Book, Book.id == BookJob.book_id)
+                    .join(Commit, Commit.id == Book.commit_id)
+                    .where(Commit.repository_id.in_(changed_ids))
+                ),
+            )
         db.commit()
 
 
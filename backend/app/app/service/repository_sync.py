@@ -0,0 +1,90 @@
+import asyncio
+import logging
+from contextlib import suppress
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core import config
+from app.data_models.models import UserSession
+from app.db.session import Session as SessionFactory
+from app.github import (
+    AuthenticatedClient,
+    authenticate_client,
+    get_http_client,
+    sync_user_repositories,
+)
+from app.service.user import user_service
+
+# Repositories pushed to while a sync runs may not be in its results yet
+_PUSHED_SINCE_OVERLAP = timedelta(minutes=1)
+
+
+class UserRepositorySync:
+    """Sync the repositories of users in the background.
+
+    Login only schedules a sync. A sync is skipped when the last one is
+    recent, and otherwise only fetches repositories pushed to since the last
+    one, unless every repository is due to be fetched again.
+    """
+
+    def __init__(self, interval: int, full_interval: int):
+        self.interval = timedelta(seconds=interval)
+        self.full_interval = timedelta(seconds=full_interval)
+        self._tasks: Dict[int, asyncio.Task] = {}
+
+    async def sync(
+        self,
+        client: AuthenticatedClient,
+        db: Session,
+        user: UserSession,
+        now: Optional[datetime] = None,
+    ):
+        if now is None:
+            now = datetime.now(timezone.utc)
+        synced_at, full_synced_at = await asyncio.to_thread(
+            user_service.get_repositories_synced_at, db, user
+        )
+        if synced_at is not None and now - synced_at < self.interval:
+            return
+        full = (
+            synced_at is None
+            or full_synced_at is None
+            or now - full_synced_at >= self.full_interval
+        )
+        pushed_since = None if full else synced_at - _PUSHED_SINCE_OVERLAP
+        await sync_user_repositories(client, db, user, pushed_since)
+        await asyncio.to_thread(
+            user_service.set_repositories_synced_at, db, user, now, full
+        )
+
+    async def _run(self, token: str, user: UserSession):
+        try:
+            client = authenticate_client(get_http_client(), token)
+            with SessionFactory() as db:
+                await self.sync(client.deferrable(), db, user)
+        except Exception as e:
+            logging.exception(e)
+
+    def schedule(self, token: str, user: UserSession):
+        """Start syncing unless a sync for the user is already running"""
+        if user.id in self._tasks:
+            return
+        task = asyncio.create_task(self._run(token, user))
+        self._tasks[user.id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(user.id, None))
+
+    async def stop(self):
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            with suppress(asyncio.CancelledError):
+                await task
+
+
+user_repository_sync = UserRepositorySync(
+    config.REPOSITORY_SYNC_INTERVAL_SECONDS,
+    config.REPOSITORY_FULL_SYNC_INTERVAL_SECONDS,
+)
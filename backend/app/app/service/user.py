@@ -1,43 +1,179 @@
-from typing import List
+from datetime import datetime
+from typing import List, Optional, Tuple
 
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
 from app.data_models.models import User as UserModel
 from app.data_models.models import UserSession
+from app.db.loading import REPOSITORY_SUMMARY_OPTIONS
+from app.db.schema import Jobs as JobSchema
 from app.db.schema import Repository as RepositorySchema
 from app.db.schema import User as UserSchema
-from app.db.schema import UserRepository
+from app.db.schema import UserRepository, UserTeams
 from app.github import GitHubRepo, RepositoryPermission
 from app.service.base import ServiceBase
+from app.service.job_snapshot import job_snapshot_service
+
+# Rows per INSERT statement
+_UPSERT_CHUNK_SIZE = 1000
 
 
 class UserService(ServiceBase):
     def get_user_repositories(
         self, db: Session, user: UserSession
     ) -> List[RepositorySchema]:
-        query = db.query(UserRepository).filter(
-            UserRepository.user_id == user.id
+        return (
+            db.query(RepositorySchema)
+            .join(RepositorySchema.users)
+            .filter(UserRepository.user_id == user.id)
+            .options(*REPOSITORY_SUMMARY_OPTIONS)
+            .all()
         )
-        return [ur.repository for ur in query.all()]
 
     def upsert_user_repositories(
-        self, db: Session, user: UserSession, repositories: List[GitHubRepo]
+        self,
+        db: Session,
+        user: UserSession,
+        repositories: List[GitHubRepo],
+        prune: bool = False,
+        prune_prefix: str = "",
+        prune_permissions: Optional[List[RepositoryPermission]] = None,
     ):
-        for repo in repositories:
-            permission_id = RepositoryPermission[repo.viewer_permission]
-            db.merge(
-                UserRepository(
-                    user_id=user.id,
-                    permission_id=permission_id,
-                    repository_id=repo.database_id,
+        """Store the user's permission on each repository
+
+        With prune, permissions on repositories that are not listed are
+        removed, so repositories must be every repository the user can use
+        whose name starts with prune_prefix and, given prune_permissions,
+        that the user has one of those permissions on. Other permissions,
+        like the ones recorded when creating jobs, are kept.
+        """
+        permissions = {
+            int(repo.database_id): RepositoryPermission[
+                repo.viewer_permission
+            ].value
+            for repo in repositories
+        }
+        rows = [
+            {
+                "user_id": user.id,
+                "repository_id": repository_id,
+                "permission_id": permission_id,
+            }
+            for repository_id, permission_id in permissions.items()
+        ]
+        for i in range(0, len(rows), _UPSERT_CHUNK_SIZE):
+            statement = insert(UserRepository).values(
+                rows[i : i + _UPSERT_CHUNK_SIZE]
+            )
+            db.execute(
+                statement.on_conflict_do_update(
+                    index_elements=["user_id", "repository_id"],
+                    set_={"permission_id": statement.excluded.permission_id},
+                    where=UserRepository.permission_id
+                    != statement.excluded.permission_id,
                 )
             )
+        if prune:
+            conditions = [
+                UserRepository.user_id == user.id,
+                UserRepository.repository_id.not_in(permissions),
+                UserRepository.repository_id.in_(
+                    select(RepositorySchema.id).where(
+                        RepositorySchema.name.startswith(
+                            prune_prefix, autoescape=True
+                        )
+                    )
+                ),
+            ]
+            if prune_permissions is not None:
+                conditions.append(
+                    UserRepository.permission_id.in_(
+                        [p.value for p in prune_permissions]
+                    )
+                )
+            db.execute(delete(UserRepository).where(*conditions))
+        db.commit()
+
+    def get_repositories_synced_at(
+        self, db: Session, user: UserSession
+    ) -> Tuple[Optional[datetime], Optional[datetime]]:
+        """When the user's repositories were last synced, and fully synced"""
+        row = db.execute(
+            select(
+                UserSchema.repositories_synced_at,
+                UserSchema.repositories_full_synced_at,
+            ).where(UserSchema.id == user.id)
+        ).first()
+        if row is None:
+            return None, None
+        return row[0], row[1]
+
+    def set_repositories_synced_at(
+        self, db: Session, user: UserSession, synced_at: datetime, full: bool
+    ):
+        values = {"repositories_synced_at": synced_at}
+        if full:
+            values["repositories_full_synced_at"] = synced_at
+        db.execute(
+            update(UserSchema).where(UserSchema.id == user.id).values(values)
+        )
+        db.commit()
+
+    def get_teams(
+        self, db: Session, user_id: int
+    ) -> Optional[Tuple[List[str], datetime]]:
+        """The user's stored teams and when they were read from GitHub"""
+        row = db.execute(
+            select(UserTeams.teams, UserTeams.synced_at).where(
+                UserTeams.user_id == user_id
+            )
+        ).first()
+        if row is None:
+            return None
+        return row[0], row[1]
+
+    def set_teams(
+        self, db: Session, user_id: int, teams: List[str], synced_at: datetime
+    ):
+        statement = insert(UserTeams).values(
+            user_id=user_id, teams=teams, synced_at=synced_at
+        )
+        db.execute(
+            statement.on_conflict_do_update(
+                index_elements=["user_id"],
+                set_={
+                    "teams": statement.excluded.teams,
+                    "synced_at": statement.excluded.synced_at,
+                },
+            )
+        )
         db.commit()
 
     def upsert_user(self, db: Session, user: UserSession):
-        db.merge(
-            UserSchema(id=user.id, name=user.name, avatar_url=user.avatar_url)
+        statement = insert(UserSchema).values(
+            id=user.id, name=user.name, avatar_url=user.avatar_url
         )
+        excluded = statement.excluded
+        changed_id = db.scalars(
+            statement.on_conflict_do_update(
+                index_elements=["id"],
+                set_={"name": excluded.name, "avatar_url": excluded.avatar_url},
+                # Leave unchanged users alone
+                where=(
+                    UserSchema.name.is_distinct_from(excluded.name)
+                    | UserSchema.avatar_url.is_distinct_from(
+                        excluded.avatar_url
+                    )
+                ),
+            ).returning(UserSchema.id)
+        ).first()
+        if changed_id is not None:
+            # Jobs embed their user
+            job_snapshot_service.invalidate_jobs(
+                db, JobSchema.user_id == user.id
+            )
         db.commit()
 
 
@@ -0,0 +1,86 @@
+import asyncio
+import logging
+from contextlib import suppress
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+from sqlalchemy.orm import Session
+
+from app.core import config
+from app.db.session import Session as SessionFactory
+from app.db.utils import release_connection
+from app.github import AuthenticatedClient, get_user_teams
+from app.service.user import user_service
+
+
+class UserTeamsCache:
+    """GitHub teams of users, stored between logins.
+
+    Fresh teams are used as they are. Stale teams are still used while they
+    are refreshed in the background, so a login only waits for GitHub when
+    the user is new or the teams are too old to trust.
+    """
+
+    def __init__(self, ttl: int, max_age: int):
+        self.ttl = timedelta(seconds=ttl)
+        self.max_age = timedelta(seconds=max_age)
+        self._refreshing: Dict[int, asyncio.Task] = {}
+
+    async def _fetch(
+        self, db: Session, client: AuthenticatedClient, user_id: int, name: str
+    ) -> List[str]:
+        # Hand the connection back while waiting on GitHub
+        await asyncio.to_thread(release_connection, db)
+        synced_at = datetime.now(timezone.utc)
+        teams = await get_user_teams(client, name)
+        await asyncio.to_thread(
+            user_service.set_teams, db, user_id, teams, synced_at
+        )
+        return teams
+
+    async def _refresh(
+        self, client: AuthenticatedClient, user_id: int, name: str
+    ):
+        try:
+            with SessionFactory() as db:
+                await self._fetch(db, client, user_id, name)
+        except Exception as e:
+            logging.exception(e)
+
+    def _schedule_refresh(
+        self, client: AuthenticatedClient, user_id: int, name: str
+    ):
+        if user_id in self._refreshing:
+            return
+        task = asyncio.create_task(
+            self._refresh(client.deferrable(), user_id, name)
+        )
+        self._refreshing[user_id] = task
+        task.add_done_callback(lambda _: self._refreshing.pop(user_id, None))
+
+    async def get_teams(
+        self, db: Session, client: AuthenticatedClient, user_id: int, name: str
+    ) -> List[str]:
+        cached = await asyncio.to_thread(user_service.get_teams, db, user_id)
+        if cached is not None:
+            teams, synced_at = cached
+            age = datetime.now(timezone.utc) - synced_at
+            if age < self.ttl:
+                return teams
+            if age < self.max_age:
+                self._schedule_refresh(client, user_id, name)
+                return teams
+        return await self._fetch(db, client, user_id, name)
+
+    async def stop(self):
+        tasks = list(self._refreshing.values())
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            with suppress(asyncio.CancelledError):
+                await task
+
+
+user_teams_cache = UserTeamsCache(
+    config.USER_TEAMS_CACHE_SECONDS, config.USER_TEAMS_MAX_AGE_SECONDS
+)
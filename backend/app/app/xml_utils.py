@@ -1,3 +1,4 @@
+from io import BytesIO
 from typing import List, Optional
 
 from lxml import etree
@@ -46,3 +47,19 @@ def parse_xml_doc(xml_doc: str):
         # If the xml document has an encoding declaration
         # `text` in GitHub graphql is "UTF8 text data[...]"
         return etree.fromstring(xml_doc.encode("utf-8"), parser=None)
+
+
+def find_first_text(xml_doc: str, local_name: str) -> Optional[str]:
+    """Text of the first element named local_name in any namespace
+
+    Parsing stops at that element, so the rest of the document is never
+    read and no tree is kept.
+    """
+    events = etree.iterparse(
+        BytesIO(xml_doc.encode("utf-8")),
+        events=("end",),
+        tag=f"{{*}}{local_name}",
+    )
+    for _, element in events:
+        return element.text
+    return None
@@ -0,0 +1,34 @@
+"""add commit_cache table
+
+Revision ID: 1b6e3d9f5c27
+Revises: 4d2f8b6e0a91
+Create Date: 2026-10-18 19:05:41.736402
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "1b6e3d9f5c27"
+down_revision = "4d2f8b6e0a91"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "commit_cache",
+        sa.Column("owner", sa.String(), nullable=False),
+        sa.Column("repo", sa.String(), nullable=False),
+        sa.Column("sha", sa.String(), nullable=False),
+        sa.Column("committed_at", sa.DateTime(), nullable=False),
+        sa.Column("books", sa.JSON(), nullable=False),
+        sa.Column("collection_uuids", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("owner", "repo", "sha"),
+    )
+
+
+def downgrade():
+    op.drop_table("commit_cache")
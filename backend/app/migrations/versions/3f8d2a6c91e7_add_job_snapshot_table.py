@@ -0,0 +1,31 @@
+"""add job_snapshot table
+
+Revision ID: 3f8d2a6c91e7
+Revises: b5e1c9a7d402
+Create Date: 2026-10-18 14:41:36.802114
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "3f8d2a6c91e7"
+down_revision = "b5e1c9a7d402"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "job_snapshot",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("content", sa.Text(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("day"),
+    )
+
+
+def downgrade():
+    op.drop_table("job_snapshot")
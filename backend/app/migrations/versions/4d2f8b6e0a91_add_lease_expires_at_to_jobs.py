@@ -0,0 +1,27 @@
+"""add column lease_expires_at to jobs
+
+Revision ID: 4d2f8b6e0a91
+Revises: 9a3c5e7f1b28
+Create Date: 2026-10-18 17:48:33.270164
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "4d2f8b6e0a91"
+down_revision = "9a3c5e7f1b28"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "jobs",
+        sa.Column("lease_expires_at", sa.DateTime(), nullable=True),
+    )
+
+
+def downgrade():
+    op.drop_column("jobs", "lease_expires_at")
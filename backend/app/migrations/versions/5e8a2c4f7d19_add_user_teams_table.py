@@ -0,0 +1,30 @@
+"""add user_teams table
+
+Revision ID: 5e8a2c4f7d19
+Revises: 7c1e4a9d2b63
+Create Date: 2026-10-18 20:11:05.902417
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "5e8a2c4f7d19"
+down_revision = "7c1e4a9d2b63"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "user_teams",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("teams", sa.JSON(), nullable=False),
+        sa.Column("synced_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+
+
+def downgrade():
+    op.drop_table("user_teams")
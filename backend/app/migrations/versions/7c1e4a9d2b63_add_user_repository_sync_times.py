@@ -0,0 +1,32 @@
+"""add repository sync times to user
+
+Revision ID: 7c1e4a9d2b63
+Revises: 1b6e3d9f5c27
+Create Date: 2026-10-18 19:42:17.513028
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "7c1e4a9d2b63"
+down_revision = "1b6e3d9f5c27"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "user",
+        sa.Column("repositories_synced_at", sa.DateTime(), nullable=True),
+    )
+    op.add_column(
+        "user",
+        sa.Column("repositories_full_synced_at", sa.DateTime(), nullable=True),
+    )
+
+
+def downgrade():
+    op.drop_column("user", "repositories_full_synced_at")
+    op.drop_column("user", "repositories_synced_at")
@@ -0,0 +1,48 @@
+"""add login_session table
+
+Revision ID: 8f3b6d1e4a70
+Revises: 5e8a2c4f7d19
+Create Date: 2026-10-18 20:46:52.118364
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "8f3b6d1e4a70"
+down_revision = "5e8a2c4f7d19"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "login_session",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["user.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_login_session_user_id"),
+        "login_session",
+        ["user_id"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_login_session_expires_at"),
+        "login_session",
+        ["expires_at"],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index(
+        op.f("ix_login_session_expires_at"), table_name="login_session"
+    )
+    op.drop_index(op.f("ix_login_session_user_id"), table_name="login_session")
+    op.drop_table("login_session")
@@ -0,0 +1,30 @@
+"""add partial index for queued and assigned jobs
+
+Revision ID: 9a3c5e7f1b28
+Revises: e4b7d19a2c6f
+Create Date: 2026-10-18 17:12:06.584217
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "9a3c5e7f1b28"
+down_revision = "e4b7d19a2c6f"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "ix_jobs_pending",
+        "jobs",
+        ["status_id", "job_type_id", "id"],
+        unique=False,
+        postgresql_where=sa.text("status_id IN (1, 2)"),
+    )
+
+
+def downgrade():
+    op.drop_index("ix_jobs_pending", table_name="jobs")
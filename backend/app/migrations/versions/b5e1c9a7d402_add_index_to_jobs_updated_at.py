@@ -0,0 +1,25 @@
+"""add index to jobs updated_at
+
+Revision ID: b5e1c9a7d402
+Revises: 6fc2c2cef8a9
+Create Date: 2026-10-18 14:02:11.417305
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "b5e1c9a7d402"
+down_revision = "6fc2c2cef8a9"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        op.f("ix_jobs_updated_at"), "jobs", ["updated_at"], unique=False
+    )
+
+
+def downgrade():
+    op.drop_index(op.f("ix_jobs_updated_at"), table_name="jobs")
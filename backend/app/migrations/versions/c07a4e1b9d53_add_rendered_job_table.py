@@ -0,0 +1,34 @@
+"""add rendered_job table
+
+Revision ID: c07a4e1b9d53
+Revises: 3f8d2a6c91e7
+Create Date: 2026-10-18 15:20:48.113270
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c07a4e1b9d53"
+down_revision = "3f8d2a6c91e7"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "rendered_job",
+        sa.Column("job_id", sa.Integer(), nullable=False),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("job_updated_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["job_id"],
+            ["jobs.id"],
+        ),
+        sa.PrimaryKeyConstraint("job_id"),
+    )
+
+
+def downgrade():
+    op.drop_table("rendered_job")
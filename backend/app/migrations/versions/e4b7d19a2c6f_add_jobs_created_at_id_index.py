@@ -0,0 +1,29 @@
+"""replace jobs created_at index with (created_at, id)
+
+Revision ID: e4b7d19a2c6f
+Revises: c07a4e1b9d53
+Create Date: 2026-10-18 16:41:52.903118
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "e4b7d19a2c6f"
+down_revision = "c07a4e1b9d53"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "ix_jobs_created_at_id", "jobs", ["created_at", "id"], unique=False
+    )
+    op.drop_index(op.f("ix_jobs_created_at"), table_name="jobs")
+
+
+def downgrade():
+    op.create_index(
+        op.f("ix_jobs_created_at"), "jobs", ["created_at"], unique=False
+    )
+    op.drop_index("ix_jobs_created_at_id", table_name="jobs")
@@ -0,0 +1,87 @@
+"""Per-request overhead of the middleware stack
+
+Compares the pure ASGI DBSessionMiddleware with the BaseHTTPMiddleware
+implementation it replaced, using in-process requests (no network, no
+database) so the difference is the cost of the middleware itself.
+
+Run from backend/app with a base64 SESSION_SECRET in the environment:
+
+    python -m tests.performance.middleware_benchmark [requests]
+"""
+
+import asyncio
+import logging
+import sys
+import time
+
+import httpx
+from fastapi import Response
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.main import server
+from app.middleware import DBSessionMiddleware
+from app.service.jobs import jobs_service
+
+PATHS = ("/api/ping/", "/api/jobs/check")
+
+
+class BaseHTTPDBSessionMiddleware(BaseHTTPMiddleware):
+    """DBSessionMiddleware as it was before it became pure ASGI"""
+
+    async def dispatch(self, request, call_next):
+        response = Response("Internal server error", status_code=500)
+        try:
+            response = await call_next(request)
+        except Exception as e:
+            logging.exception(e)
+        finally:
+            db = getattr(request.state, "db", None)
+            if db is not None:
+                db.close()
+        return response
+
+
+def use_db_middleware(cls):
+    server.user_middleware = [
+        Middleware(cls)
+        if m.cls in (DBSessionMiddleware, BaseHTTPDBSessionMiddleware)
+        else m
+        for m in server.user_middleware
+    ]
+    server.middleware_stack = server.build_middleware_stack()
+
+
+async def time_requests(path: str, count: int) -> float:
+    """Mean seconds per request"""
+    transport = httpx.ASGITransport(app=server)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://testserver"
+    ) as client:
+        for _ in range(min(count, 100)):
+            await client.get(path)
+        start = time.perf_counter()
+        for _ in range(count):
+            response = await client.get(path)
+            assert response.status_code == 200, response.text
+        return (time.perf_counter() - start) / count
+
+
+def main(count: int):
+    # Job polling without a database: only the request path is measured
+    jobs_service.get_job_mins = lambda *_, **__: []
+    print(f"{'path':<20}{'BaseHTTP':>12}{'ASGI':>12}{'saved':>12}")
+    for path in PATHS:
+        results = []
+        for cls in (BaseHTTPDBSessionMiddleware, DBSessionMiddleware):
+            use_db_middleware(cls)
+            results.append(asyncio.run(time_requests(path, count)))
+        before, after = (r * 1e6 for r in results)
+        print(
+            f"{path:<20}{before:>10.1f}us{after:>10.1f}us"
+            f"{before - after:>10.1f}us"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -1,6 +1,8 @@
+import httpx
 import pytest
 
 from app.data_models.models import RepositorySummary
+from app.github.rate_limit import RateLimitTracker
 
 
 @pytest.mark.unit
@@ -28,3 +30,40 @@ def test_repositories(
         == RepositorySummary.model_validate(fake_data.FAKE_REPO).model_dump()
     )
     assert first["books"] == [b.slug for b in fake_data.FAKE_COMMIT2.books]
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+def test_rate_limit(monkeypatch, testclient_with_session):
+    # GIVEN: A tracker that has seen one response
+    tracker = RateLimitTracker(reserve=10, max_wait=5, retries=0)
+    tracker.record(
+        "abc",
+        httpx.Response(
+            200,
+            headers={
+                "x-ratelimit-limit": "5000",
+                "x-ratelimit-remaining": "4999",
+                "x-ratelimit-reset": "1800000000",
+            },
+            request=httpx.Request("GET", "https://api.github.com/user"),
+        ),
+    )
+    monkeypatch.setattr("app.api.endpoints.github.rate_limit_tracker", tracker)
+
+    # WHEN: An admin requests the rate limit metrics
+    response = testclient_with_session.get("/api/github/rate-limit")
+
+    # THEN: The budget of each token is returned
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload["budgets"] == [
+        {
+            "token": "abc",
+            "resource": "core",
+            "limit": 5000,
+            "remaining": 4999,
+            "reset_at": "2027-01-15T08:00:00Z",
+        }
+    ]
+    assert (payload["retried"], payload["deferred"]) == (0, 0)
@@ -1,16 +1,36 @@
+import json
+from datetime import datetime, timezone
+
 import pytest
 
-from app.data_models.models import Job, JobMin
+from app.api.endpoints.jobs import _json_array
+from app.data_models.models import (
+    Job,
+    JobFeed,
+    JobLease,
+    JobMin,
+    JobPage,
+    JobUpdateResult,
+)
+from app.service.jobs import jobs_service
 
 
 @pytest.mark.unit
 @pytest.mark.nondestructive
 def test_get_jobs(
-    monkeypatch, testclient_with_session, mock_jobs_service, fake_data
+    monkeypatch,
+    testclient_with_session,
+    mock_jobs_service,
+    mock_job_snapshot_service,
+    fake_data,
 ):
     monkeypatch.setattr(
         "app.api.endpoints.jobs.jobs_service", mock_jobs_service
     )
+    monkeypatch.setattr(
+        "app.api.endpoints.jobs.job_snapshot_service",
+        mock_job_snapshot_service,
+    )
 
     response = testclient_with_session.get("/api/jobs")
     assert response.status_code == 200
@@ -20,6 +40,60 @@ def test_get_jobs(
     assert Job(**first) == Job.model_validate(fake_data.FAKE_JOB)
 
 
+@pytest.mark.unit
+@pytest.mark.nondestructive
+@pytest.mark.parametrize("fragment_count", [0, 1, 5])
+def test_json_array_chunks(monkeypatch, fragment_count):
+    monkeypatch.setattr("app.api.endpoints.jobs._STREAM_CHUNK_SIZE", 8)
+    fragments = [json.dumps({"id": i}) for i in range(fragment_count)]
+
+    chunks = list(_json_array(fragments))
+
+    assert json.loads(b"".join(chunks)) == [
+        {"id": i} for i in range(fragment_count)
+    ]
+    # Each chunk is flushed as soon as it reaches the chunk size
+    assert len(chunks) == fragment_count + 1
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+def test_job_feed(
+    monkeypatch, testclient_with_session, mock_jobs_service, fake_data
+):
+    monkeypatch.setattr(
+        "app.api.endpoints.jobs.jobs_service", mock_jobs_service
+    )
+    since = fake_data.FAKE_JOB.updated_at.timestamp() - 60
+
+    response = testclient_with_session.get(f"/api/jobs/feed?since={since}")
+    assert response.status_code == 200
+    feed = JobFeed(**response.json())
+    assert feed.cursor == fake_data.FAKE_JOB.updated_at.timestamp()
+    assert feed.jobs == [Job.model_validate(fake_data.FAKE_JOB)]
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+def test_job_feed_no_changes(
+    monkeypatch, testclient_with_session, mock_jobs_service, fake_data
+):
+    monkeypatch.setattr(
+        "app.api.endpoints.jobs.jobs_service", mock_jobs_service
+    )
+
+    def get_jobs_updated_since(db, since):
+        return []
+
+    mock_jobs_service.get_jobs_updated_since = get_jobs_updated_since
+    since = fake_data.FAKE_JOB.updated_at.timestamp()
+
+    # The cursor should not move when nothing changed
+    response = testclient_with_session.get(f"/api/jobs/feed?since={since}")
+    assert response.status_code == 200
+    assert response.json() == {"cursor": since, "jobs": []}
+
+
 @pytest.mark.unit
 @pytest.mark.nondestructive
 def test_check_jobs_no_query(
@@ -29,14 +103,12 @@ def test_check_jobs_no_query(
         "app.api.endpoints.jobs.jobs_service", mock_jobs_service
     )
 
-    def mock_get_items_order_by(self, *args, **kwargs):
-        assert "skip" in kwargs
-        assert kwargs["skip"] == 0
-        assert "limit" in kwargs
-        assert kwargs["limit"] == 20
+    def mock_get_job_mins(db, *, limit=20, **kwargs):
+        assert limit == 20
+        assert kwargs == {}
         return [fake_data.FAKE_JOB]
 
-    mock_jobs_service.get_items_order_by = mock_get_items_order_by
+    mock_jobs_service.get_job_mins = mock_get_job_mins
 
     response = testclient_with_session.get("/api/jobs/check")
     assert response.status_code == 200
@@ -46,6 +118,38 @@ def test_check_jobs_no_query(
     assert JobMin(**first) == JobMin.model_validate(fake_data.FAKE_JOB)
 
 
+@pytest.mark.unit
+@pytest.mark.nondestructive
+def test_check_jobs_etag(
+    monkeypatch, testclient_with_session, mock_jobs_service
+):
+    monkeypatch.setattr(
+        "app.api.endpoints.jobs.jobs_service", mock_jobs_service
+    )
+
+    # GIVEN: A first poll that returns an ETag
+    response = testclient_with_session.get("/api/jobs/check")
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+
+    # WHEN: The same jobs are polled with that ETag
+    response = testclient_with_session.get(
+        "/api/jobs/check", headers={"If-None-Match": etag}
+    )
+
+    # THEN: Nothing changed, so no body is sent
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.content == b""
+
+    # AND: A stale ETag gets the full response
+    response = testclient_with_session.get(
+        "/api/jobs/check", headers={"If-None-Match": 'W/"stale"'}
+    )
+    assert response.status_code == 200
+    assert len(response.json()) == 1
+
+
 @pytest.mark.unit
 @pytest.mark.nondestructive
 @pytest.mark.parametrize("status_id,return_count", [("1", 1), ("3", 0)])
@@ -57,8 +161,7 @@ def test_check_jobs_with_status_id(
     status_id,
     return_count,
 ):
-    def get_items_by(db, *, skip=0, limit=100, **kwargs):
-        assert skip == 0
+    def get_job_mins(db, *, limit=20, **kwargs):
         assert limit == 20
         assert "status_id" in kwargs
         assert kwargs["status_id"] == status_id
@@ -66,7 +169,7 @@ def test_check_jobs_with_status_id(
             j for j in [fake_data.FAKE_JOB] if j.status_id == int(status_id)
         ]
 
-    mock_jobs_service.get_items_by = get_items_by
+    mock_jobs_service.get_job_mins = get_job_mins
 
     monkeypatch.setattr(
         "app.api.endpoints.jobs.jobs_service", mock_jobs_service
@@ -94,8 +197,7 @@ def test_check_jobs_with_job_type(
     job_type_id,
     return_count,
 ):
-    def get_items_by(db, *, skip=0, limit=100, **kwargs):
-        assert skip == 0
+    def get_job_mins(db, *, limit=20, **kwargs):
         assert limit == 20
         assert "job_type_id" in kwargs
         assert kwargs["job_type_id"] == job_type_id
@@ -103,7 +205,7 @@ def test_check_jobs_with_job_type(
             j for j in [fake_data.FAKE_JOB] if j.job_type_id == int(job_type_id)
         ]
 
-    mock_jobs_service.get_items_by = get_items_by
+    mock_jobs_service.get_job_mins = get_job_mins
 
     monkeypatch.setattr(
         "app.api.endpoints.jobs.jobs_service", mock_jobs_service
@@ -120,6 +222,125 @@ def test_check_jobs_with_job_type(
         assert JobMin(**first) == JobMin.model_validate(fake_data.FAKE_JOB)
 
 
+@pytest.mark.unit
+@pytest.mark.nondestructive
+def test_claim_jobs(
+    monkeypatch, testclient_with_session, mock_jobs_service, fake_data
+):
+    monkeypatch.setattr(
+        "app.api.endpoints.jobs.jobs_service", mock_jobs_service
+    )
+
+    response = testclient_with_session.post(
+        "/api/jobs/claim", json={"job_type_id": "3", "count": 2}
+    )
+    assert response.status_code == 200
+    lease = JobLease(**response.json())
+    assert lease.jobs == [Job.model_validate(fake_data.FAKE_JOB)]
+    assert lease.lease_expires_at > datetime.now(timezone.utc)
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+@pytest.mark.parametrize("count", [0, 21])
+def test_claim_jobs_count_bounds(testclient_with_session, count):
+    response = testclient_with_session.post(
+        "/api/jobs/claim", json={"job_type_id": "3", "count": count}
+    )
+    assert response.status_code == 422
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+def test_claim_jobs_invalid_job_type(testclient_with_session):
+    response = testclient_with_session.post(
+        "/api/jobs/claim", json={"job_type_id": "abc"}
+    )
+    assert response.status_code == 422
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+@pytest.mark.parametrize(
+    "leased,exists,status_code",
+    [(True, True, 200), (False, True, 409), (False, False, 404)],
+)
+def test_heartbeat(
+    monkeypatch,
+    testclient_with_session,
+    mock_jobs_service,
+    fake_data,
+    leased,
+    exists,
+    status_code,
+):
+    lease_expires_at = datetime.now(timezone.utc)
+    mock_jobs_service.renew_lease = lambda *_: (
+        lease_expires_at if leased else None
+    )
+    mock_jobs_service.get = lambda *_: fake_data.FAKE_JOB if exists else None
+    monkeypatch.setattr(
+        "app.api.endpoints.jobs.jobs_service", mock_jobs_service
+    )
+
+    response = testclient_with_session.post("/api/jobs/1/heartbeat")
+    assert response.status_code == status_code
+    if leased:
+        lease = JobLease(**response.json())
+        assert lease.lease_expires_at == lease_expires_at
+        assert lease.jobs == []
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+def test_complete_claimed_job(monkeypatch, testclient_with_session, database):
+    # GIVEN: A job a worker claimed
+    database.seed(job_count=1)
+    monkeypatch.setattr("app.db.utils.SessionFactory", database.Session)
+    response = testclient_with_session.post(
+        "/api/jobs/claim", json={"job_type_id": "3"}
+    )
+    assert response.status_code == 200
+    assert [job.id for job in JobLease(**response.json()).jobs] == ["1"]
+
+    # WHEN: The worker completes it
+    response = testclient_with_session.put(
+        "/api/jobs/1", json={"status_id": "5"}
+    )
+
+    # THEN: The job is completed and the lease released
+    assert response.status_code == 200
+    assert Job(**response.json()).status_id == "5"
+    with database.Session() as db:
+        assert jobs_service.get(db, 1).lease_expires_at is None
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+def test_update_unclaimed_job_is_not_leased(
+    monkeypatch, testclient_with_session, database
+):
+    # GIVEN: A job a pipeline picked up without claiming it
+    database.seed(job_count=1)
+    monkeypatch.setattr("app.db.utils.SessionFactory", database.Session)
+
+    # WHEN: The pipeline starts processing it
+    response = testclient_with_session.put(
+        "/api/jobs/1", json={"status_id": "3"}
+    )
+
+    # THEN: No lease is taken, so the reaper never releases it
+    assert response.status_code == 200
+    with database.Session() as db:
+        assert jobs_service.get(db, 1).lease_expires_at is None
+
+    # AND: A heartbeat does not start one either
+    response = testclient_with_session.post("/api/jobs/1/heartbeat")
+    assert response.status_code == 409
+    with database.Session() as db:
+        assert jobs_service.get(db, 1).lease_expires_at is None
+
+
 @pytest.mark.unit
 @pytest.mark.nondestructive
 def test_list_job_page(
@@ -137,6 +358,30 @@ def test_list_job_page(
     assert Job(**first) == Job.model_validate(fake_data.FAKE_JOB)
 
 
+@pytest.mark.unit
+@pytest.mark.nondestructive
+def test_list_jobs_before(
+    monkeypatch, testclient_with_session, mock_jobs_service, fake_data
+):
+    monkeypatch.setattr(
+        "app.api.endpoints.jobs.jobs_service", mock_jobs_service
+    )
+
+    response = testclient_with_session.get("/api/jobs/pages?before=abc")
+    assert response.status_code == 200
+    page = JobPage(**response.json())
+    assert page.jobs == [Job.model_validate(fake_data.FAKE_JOB)]
+    assert page.next_cursor == "next"
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+@pytest.mark.parametrize("limit", [0, -1, 201])
+def test_list_jobs_before_limit_bounds(testclient_with_session, limit):
+    response = testclient_with_session.get(f"/api/jobs/pages?limit={limit}")
+    assert response.status_code == 422
+
+
 @pytest.mark.unit
 @pytest.mark.nondestructive
 def test_get_job(
@@ -256,6 +501,39 @@ def test_update_job_404(
     assert response.status_code == 404
 
 
+@pytest.mark.unit
+@pytest.mark.nondestructive
+def test_update_jobs(
+    monkeypatch, testclient_with_session, mock_jobs_service, fake_data
+):
+    # GIVEN: Only job 1 exists
+    def bulk_update(db, jobs_in):
+        assert [j.id for j in jobs_in] == [1, 2]
+        return [fake_data.FAKE_JOB]
+
+    mock_jobs_service.bulk_update = bulk_update
+    monkeypatch.setattr(
+        "app.api.endpoints.jobs.jobs_service", mock_jobs_service
+    )
+
+    # WHEN: Both jobs are updated in one request
+    response = testclient_with_session.patch(
+        "/api/jobs/",
+        json=[{"id": 1, "status_id": 5}, {"id": "2", "status_id": "5"}],
+    )
+
+    # THEN: Each update gets its own result
+    assert response.status_code == 200
+    assert [JobUpdateResult(**r) for r in response.json()] == [
+        JobUpdateResult(
+            id="1",
+            status_code=200,
+            status_id=str(fake_data.FAKE_JOB.status_id),
+        ),
+        JobUpdateResult(id="2", status_code=404, detail="Job not found"),
+    ]
+
+
 @pytest.mark.unit
 @pytest.mark.nondestructive
 def test_get_job_error(
@@ -8,7 +8,7 @@ from app.core.errors import CustomBaseError
 from app.github.api import AccessDeniedError
 
 
-def check_cookie_value(cookie):
+def check_cookie_value(cookie, session_store):
     from app.core.auth import Crypto
 
     assert cookie is not None
@@ -27,11 +27,14 @@ def check_cookie_value(cookie):
     assert "user" in session_cookie
     user_cookie = session_cookie["user"]
     assert "exp" in user_cookie
-    # The nested json should be encrypted. Trying to decode it should not work.
+    # The cookie only holds an opaque id; the session is stored server-side
+    assert set(user_cookie) == {"exp", "sid"}
+    _, content = session_store.rows[user_cookie["sid"]]
+    # The stored session should be encrypted
     with pytest.raises(json.JSONDecodeError):
-        json.loads(user_cookie["session"])
+        json.loads(content)
     # if we decrypt it first, however, it should work
-    user_session = json.loads(Crypto.decrypt(user_cookie["session"]))
+    user_session = json.loads(Crypto.decrypt(content))
     assert "id" in user_session
     assert "token" in user_session
     assert "role" in user_session
@@ -41,7 +44,7 @@ def check_cookie_value(cookie):
 
 @pytest.mark.unit
 @pytest.mark.nondestructive
-def test_login_success(testclient, mock_login_success):
+def test_login_success(testclient, mock_login_success, session_store):
     response = testclient.get("/api/auth/login", follow_redirects=False)
     assert response.status_code == 307
     redirect_location = response.headers.get("location")
@@ -49,12 +52,12 @@ def test_login_success(testclient, mock_login_success):
     response = testclient.get(redirect_location, follow_redirects=False)
     assert response.status_code == 307
     cookie = response.headers.get("set-cookie")
-    check_cookie_value(cookie)
+    check_cookie_value(cookie, session_store)
 
 
 @pytest.mark.unit
 @pytest.mark.nondestructive
-def test_login_success_token(testclient, mock_login_success):
+def test_login_success_token(testclient, mock_login_success, session_store):
     response = testclient.get(
         "/api/auth/token-login",
         follow_redirects=False,
@@ -62,7 +65,7 @@ def test_login_success_token(testclient, mock_login_success):
     )
     assert response.status_code == 200
     cookie = response.headers.get("set-cookie")
-    check_cookie_value(cookie)
+    check_cookie_value(cookie, session_store)
 
 
 @pytest.mark.unit
@@ -112,7 +115,9 @@ def test_login_no_team(monkeypatch, testclient, mock_login_success):
     async def return_no_teams(*_args, **_kwargs):
         return []
 
-    monkeypatch.setattr("app.github.api.get_user_teams", return_no_teams)
+    monkeypatch.setattr(
+        "app.service.user_teams.get_user_teams", return_no_teams
+    )
 
     response = testclient.get("/api/auth/callback", follow_redirects=False)
     # Temporarily allow people who are not on an openstax team
@@ -127,3 +132,34 @@ def test_login_no_team(monkeypatch, testclient, mock_login_success):
 def test_require_auth(testclient, endpoint):
     response = testclient.get(endpoint, follow_redirects=False)
     assert response.status_code == 401
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+def test_api_token(monkeypatch, testclient_with_session, mock_user_service):
+    monkeypatch.setattr(
+        "app.api.endpoints.github.user_service", mock_user_service
+    )
+    # GIVEN: A user logged in with a session cookie
+    # WHEN: They request an API token
+    response = testclient_with_session.post("/api/auth/api-token")
+    assert response.status_code == 200
+    token = response.json()["token"]
+
+    # THEN: The token authenticates requests without a cookie
+    testclient_with_session.headers = {"authorization": f"Bearer {token}"}
+    response = testclient_with_session.get("/api/github/repository-summary")
+    assert response.status_code == 200
+    # AND: It cannot be used to issue more tokens
+    response = testclient_with_session.post("/api/auth/api-token")
+    assert response.status_code == 403
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+def test_invalid_api_token(testclient):
+    response = testclient.get(
+        "/api/github/repository-summary",
+        headers={"authorization": "Bearer corgi_abc.def"},
+    )
+    assert response.status_code == 401
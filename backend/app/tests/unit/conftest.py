@@ -16,6 +16,8 @@ def pytest_configure(config):
     os.environ.setdefault(
         "SESSION_SECRET", "AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA="
     )
+    # Deliver job events in-process instead of through Postgres
+    os.environ.setdefault("JOB_EVENTS_CHANNEL", "")
     init_test_data = config.getoption("--init-test-data")
     if init_test_data:
         os.environ.setdefault("VCR_RECORD", "1")
@@ -34,8 +36,6 @@ def pytest_configure(config):
 def mock_github_api():
     """Uses vcr to fake responses from GitHub API"""
     from tests.unit.init_test_data import (
-        mock_get_book_repository,
-        mock_get_collections,
         mock_get_user,
         mock_get_user_repositories,
         mock_get_user_teams,
@@ -45,9 +45,7 @@ def mock_github_api():
     class MockGitHubAPI:
         get_user = mock_get_user
         get_user_teams = mock_get_user_teams
-        get_collections = mock_get_collections
         get_user_repositories = mock_get_user_repositories
-        get_book_repository = mock_get_book_repository
 
     return MockGitHubAPI
 
@@ -142,6 +140,12 @@ def mock_user_service(fake_data):
         def upsert_user(self, db, user):
             pass
 
+        def get_teams(self, db, user_id):
+            return None
+
+        def set_teams(self, db, user_id, teams, synced_at):
+            pass
+
         def get_user_repositories(self, db, user):
             return [fake_data.FAKE_REPO]
 
@@ -174,18 +178,49 @@ def mock_jobs_service(fake_data):
         def get_jobs_in_date_range(self, db, start, end, order_by=None):
             return [fake_data.FAKE_JOB]
 
+        def iter_rendered_jobs_in_date_range(self, db, start, end):
+            from app.data_models.models import Job
+
+            yield Job.model_validate(fake_data.FAKE_JOB).model_dump_json()
+
+        def get_jobs_updated_since(self, db, since):
+            return [fake_data.FAKE_JOB]
+
         def get_items_order_by(self, *_args, **_kwargs):
             return [fake_data.FAKE_JOB]
 
+        def get_items_before(self, db, *, before=None, limit=100):
+            return [fake_data.FAKE_JOB], "next"
+
         def get_items_by(self, *_args, **_kwargs):
             return [fake_data.FAKE_JOB]
 
+        def get_job_mins(self, *_args, **_kwargs):
+            return [fake_data.FAKE_JOB]
+
+        def claim(self, db, job_type_id, count, lease, worker_version=None):
+            from app.db.schema import utcnow
+
+            return [fake_data.FAKE_JOB], utcnow() + lease
+
         def get(self, *_args, **_kwargs):
             return fake_data.FAKE_JOB
 
     return MockJobsService()
 
 
+@pytest.fixture
+def mock_job_snapshot_service():
+    class MockJobSnapshotService:
+        def iter_jobs_json(self, db, start, end, rebuild=False):
+            return iter(())
+
+        def invalidate(self, db, job):
+            pass
+
+    return MockJobSnapshotService()
+
+
 @pytest.fixture
 def mock_oauth_redirect(monkeypatch, fake_data):
     class MockOAuth:
@@ -202,19 +237,25 @@ def mock_oauth_redirect(monkeypatch, fake_data):
 def mock_login_success(
     monkeypatch, mock_user_service, mock_oauth_redirect, mock_github_api
 ):
-    async def nop(*_args, **_kwargs):
-        pass
-
     monkeypatch.setattr(
         "app.api.endpoints.auth.get_user", mock_github_api.get_user
     )
     monkeypatch.setattr(
         "app.github.api.get_user_teams", mock_github_api.get_user_teams
     )
+    monkeypatch.setattr(
+        "app.service.user_teams.get_user_teams", mock_github_api.get_user_teams
+    )
+    monkeypatch.setattr(
+        "app.service.user_teams.user_service", mock_user_service
+    )
     monkeypatch.setattr(
         "app.api.endpoints.auth.user_service", mock_user_service
     )
-    monkeypatch.setattr("app.api.endpoints.auth.sync_user_repositories", nop)
+    monkeypatch.setattr(
+        "app.api.endpoints.auth.user_repository_sync.schedule",
+        lambda *_: None,
+    )
 
 
 @pytest.fixture
@@ -223,13 +264,20 @@ def mock_session():
         class MockSession:
             def __init__(self):
                 self.calls = []
+                self.bulk_params = []
                 self.added_items = []
                 self.did_rollback = False
                 self.did_commit = False
                 self.flush_count = 0
 
-            def execute(self, query):
+            def execute(self, query, params=None):
                 self.calls.append(query)
+                if params is not None:
+                    self.bulk_params.append(params)
+                return MockResult()
+
+            def connection(self):
+                return self
 
             def scalars(self, query):
                 self.calls.append(query)
@@ -254,6 +302,9 @@ def mock_session():
             def commit(self):
                 self.did_commit = True
 
+            def in_transaction(self):
+                return len(self.calls) > 0
+
             @property
             def calls_str(self):
                 return "\n\n".join(str(c) for c in self.calls)
@@ -287,6 +338,120 @@ def mock_session():
     return inner
 
 
+@pytest.fixture
+def database():
+    """An in-memory database that counts the statements sent to it"""
+    from datetime import datetime, timedelta, timezone
+
+    from sqlalchemy import create_engine, event
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+
+    from app.db.base_class import Base
+    from app.db.schema import (
+        Book,
+        BookJob,
+        Commit,
+        Jobs,
+        JobTypes,
+        Repository,
+        RepositoryPermission,
+        Status,
+        User,
+        UserRepository,
+    )
+
+    class Database:
+        COMMIT_COUNT = 20
+        BOOKS_PER_COMMIT = 3
+
+        def __init__(self):
+            self.engine = create_engine(
+                "sqlite://",
+                connect_args={"check_same_thread": False},
+                poolclass=StaticPool,
+            )
+            Base.metadata.create_all(self.engine)
+            self.Session = sessionmaker(bind=self.engine)
+            self.statements = []
+            event.listen(self.engine, "before_cursor_execute", self._record)
+
+        def _record(self, conn, cursor, statement, *_):
+            self.statements.append(statement)
+
+        def count(self, f, *args, **kwargs):
+            """Statements sent while calling f"""
+            self.statements.clear()
+            result = f(*args, **kwargs)
+            return len(self.statements), result
+
+        def seed(self, job_count: int):
+            """A repository with a long history and jobs on its last build"""
+            now = datetime.now(timezone.utc)
+            with self.Session() as db:
+                for id, name in enumerate(
+                    ("queued", "assigned", "processing", "failed", "completed"),
+                    start=1,
+                ):
+                    db.add(Status(id=id, name=name))
+                db.add(JobTypes(id=3, name="git-pdf", display_name="PDF (git)"))
+                db.add(User(id=1, name="user", avatar_url=""))
+                db.add(RepositoryPermission(id=1, name="WRITE"))
+                db.add(Repository(id=1, name="osbooks-test", owner="openstax"))
+                db.add(
+                    UserRepository(user_id=1, repository_id=1, permission_id=1)
+                )
+                for i in range(self.COMMIT_COUNT):
+                    commit = Commit(
+                        id=i + 1,
+                        repository_id=1,
+                        sha=f"{i:040x}",
+                        timestamp=now - timedelta(days=self.COMMIT_COUNT - i),
+                    )
+                    db.add(commit)
+                    for j in range(self.BOOKS_PER_COMMIT):
+                        db.add(
+                            Book(
+                                uuid=f"00000000-0000-0000-0000-{j:012x}",
+                                commit=commit,
+                                edition=0,
+                                slug=f"book-{j}",
+                                style="default",
+                            )
+                        )
+                # A newer commit without books is skipped by the summary
+                db.add(
+                    Commit(
+                        id=self.COMMIT_COUNT + 1,
+                        repository_id=1,
+                        sha="f" * 40,
+                        timestamp=now,
+                    )
+                )
+                db.flush()
+                books = (
+                    db.query(Book)
+                    .filter(Book.commit_id == self.COMMIT_COUNT)
+                    .all()
+                )
+                for i in range(job_count):
+                    job = Jobs(
+                        id=i + 1,
+                        user_id=1,
+                        status_id=1,
+                        job_type_id=3,
+                        git_ref="main",
+                    )
+                    db.add(job)
+                    for book in books:
+                        db.add(BookJob(job=job, book=book))
+                db.commit()
+
+    database = Database()
+    yield database
+    database.engine.dispose()
+
+
 class MockAsyncClient(httpx.AsyncClient):
     responses: list[httpx.Response]
 
@@ -335,7 +500,32 @@ def session_cookie(testclient, mock_login_success):
 
 
 @pytest.fixture
-def testclient():
+def session_store(monkeypatch):
+    from app.core.auth import SessionStore
+
+    class MemorySessionStore(SessionStore):
+        """Stores sessions in a dict instead of the login_session table"""
+
+        def __init__(self):
+            super().__init__()
+            self.rows = {}
+
+        def _insert(self, db, sid, user_id, content, expires_at):
+            self.rows[sid] = (expires_at, content)
+
+        def _select(self, db, sid):
+            return self.rows.get(sid)
+
+        def _delete(self, db, sid):
+            self.rows.pop(sid, None)
+
+    store = MemorySessionStore()
+    monkeypatch.setattr("app.core.auth.session_store", store)
+    return store
+
+
+@pytest.fixture
+def testclient(session_store):
     from app.main import server
 
     client = TestClient(server)
@@ -12,8 +12,6 @@ from vcr.record_mode import RecordMode
 import app.core.config as config
 from app.github import (
     AuthenticatedClient,
-    get_book_repository,
-    get_collections,
     get_file_content,
     get_user,
     get_user_repositories,
@@ -86,8 +84,8 @@ my_vcr.register_serializer("user_sanitizer", UserSanitizer(my_vcr))
 
 
 @my_vcr.use_cassette("get_user.yaml", serializer="user_sanitizer", **vcr_args)
-async def mock_get_user(client, access_token):
-    return await get_user(client, access_token)
+async def mock_get_user(client, access_token, get_teams=None):
+    return await get_user(client, access_token, get_teams)
 
 
 @my_vcr.use_cassette(
@@ -109,20 +107,6 @@ async def mock_get_user_repositories(client, query):
     return await get_user_repositories(client, query)
 
 
-@my_vcr.use_cassette(
-    "get_book_repository.yaml", serializer="base_sanitizer", **vcr_args
-)
-async def mock_get_book_repository(client, repo_name, repo_owner, version):
-    return await get_book_repository(client, repo_name, repo_owner, version)
-
-
-@my_vcr.use_cassette(
-    "get_collections.yaml", serializer="base_sanitizer", **vcr_args
-)
-async def mock_get_collections(client, repo_name, repo_owner, commit_sha):
-    return await get_collections(client, repo_name, repo_owner, commit_sha)
-
-
 @my_vcr.use_cassette(
     "get_file_content.yaml", serializer="base_sanitizer", **vcr_args
 )
@@ -139,8 +123,6 @@ async def async_main(access_token: str):
         await mock_get_user_repositories(
             client, "org:openstax osbooks in:name is:public"
         )
-        await mock_get_book_repository(client, "tiny-book", "openstax", "main")
-        await mock_get_collections(client, "tiny-book", "openstax", "main")
         await mock_get_file_content(
             client, *config.REX_WEB_ARCHIVE_CONFIG.split(":", 2)
         )
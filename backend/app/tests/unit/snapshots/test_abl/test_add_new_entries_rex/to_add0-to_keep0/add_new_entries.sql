@@ -6,7 +6,7 @@ SELECT consumer.id
 FROM consumer 
 WHERE consumer.name = :name_1
 
-SELECT approved_book.book_id, approved_book.consumer_id, approved_book.code_version_id, approved_book.created_at, approved_book.updated_at 
+SELECT commit.id, commit.repository_id, commit.sha, commit.timestamp, book.id AS id_1, book.uuid, book.commit_id, book.edition, book.slug, book.style, approved_book.book_id, approved_book.consumer_id, approved_book.code_version_id, approved_book.created_at, approved_book.updated_at 
 FROM approved_book JOIN book ON book.id = approved_book.book_id JOIN commit ON commit.id = book.commit_id 
 WHERE lower(book.uuid) IN (__[POSTCOMPILE_lower_1]) AND approved_book.consumer_id = :consumer_id_1
 
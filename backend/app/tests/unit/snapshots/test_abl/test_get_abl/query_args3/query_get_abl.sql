@@ -1,3 +1,3 @@
-SELECT approved_book.book_id, approved_book.consumer_id, approved_book.code_version_id, approved_book.created_at, approved_book.updated_at 
-FROM approved_book JOIN book ON book.id = approved_book.book_id JOIN commit ON commit.id = book.commit_id 
+SELECT approved_book.book_id, approved_book.consumer_id, approved_book.code_version_id, approved_book.created_at, approved_book.updated_at, repository_1.id, repository_1.name, repository_1.owner, commit_1.id AS id_1, commit_1.repository_id, commit_1.sha, commit_1.timestamp, book_1.id AS id_2, book_1.uuid, book_1.commit_id, book_1.edition, book_1.slug, book_1.style, consumer_1.id AS id_3, consumer_1.name AS name_1, consumer_1.created_at AS created_at_1, consumer_1.updated_at AS updated_at_1, code_version_1.id AS id_4, code_version_1.version, code_version_1.created_at AS created_at_2, code_version_1.updated_at AS updated_at_2 
+FROM approved_book JOIN book ON book.id = approved_book.book_id JOIN commit ON commit.id = book.commit_id LEFT OUTER JOIN book AS book_1 ON book_1.id = approved_book.book_id LEFT OUTER JOIN commit AS commit_1 ON commit_1.id = book_1.commit_id LEFT OUTER JOIN repository AS repository_1 ON repository_1.id = commit_1.repository_id LEFT OUTER JOIN consumer AS consumer_1 ON consumer_1.id = approved_book.consumer_id LEFT OUTER JOIN code_version AS code_version_1 ON code_version_1.id = approved_book.code_version_id 
 WHERE commit.sha = :sha_1
\ No newline at end of file
@@ -1,6 +1,8 @@
+from datetime import datetime, timedelta, timezone
+
 import pytest
 
-from app.core.auth import RequiresRole
+from app.core.auth import RequiresRole, api_token_user, create_api_token
 from app.data_models.models import Role, UserSession
 
 
@@ -44,3 +46,104 @@ def test_requires_role_succeeds_for_correct_role(
     except Exception as e:
         exc = e
     assert exc is None, message
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+def test_api_token():
+    # GIVEN: An API token for a user
+    user = UserSession(
+        id=7, token="gh-token", role=Role.ADMIN, avatar_url="/", name="bot"
+    )
+    expires_at = datetime.now(timezone.utc) + timedelta(hours=1)
+    token = create_api_token(user, expires_at)
+
+    # WHEN: It is verified
+    principal = api_token_user(token)
+
+    # THEN: The user's id and role are recovered
+    assert principal is not None
+    assert (principal.id, principal.role, principal.name) == (
+        7,
+        Role.ADMIN,
+        "bot",
+    )
+    # AND: The GitHub token is not part of it
+    assert principal.token == ""
+    assert "gh-token" not in token
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+def test_api_token_rejected():
+    user = UserSession(
+        id=7, token="", role=Role.USER, avatar_url="/", name="bot"
+    )
+    now = datetime.now(timezone.utc)
+    expired = create_api_token(user, now - timedelta(seconds=1))
+    valid = create_api_token(user, now + timedelta(hours=1))
+    payload, signature = valid.split(".")
+    # Claim a different role with the original signature
+    forged = (
+        create_api_token(
+            user.model_copy(update={"role": Role.ADMIN}),
+            now + timedelta(hours=1),
+        ).split(".")[0]
+        + "."
+        + signature
+    )
+
+    assert api_token_user(expired) is None
+    assert api_token_user(forged) is None
+    assert api_token_user(payload + ".") is None
+    assert api_token_user(payload + ".é") is None
+    assert api_token_user("é" + valid) is None
+    assert api_token_user(valid) is not None
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+def test_session_store_remembers_decoded_sessions(mock_session):
+    from app.core.auth import Crypto, SessionStore
+
+    # GIVEN: A session another process stored
+    user = UserSession(
+        id=7, token="gh-token", role=Role.USER, avatar_url="/", name="u"
+    )
+    expires_at = datetime.now(timezone.utc) + timedelta(hours=1)
+    row = (expires_at, Crypto.encrypt(user.model_dump_json()))
+    db = mock_session(lambda *_: [row])
+    store = SessionStore(maxsize=1)
+
+    # WHEN: It is read twice
+    first = store.get(db, "sid")
+    second = store.get(db, "sid")
+
+    # THEN: Only the first read touches the database
+    assert first == second == user
+    assert len(db.calls) == 1
+    # AND: Unknown sessions are rejected
+    assert store.get(mock_session(), "other") is None
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+def test_session_store_rechecks_remembered_sessions(mock_session):
+    from app.core.auth import Crypto, SessionStore
+
+    # GIVEN: A session this process remembers
+    user = UserSession(
+        id=7, token="gh-token", role=Role.USER, avatar_url="/", name="u"
+    )
+    expires_at = datetime.now(timezone.utc) + timedelta(hours=1)
+    rows = [(expires_at, Crypto.encrypt(user.model_dump_json()))]
+    db = mock_session(lambda *_: rows)
+    store = SessionStore(recheck_seconds=0)
+    assert store.get(db, "sid") == user
+
+    # WHEN: Another process deletes it
+    rows.clear()
+
+    # THEN: It stops working here once it is checked again
+    assert store.get(db, "sid") is None
+    assert "sid" not in store._memory
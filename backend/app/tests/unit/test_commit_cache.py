@@ -0,0 +1,110 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from app.service.commit_cache import CommitCacheService
+
+COMMITTED_AT = datetime(2026, 1, 1, tzinfo=timezone.utc)
+BOOKS = [{"slug": "book-slug1", "style": "dummy"}]
+UUID = "00000000-0000-0000-0000-000000000000"
+
+
+@pytest.fixture
+def github_calls(monkeypatch):
+    calls = []
+
+    async def get_book_commit(client, repo_name, repo_owner, sha):
+        calls.append(("get_book_commit", repo_owner, repo_name, sha))
+        return COMMITTED_AT, BOOKS
+
+    async def get_collection_uuids(client, repo_name, repo_owner, sha, names):
+        calls.append(("get_collection_uuids", repo_owner, repo_name, sha))
+        return {name: UUID for name in names}
+
+    monkeypatch.setattr(
+        "app.service.commit_cache.get_book_commit", get_book_commit
+    )
+    monkeypatch.setattr(
+        "app.service.commit_cache.get_collection_uuids", get_collection_uuids
+    )
+    return calls
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+@pytest.mark.asyncio
+async def test_commit_is_read_from_github_once(mock_session, github_calls):
+    # GIVEN: A commit that was never seen before
+    db = mock_session(lambda *_: [])
+    cache = CommitCacheService()
+
+    # WHEN: It is read twice
+    first = await cache.get_book_commit(db, None, "owner", "repo", "sha")
+    second = await cache.get_book_commit(db, None, "owner", "repo", "sha")
+
+    # THEN: GitHub is asked once and the result is stored for other workers
+    assert first == second
+    assert first.books == BOOKS
+    assert github_calls == [("get_book_commit", "owner", "repo", "sha")]
+    assert "ON CONFLICT DO NOTHING" in db.calls_str
+    # AND: The read transaction ended before GitHub was asked
+    assert db.did_commit
+    # AND: The second read did not touch the database either
+    assert len(db.calls) == 2
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+@pytest.mark.asyncio
+async def test_commit_is_read_from_database(mock_session, github_calls):
+    # GIVEN: A commit another worker already stored
+    row = SimpleNamespace(
+        committed_at=COMMITTED_AT, books=BOOKS, collection_uuids=None
+    )
+    db = mock_session(lambda *_: [row])
+    cache = CommitCacheService()
+
+    # WHEN: It is read
+    commit = await cache.get_book_commit(db, None, "owner", "repo", "sha")
+
+    # THEN: GitHub is not asked
+    assert commit.committed_at == COMMITTED_AT
+    assert github_calls == []
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+@pytest.mark.asyncio
+async def test_collection_uuids(mock_session, github_calls):
+    db = mock_session(lambda *_: [])
+    cache = CommitCacheService()
+
+    for _ in range(2):
+        uuids = await cache.get_collection_uuids(
+            db, None, "owner", "repo", "sha"
+        )
+        # Only the collections listed in books.xml are fetched
+        assert uuids == {"book-slug1.collection.xml": UUID}
+
+    assert [call[0] for call in github_calls] == [
+        "get_book_commit",
+        "get_collection_uuids",
+    ]
+    assert "UPDATE commit_cache SET collection_uuids" in db.calls_str
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+@pytest.mark.asyncio
+async def test_least_recently_used_commit_is_evicted(
+    mock_session, github_calls
+):
+    db = mock_session(lambda *_: [])
+    cache = CommitCacheService(maxsize=2)
+
+    for sha in ("a", "b", "a", "c", "a", "b"):
+        await cache.get_book_commit(db, None, "owner", "repo", sha)
+
+    # b was evicted by c, a was kept because it was used
+    assert [call[3] for call in github_calls] == ["a", "b", "c", "b"]
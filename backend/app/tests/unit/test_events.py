@@ -0,0 +1,80 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.data_models.models import Job
+from app.service.events import JobEventHub
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+@pytest.mark.asyncio
+async def test_publish_reaches_subscribers(fake_data):
+    # GIVEN: A hub without a NOTIFY channel and two subscribers
+    hub = JobEventHub()
+    job = Job.model_validate(fake_data.FAKE_JOB)
+
+    async with hub.subscribe() as first, hub.subscribe() as second:
+        # WHEN: A job is published
+        hub.publish(job)
+
+        # THEN: Every subscriber receives the serialized job
+        for queue in (first, second):
+            message = await asyncio.wait_for(queue.get(), 1)
+            assert Job.model_validate_json(message) == job
+
+    # AND: Subscribers are removed when they leave
+    assert len(hub._subscribers) == 0
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+@pytest.mark.asyncio
+async def test_broadcast_from_worker_thread():
+    # GIVEN: A subscriber on the event loop
+    hub = JobEventHub()
+
+    async with hub.subscribe() as queue:
+        # WHEN: A message is broadcast from another thread (sync endpoints)
+        thread = threading.Thread(target=hub.broadcast, args=("hello",))
+        thread.start()
+        thread.join()
+
+        # THEN: The message is delivered on the subscriber's loop
+        assert await asyncio.wait_for(queue.get(), 1) == "hello"
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+@pytest.mark.asyncio
+async def test_slow_subscriber_drops_oldest():
+    # GIVEN: A subscriber that does not keep up
+    hub = JobEventHub(max_queue_size=2)
+
+    async with hub.subscribe() as queue:
+        # WHEN: More messages arrive than the queue can hold
+        for message in ("1", "2", "3"):
+            hub.broadcast(message)
+        await asyncio.sleep(0)
+
+        # THEN: The oldest message is dropped
+        assert [queue.get_nowait() for _ in range(queue.qsize())] == [
+            "2",
+            "3",
+        ]
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+def test_relay_without_subscribers(monkeypatch):
+    # GIVEN: A process nobody is streaming events from
+    hub = JobEventHub("job_events")
+    monkeypatch.setattr(
+        "app.service.events.Session",
+        lambda: pytest.fail("The job should not be loaded"),
+    )
+
+    # WHEN: A job change is announced
+    # THEN: The job is not loaded
+    hub._relay("1")
@@ -1,7 +1,11 @@
+import asyncio
+import json
+
 import pytest
 from httpx import AsyncClient
 
-from app.github.api import get_tags
+from app.github.api import get_collection_uuids, get_tags, request_key
+from app.github.client import authenticate_client
 
 OWNER = "openstax"
 REPO = "enki"
@@ -29,58 +33,6 @@ async def test_get_user_and_teams(monkeypatch, mock_github_api):
     assert len(teams) > 0
 
 
-@pytest.mark.unit
-@pytest.mark.nondestructive
-@pytest.mark.asyncio
-async def test_get_book_repository(monkeypatch, mock_github_api):
-    from datetime import datetime
-
-    exc = None
-    repo = None
-    books = None
-    timestamp = None
-    commit_sha = None
-    try:
-        async with AsyncClient() as client:
-            (
-                repo,
-                commit_sha,
-                timestamp,
-                books,
-            ) = await mock_github_api.get_book_repository(
-                client, "tiny-book", "openstax", "main"
-            )
-    except Exception as e:
-        exc = e
-    assert exc is None
-    assert repo
-    assert repo.name == "tiny-book"
-    assert isinstance(commit_sha, str)
-    assert isinstance(timestamp, datetime)
-    assert isinstance(books, list)
-    assert len(books) > 0
-
-
-@pytest.mark.unit
-@pytest.mark.nondestructive
-@pytest.mark.asyncio
-async def test_get_book_collections(monkeypatch, mock_github_api):
-    exc = None
-    collections = None
-    try:
-        async with AsyncClient() as client:
-            collections = await mock_github_api.get_collections(
-                client, "tiny-book", "openstax", "main"
-            )
-    except Exception as e:
-        exc = e
-    assert exc is None
-    assert isinstance(collections, dict)
-    assert "book-slug1.collection.xml" in collections
-    assert collections["book-slug1.collection.xml"] is not None
-    assert len(collections["book-slug1.collection.xml"]) > 0
-
-
 @pytest.mark.unit
 @pytest.mark.nondestructive
 @pytest.mark.asyncio
@@ -200,3 +152,86 @@ async def test_get_tags_empty_response(mock_http_client):
 
     # THEN: Empty list is returned
     assert result == []
+
+
+@pytest.mark.asyncio
+async def test_get_collection_uuids(mock_http_client):
+    # GIVEN: A commit with one of the two requested collections
+    collection = (
+        '<col:collection xmlns:col="http://cnx.rice.edu/collxml" '
+        'xmlns:md="http://cnx.rice.edu/mdml">'
+        "<col:metadata><md:uuid>abc</md:uuid></col:metadata>"
+        "<col:content><md:uuid>not-this-one</md:uuid></col:content>"
+        "</col:collection>"
+    )
+    mock_client = mock_http_client(
+        post={
+            "https://api.github.com/graphql": {
+                "data": {
+                    "repository": {
+                        "object": {
+                            "c0": {"object": {"text": collection}},
+                            "c1": None,
+                        }
+                    }
+                }
+            }
+        }
+    )
+
+    # WHEN: The uuids of both collections are requested
+    result = await get_collection_uuids(
+        mock_client,
+        REPO,
+        OWNER,
+        "sha",
+        ["a.collection.xml", "b.collection.xml"],
+    )
+
+    # THEN: Only the requested files were asked for, each under an alias
+    query = json.loads(mock_client.responses[0].request.content)["query"]
+    assert 'c0: file (path: "collections/a.collection.xml")' in query
+    assert 'c1: file (path: "collections/b.collection.xml")' in query
+    # AND: The first uuid of each existing collection is returned
+    assert result == {"a.collection.xml": "abc"}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_calls_are_coalesced(mock_http_client):
+    # GIVEN: Two clients sending the same credentials
+    tags = make_tags(["20260225.221405"])
+    planned = {gh_url(per_page=5): tags, gh_url(per_page=1): tags}
+    first = mock_http_client(get=planned)
+    second = mock_http_client(get=planned)
+    before = (get_tags.stats.calls, get_tags.stats.coalesced)
+
+    # WHEN: Identical calls overlap
+    results = await asyncio.gather(
+        get_tags(first, OWNER, REPO, 5, None),
+        get_tags(second, OWNER, REPO, 5, None),
+        get_tags(first, OWNER, REPO, 1, None),
+    )
+
+    # THEN: GitHub is asked once per distinct call
+    assert len(first.responses) + len(second.responses) == 2
+    assert results[0] is results[1]
+    # AND: The coalesced call is counted
+    assert (get_tags.stats.calls, get_tags.stats.coalesced) == (
+        before[0] + 3,
+        before[1] + 1,
+    )
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+def test_request_key_priority():
+    # GIVEN: An urgent and a deferrable client with the same token
+    urgent = authenticate_client(AsyncClient(), "token")
+    deferrable = urgent.deferrable()
+
+    # THEN: Their calls are never coalesced with each other
+    assert request_key(urgent, OWNER) != request_key(deferrable, OWNER)
+    # AND: Calls with the same token and priority still are
+    assert request_key(urgent, OWNER) == request_key(
+        authenticate_client(AsyncClient(), "token"), OWNER
+    )
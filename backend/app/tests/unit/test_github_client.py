@@ -0,0 +1,65 @@
+import httpx
+import pytest
+
+from app.github.client import (
+    authenticate_client,
+    close_http_client,
+    get_http_client,
+)
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+@pytest.mark.asyncio
+async def test_authentication_is_per_request(mock_http_client):
+    # GIVEN: One shared client used by two users
+    url = httpx.URL("https://api.github.com/user")
+    client = mock_http_client(get={url: {}})
+    first = authenticate_client(client, "first")
+    second = authenticate_client(client, "second")
+
+    # WHEN: Both users make requests
+    await first.get(url)
+    await second.get(url, headers={"Accept": "text/plain"})
+    await client.get(url)
+
+    # THEN: Each request carries the credentials of its own user
+    headers = [r.request.headers for r in client.responses]
+    assert headers[0]["authorization"] == "Bearer first"
+    assert headers[1]["authorization"] == "Bearer second"
+    assert headers[1]["accept"] == "text/plain"
+    # AND: The shared client itself is never authenticated
+    assert "authorization" not in headers[2]
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+@pytest.mark.asyncio
+async def test_http_client_is_shared():
+    client = get_http_client()
+    assert get_http_client() is client
+
+    await close_http_client()
+
+    assert client.is_closed
+    assert get_http_client() is not client
+    await close_http_client()
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+@pytest.mark.asyncio
+async def test_http_client_keeps_no_cookies():
+    # GIVEN: The shared client
+    client = get_http_client()
+
+    # WHEN: A response sets a cookie
+    request = httpx.Request("GET", "https://api.github.com/user")
+    response = httpx.Response(
+        200, headers={"Set-Cookie": "logged_in=yes"}, request=request
+    )
+    client.cookies.extract_cookies(response)
+
+    # THEN: It is not stored for the next user's requests
+    assert len(client.cookies) == 0
+    await close_http_client()
@@ -1,3 +1,4 @@
+from datetime import datetime, timezone
 from typing import Any, cast
 
 import pytest
@@ -15,11 +16,11 @@ FAKE_REPO = GitHubRepo(
 
 @pytest.fixture
 def mock_get_user_repositories(monkeypatch):
-    async def get_user_repositories(client, query):
-        return [FAKE_REPO]
+    async def search_user_repositories(client, query):
+        return [FAKE_REPO], 1
 
     monkeypatch.setattr(
-        "app.github.utils.get_user_repositories", get_user_repositories
+        "app.github.utils.search_user_repositories", search_user_repositories
     )
 
 
@@ -29,12 +30,20 @@ def mock_user_service(monkeypatch):
         def upsert_user(self, _db, user: UserSession):
             assert user == FAKE_USER
 
-        def upsert_user_repositories(self, _db, user, user_repos):
+        def upsert_user_repositories(
+            self, _db, user, user_repos, prune, prune_prefix, prune_permissions
+        ):
             assert len(user_repos) == 1
             assert user_repos[0] == FAKE_REPO
             assert user.id == FAKE_USER.id
+            # Admins are synced every osbooks repository they can see
+            assert prune_prefix == "osbooks-"
+            assert prune_permissions is None
+            self.pruned = prune
 
-    monkeypatch.setattr("app.github.utils.user_service", MockUserService())
+    user_service = MockUserService()
+    monkeypatch.setattr("app.github.utils.user_service", user_service)
+    return user_service
 
 
 @pytest.fixture
@@ -66,3 +75,57 @@ async def test_sync_user_repositories(
     except Exception as e:
         exception = e
     assert exception is None
+    # A full sync removes permissions the user no longer has
+    assert mock_user_service.pruned
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+@pytest.mark.asyncio
+async def test_sync_only_repositories_pushed_since(
+    monkeypatch, mock_user_service, mock_repository_service
+):
+    queries = []
+
+    async def search_user_repositories(client, query):
+        queries.append(query)
+        return [FAKE_REPO], 1
+
+    monkeypatch.setattr(
+        "app.github.utils.search_user_repositories", search_user_repositories
+    )
+
+    await sync_user_repositories(
+        cast(Any, None),
+        cast(Any, None),
+        FAKE_USER,
+        datetime(2026, 10, 18, 12, 30, tzinfo=timezone.utc),
+    )
+
+    assert queries == [
+        "org:openstax osbooks in:name pushed:>=2026-10-18T12:30:00Z"
+    ]
+    # Repositories that were not pushed to are still the user's
+    assert not mock_user_service.pruned
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+@pytest.mark.asyncio
+@pytest.mark.parametrize("repository_count", [2, 1001])
+async def test_sync_does_not_prune_truncated_results(
+    monkeypatch, mock_user_service, mock_repository_service, repository_count
+):
+    # GIVEN: A search that did not return every matching repository
+    async def search_user_repositories(client, query):
+        return [FAKE_REPO], repository_count
+
+    monkeypatch.setattr(
+        "app.github.utils.search_user_repositories", search_user_repositories
+    )
+
+    # WHEN: Every repository of the user is synced
+    await sync_user_repositories(cast(Any, None), cast(Any, None), FAKE_USER)
+
+    # THEN: Permissions on the missing repositories are kept
+    assert not mock_user_service.pruned
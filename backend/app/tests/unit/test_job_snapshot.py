@@ -0,0 +1,91 @@
+from datetime import date, datetime, time, timedelta, timezone
+
+import pytest
+
+from app.data_models.models import Job
+from app.db.schema import Jobs, RenderedJob
+from app.service.job_snapshot import (
+    group_consecutive_days,
+    job_snapshot_service,
+    snapshot_cutoff,
+)
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+def test_group_consecutive_days():
+    # GIVEN: Days with a gap between them
+    days = [
+        date(2026, 1, 3),
+        date(2026, 1, 1),
+        date(2026, 1, 2),
+        date(2026, 1, 10),
+    ]
+
+    # WHEN: They are grouped
+    ranges = group_consecutive_days(days)
+
+    # THEN: Each run of days becomes one half-open range
+    assert ranges == [
+        (date(2026, 1, 1), date(2026, 1, 4)),
+        (date(2026, 1, 10), date(2026, 1, 11)),
+    ]
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+def test_snapshot_cutoff():
+    now = datetime(2026, 3, 1, 0, 30, tzinfo=timezone.utc)
+    assert snapshot_cutoff(now) == date(2026, 2, 28)
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+@pytest.mark.parametrize("age_days,statement_count", [(0, 0), (1, 0), (2, 1)])
+def test_invalidate(mock_session, fake_data, age_days, statement_count):
+    # GIVEN: A job created some days ago
+    db = mock_session()
+    # A job of its own; the shared fake job must not change
+    job = Jobs(
+        id=fake_data.FAKE_JOB.id,
+        created_at=datetime.now(timezone.utc) - timedelta(days=age_days),
+    )
+
+    # WHEN: The job is invalidated
+    job_snapshot_service.invalidate(db, job)
+
+    # THEN: Only jobs old enough to be in a snapshot touch the table
+    assert len(db.calls) == statement_count
+    if statement_count:
+        assert "ON CONFLICT (day) DO UPDATE" in db.calls_str
+        assert db.params[0]["day_m0"] == job.created_at.date()
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+def test_rebuild_renders_jobs_again(database):
+    # GIVEN: A job with a stored rendering that is stale, although the job
+    # did not change
+    database.seed(job_count=1)
+    day = snapshot_cutoff() - timedelta(days=3)
+    with database.Session() as db:
+        job = db.get(Jobs, 1)
+        job.created_at = datetime.combine(day, time(12), tzinfo=timezone.utc)
+        db.commit()
+        db.add(
+            RenderedJob(
+                job_id=1, content='"stale"', job_updated_at=job.updated_at
+            )
+        )
+        db.commit()
+
+    with database.Session() as db:
+        # WHEN: The snapshots of that day are rebuilt
+        content = "".join(
+            job_snapshot_service.iter_jobs_json(
+                db, day, day + timedelta(days=1), rebuild=True
+            )
+        )
+
+    # THEN: The job is rendered from the database again
+    assert Job.model_validate_json(content).id == "1"
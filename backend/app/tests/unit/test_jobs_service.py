@@ -0,0 +1,116 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.data_models.models import JobUpdateItem
+from app.service.jobs import jobs_service
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+def test_claim_without_queued_jobs(mock_session):
+    # GIVEN: No queued jobs
+    db = mock_session(lambda *_: [])
+
+    # WHEN: A worker claims jobs
+    jobs, lease_expires_at = jobs_service.claim(db, 3, 2, timedelta(minutes=5))
+
+    # THEN: Nothing is claimed, in a single statement
+    assert jobs == []
+    assert lease_expires_at is not None
+    assert len(db.calls) == 1
+    assert db.did_commit
+    # AND: Candidates are locked without waiting on other claims
+    sql = str(db.calls[0].compile(dialect=postgresql.dialect()))
+    assert "FOR UPDATE SKIP LOCKED" in sql
+    assert "RETURNING jobs.id" in sql
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+@pytest.mark.parametrize("renewed_ids,renewed", [([1], True), ([], False)])
+def test_renew_lease(mock_session, renewed_ids, renewed):
+    # GIVEN: A job that is or is not leased anymore
+    db = mock_session(lambda *_: renewed_ids)
+
+    # WHEN: The worker renews the lease
+    lease_expires_at = jobs_service.renew_lease(db, 1, timedelta(minutes=5))
+
+    # THEN: The expiry is only returned when a leased job was updated
+    assert (lease_expires_at is not None) == renewed
+    sql = str(db.calls[0].compile(dialect=postgresql.dialect()))
+    assert "jobs.status_id IN" in sql
+    # AND: Only existing leases are renewed
+    assert "jobs.lease_expires_at IS NOT NULL" in sql
+    # AND: Heartbeats do not count as changes to the job
+    assert "updated_at=jobs.updated_at" in sql
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+def test_reap_expired_leases_without_expired_jobs(mock_session):
+    db = mock_session(lambda *_: [])
+
+    assert jobs_service.reap_expired_leases(db) == []
+
+    sql = str(db.calls[0].compile(dialect=postgresql.dialect()))
+    assert "jobs.lease_expires_at <" in sql
+    assert "FOR UPDATE SKIP LOCKED" in sql
+    assert "CASE WHEN" in sql
+    assert db.did_commit
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+def test_bulk_update(monkeypatch, mock_session):
+    # GIVEN: A processing job (1), a completed job (2) and a processing job
+    # a worker claimed (4)
+    lease = datetime.now(timezone.utc)
+    db = mock_session(lambda *_: [(1, 3, None), (2, 5, None), (4, 3, lease)])
+    monkeypatch.setattr(
+        jobs_service, "_load_changed", lambda db, job_ids: job_ids
+    )
+
+    # WHEN: A batch updates both and a job that does not exist
+    updated = jobs_service.bulk_update(
+        db,
+        [
+            JobUpdateItem(id=1, status_id=5, artifact_urls="https://a"),
+            JobUpdateItem(id=2, status_id=3, worker_version="1"),
+            JobUpdateItem(id=3, status_id=5),
+            JobUpdateItem(id=4, status_id=3),
+        ],
+    )
+
+    # THEN: Only existing jobs are updated, in one transaction
+    assert updated == [1, 2, 4]
+    assert db.did_commit
+    rows = {row["id"]: row for params in db.bulk_params[:-1] for row in params}
+    assert rows.keys() == {1, 2, 4}
+    # AND: Completed jobs keep their status
+    assert rows[1]["status_id"] == 5
+    assert rows[2]["status_id"] == 5
+    assert rows[2]["worker_version"] == "1"
+    assert "worker_version" not in rows[1]
+    # AND: Leases only exist for running jobs that were claimed
+    assert rows[1]["lease_expires_at"] is None
+    assert rows[4]["lease_expires_at"] > lease
+    # AND: Artifact urls are set with one statement
+    assert db.bulk_params[-1] == [{"b_job_id": 1, "b_url": "https://a"}]
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+def test_set_book_artifact_urls_without_books(mock_session):
+    # GIVEN: A job without any books
+    db = mock_session(lambda *_: [])
+
+    # WHEN: Artifact urls are set for it
+    jobs_service._set_book_artifact_urls(db, {(1, "book"): "https://a"})
+
+    # THEN: No book is added and the urls are still sent
+    assert db.added_items == []
+    assert db.bulk_params[-1] == [
+        {"b_job_id": 1, "b_slug": "book", "b_url": "https://a"}
+    ]
@@ -0,0 +1,44 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core.loop_monitor import EventLoopMonitor
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+def test_record_tracks_lag():
+    # GIVEN: A monitor that counts lag over 0.1s as a stall
+    monitor = EventLoopMonitor(interval=1, threshold=0.1)
+
+    # WHEN: A few samples are recorded
+    for lag in (0.01, 0.2, -0.001):
+        monitor.record(lag)
+
+    # THEN: Lag is summarized and only the long sample is a stall
+    assert monitor.samples == 3
+    assert monitor.max_lag == 0.2
+    assert monitor.mean_lag == pytest.approx(0.07)
+    assert monitor.stalls == 1
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+@pytest.mark.asyncio
+async def test_detects_blocked_loop():
+    # GIVEN: A running monitor
+    monitor = EventLoopMonitor(interval=0.01, threshold=0.05)
+    monitor.start()
+    try:
+        await asyncio.sleep(0.02)
+
+        # WHEN: Synchronous work blocks the event loop
+        time.sleep(0.1)
+        await asyncio.sleep(0.02)
+    finally:
+        await monitor.stop()
+
+    # THEN: The blocked time is recorded as a stall
+    assert monitor.stalls >= 1
+    assert monitor.max_lag >= 0.05
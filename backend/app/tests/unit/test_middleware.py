@@ -3,10 +3,11 @@ import logging
 import pytest
 from starlette.applications import Starlette
 from starlette.middleware import Middleware
-from starlette.responses import PlainTextResponse
+from starlette.responses import PlainTextResponse, StreamingResponse
 from starlette.routing import Route
 from starlette.testclient import TestClient
 
+from app.db.utils import get_db
 from app.middleware import DBSessionMiddleware
 
 
@@ -14,14 +15,40 @@ def homepage(request):
     return PlainTextResponse("CORGI")
 
 
+def database(request):
+    get_db(request)
+    return PlainTextResponse("CORGI")
+
+
 def exc(request):
     raise Exception("A CORGI exception has occurred")
 
 
+events = []
+
+
+class RecordingSession:
+    def close(self):
+        events.append("close")
+
+
+def stream(request):
+    request.state.db = RecordingSession()
+
+    def body():
+        for chunk in ("CO", "RGI"):
+            events.append(chunk)
+            yield chunk
+
+    return StreamingResponse(body())
+
+
 app = Starlette(
     routes=[
         Route("/", endpoint=homepage),
+        Route("/db", endpoint=database),
         Route("/exc", endpoint=exc),
+        Route("/stream", endpoint=stream),
     ],
     middleware=[Middleware(DBSessionMiddleware)],
 )
@@ -37,10 +64,17 @@ def test_db_session_middleware(caplog):
     # WHEN: A request is made to the homepage
     response = testclient.get("/")
 
-    # THEN: A response code 200 is returned and database messages are logged
+    # THEN: A response code 200 is returned without creating a session
+    assert response.status_code == 200
+    assert "Creating Database session" not in caplog.text
+
+    # AND WHEN: A request is made to a route that uses the database
+    response = testclient.get("/db")
+
+    # THEN: A session is created on first use and closed afterwards
     assert response.status_code == 200
-    assert "Closing Database session" in caplog.text
     assert "Creating Database session" in caplog.text
+    assert "Closing Database session" in caplog.text
 
     # AND WHEN: A request is made to a route that raises an Exception
     caplog.set_level(logging.INFO)
@@ -49,3 +83,18 @@ def test_db_session_middleware(caplog):
     # THEN: A response 500 code is returned and the exception is logged
     assert response.status_code == 500
     assert "Exception: A CORGI exception has occurred" in caplog.text
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+def test_db_session_outlives_streamed_body():
+    # GIVEN: A route that streams its body while using a session
+    testclient = TestClient(app)
+    events.clear()
+
+    # WHEN: The route is requested
+    response = testclient.get("/stream")
+
+    # THEN: The whole body is sent and the session is closed afterwards
+    assert response.text == "CORGI"
+    assert events == ["CO", "RGI", "close"]
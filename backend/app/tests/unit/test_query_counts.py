@@ -0,0 +1,124 @@
+import pytest
+from sqlalchemy.exc import InvalidRequestError
+
+from app.data_models.models import Job, JobMin, RepositorySummary, UserSession
+from app.db.schema import Book, Commit
+from app.service.jobs import jobs_service
+from app.service.user import user_service
+
+
+def loaded(db, model):
+    return [o for o in db.identity_map.values() if isinstance(o, model)]
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+def test_get_job(database):
+    # GIVEN: A job for a repository with a long history
+    database.seed(job_count=1)
+
+    with database.Session() as db:
+        # WHEN: The job is loaded and serialized
+        def get_job():
+            db_job = jobs_service.get(db, 1)
+            return db_job, Job.model_validate(db_job)
+
+        count, (db_job, job) = database.count(get_job)
+
+        # THEN: It takes one query for the job and one for its books
+        assert count == 2
+        assert job.version == f"{database.COMMIT_COUNT - 1:040x}"
+        assert len(job.books) == database.BOOKS_PER_COMMIT
+        # AND: Only the commit the job was built from is loaded
+        assert len(loaded(db, Commit)) == 1
+        assert len(loaded(db, Book)) == database.BOOKS_PER_COMMIT
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+def test_unplanned_relationship_raises(database):
+    # GIVEN: A job loaded with the job loader options
+    database.seed(job_count=1)
+
+    with database.Session() as db:
+        job = jobs_service.get(db, 1)
+
+        # WHEN: A relationship the options did not plan for is read
+        # THEN: It raises instead of querying
+        with pytest.raises(InvalidRequestError, match="not available"):
+            _ = job.books[0].book.commit.repository.commits
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+@pytest.mark.parametrize("job_count", [1, 25])
+def test_list_jobs(database, job_count, monkeypatch, testclient_with_session):
+    # GIVEN: Jobs created today that were never rendered
+    database.seed(job_count=job_count)
+    monkeypatch.setattr(
+        "app.api.endpoints.jobs.SessionFactory", database.Session
+    )
+    database.statements.clear()
+
+    # WHEN: The job list is requested
+    response = testclient_with_session.get("/api/jobs/")
+
+    # THEN: Every job is returned
+    assert response.status_code == 200
+    jobs = [Job(**job) for job in response.json()]
+    assert len(jobs) == job_count
+    assert all(len(job.books) == database.BOOKS_PER_COMMIT for job in jobs)
+    # AND: The number of queries does not depend on the number of jobs
+    queries = [s for s in database.statements if s.startswith("SELECT")]
+    assert len(queries) == 17
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+def test_check(database):
+    # GIVEN: Queued jobs
+    database.seed(job_count=25)
+
+    with database.Session() as db:
+        # WHEN: Pipelines poll for jobs
+        count, jobs = database.count(
+            lambda: [
+                JobMin.model_validate(j)
+                for j in jobs_service.get_job_mins(db, status_id=1)
+            ]
+        )
+
+        # THEN: One query without joins returns them
+        assert count == 1
+        assert "JOIN" not in database.statements[0]
+        assert len(jobs) == 20
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+def test_repositories(database, fake_data):
+    # GIVEN: A repository with a long history
+    database.seed(job_count=0)
+    user = UserSession(
+        id=1, token="", role=fake_data.FAKE_SESSION.role, avatar_url="", name=""
+    )
+
+    with database.Session() as db:
+        # WHEN: The repository summary is loaded
+        def repositories():
+            db_repositories = user_service.get_user_repositories(db, user)
+            return db_repositories, [
+                RepositorySummary.model_validate(r) for r in db_repositories
+            ]
+
+        count, (db_repositories, summaries) = database.count(repositories)
+
+        # THEN: The repositories, their newest commit and its books are
+        # loaded in one query each
+        assert count == 3
+        assert summaries[0].books == [
+            f"book-{j}" for j in range(database.BOOKS_PER_COMMIT)
+        ]
+        # AND: The rest of the history is not
+        assert len(loaded(db, Commit)) == 1
+        assert len(loaded(db, Book)) == database.BOOKS_PER_COMMIT
@@ -0,0 +1,103 @@
+import time
+
+import httpx
+import pytest
+
+from app.github.client import AuthenticatedClient
+from app.github.rate_limit import RateLimitError, RateLimitTracker
+
+URL = "https://api.github.com/graphql"
+
+
+def rate_limit_headers(remaining, reset_in=3600):
+    return {
+        "x-ratelimit-limit": "5000",
+        "x-ratelimit-remaining": str(remaining),
+        "x-ratelimit-reset": str(int(time.time() + reset_in)),
+        "x-ratelimit-resource": "graphql",
+    }
+
+
+def client_returning(*responses):
+    """A client that answers with each response in turn"""
+    planned = list(responses)
+
+    def handler(request: httpx.Request):
+        return planned.pop(0)
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+@pytest.fixture
+def tracker(monkeypatch):
+    tracker = RateLimitTracker(
+        reserve=10, max_wait=5, retries=2, base_delay=0, max_delay=0
+    )
+    monkeypatch.setattr("app.github.client.rate_limit_tracker", tracker)
+    return tracker
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+@pytest.mark.asyncio
+async def test_budget_is_recorded_per_token(tracker):
+    # GIVEN: A response carrying the rate limit of the token
+    client = AuthenticatedClient(
+        client_returning(httpx.Response(200, headers=rate_limit_headers(42))),
+        "token",
+    )
+
+    # WHEN: The request is made
+    await client.post(URL)
+
+    # THEN: The budget is tracked without revealing the token
+    (budget,) = tracker.budgets()
+    assert budget.token == client.token_id != "token"
+    assert (budget.resource, budget.remaining) == ("graphql", 42)
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+@pytest.mark.asyncio
+async def test_secondary_rate_limit_is_retried(tracker):
+    # GIVEN: GitHub rejects the first two attempts
+    client = AuthenticatedClient(
+        client_returning(
+            httpx.Response(403, headers={"retry-after": "0"}),
+            httpx.Response(
+                403, text="You have exceeded a secondary rate limit"
+            ),
+            httpx.Response(200),
+        ),
+        "token",
+    )
+
+    # WHEN: A request is made
+    response = await client.post(URL)
+
+    # THEN: It succeeds after backing off
+    assert response.status_code == 200
+    assert tracker.retried == 2
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+@pytest.mark.asyncio
+async def test_calls_that_can_wait_leave_the_reserve(tracker):
+    # GIVEN: A token with fewer requests left than the reserve
+    client = AuthenticatedClient(
+        client_returning(
+            httpx.Response(200, headers=rate_limit_headers(5)),
+            httpx.Response(200),
+        ),
+        "token",
+    )
+    await client.post(URL)
+
+    # WHEN: A call that can wait is made long before the reset
+    # THEN: It is refused instead of using up the reserve
+    with pytest.raises(RateLimitError):
+        await client.deferrable().post(URL)
+
+    # AND: Urgent calls still go through
+    assert (await client.post(URL)).status_code == 200
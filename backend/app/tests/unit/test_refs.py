@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+from app.github.api import NotFoundError
+from app.github.models import GitHubRepo
+from app.github.refs import RefCache
+
+REPO = GitHubRepo(name="repo", database_id=1, viewer_permission="WRITE")
+
+
+@pytest.fixture
+def github_calls(monkeypatch):
+    calls = []
+
+    async def get_repository_commit(client, repo_name, repo_owner, version):
+        calls.append((repo_owner, repo_name, version))
+        await asyncio.sleep(0)
+        if version == "typo":
+            raise NotFoundError(f"Could not find commit '{version}'")
+        return REPO, f"sha-{len(calls)}"
+
+    monkeypatch.setattr(
+        "app.github.refs.get_repository_commit", get_repository_commit
+    )
+    return calls
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+@pytest.mark.asyncio
+async def test_concurrent_lookups_share_one_request(github_calls):
+    # GIVEN: An empty cache
+    cache = RefCache(ttl=10, miss_ttl=10)
+
+    # WHEN: The same ref is resolved by many jobs at once
+    results = await asyncio.gather(
+        *[
+            cache.get_repository_commit(None, 1, "repo", "owner", "main")
+            for _ in range(10)
+        ]
+    )
+
+    # THEN: GitHub is asked once and everyone gets the same commit
+    assert github_calls == [("owner", "repo", "main")]
+    assert {sha for _, sha in results} == {"sha-1"}
+    # AND: Later lookups are answered from the cache
+    await cache.get_repository_commit(None, 1, "repo", "owner", "main")
+    assert len(github_calls) == 1
+    assert cache._pending == {}
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+@pytest.mark.asyncio
+async def test_entries_are_per_viewer_and_expire(github_calls):
+    cache = RefCache(ttl=0, miss_ttl=0)
+
+    await cache.get_repository_commit(None, 1, "repo", "owner", "main")
+    await cache.get_repository_commit(None, 2, "repo", "owner", "main")
+    _, sha = await cache.get_repository_commit(None, 1, "repo", "owner", "main")
+
+    assert len(github_calls) == 3
+    assert sha == "sha-3"
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+@pytest.mark.asyncio
+async def test_missing_refs_are_cached(github_calls):
+    # GIVEN: A ref that does not exist
+    cache = RefCache(ttl=10, miss_ttl=10)
+
+    # WHEN: It is resolved twice
+    for _ in range(2):
+        with pytest.raises(NotFoundError, match="typo"):
+            await cache.get_repository_commit(None, 1, "repo", "owner", "typo")
+
+    # THEN: GitHub is only asked once
+    assert github_calls == [("owner", "repo", "typo")]
@@ -0,0 +1,43 @@
+import pytest
+
+from app.data_models.models import Job
+from app.db.schema import Jobs as JobSchema
+from app.service.rendered_job import rendered_job_service
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+def test_refresh(mock_session, fake_data):
+    # GIVEN: A job
+    db = mock_session()
+    job = fake_data.FAKE_JOB
+
+    # WHEN: Its JSON is refreshed
+    content = rendered_job_service.refresh(db, job)
+
+    # THEN: The serialized job is upserted and committed
+    assert Job.model_validate_json(content) == Job.model_validate(job)
+    assert len(db.calls) == 1
+    assert "ON CONFLICT (job_id) DO UPDATE" in db.calls_str
+    assert db.did_commit
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+def test_iter_jobs_json_releases_connection(monkeypatch, database):
+    # GIVEN: More jobs than fit in one chunk
+    database.seed(job_count=25)
+    monkeypatch.setattr("app.service.rendered_job._RENDER_CHUNK_SIZE", 10)
+
+    with database.Session() as db:
+        # WHEN: The jobs are read
+        job_ids = []
+        for _, content in rendered_job_service.iter_jobs_json(
+            db, JobSchema.id > 0
+        ):
+            # THEN: No connection is held while the caller uses a job
+            assert not db.in_transaction()
+            job_ids.append(Job.model_validate_json(content).id)
+
+    # AND: Every job is read once, in order
+    assert job_ids == [str(i) for i in range(1, 26)]
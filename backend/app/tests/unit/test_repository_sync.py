@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.data_models.models import Role, UserSession
+from app.service.repository_sync import UserRepositorySync
+
+USER = UserSession(
+    id=1, token="fake", role=Role.ADMIN, avatar_url="", name="TestUser"
+)
+NOW = datetime(2026, 10, 18, 12, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def sync_calls(monkeypatch):
+    calls = []
+
+    async def sync_user_repositories(client, db, user, pushed_since=None):
+        calls.append(("sync", pushed_since))
+
+    class MockUserService:
+        synced_at = (None, None)
+
+        def get_repositories_synced_at(self, db, user):
+            return self.synced_at
+
+        def set_repositories_synced_at(self, db, user, synced_at, full):
+            calls.append(("set", synced_at, full))
+
+    monkeypatch.setattr(
+        "app.service.repository_sync.sync_user_repositories",
+        sync_user_repositories,
+    )
+    user_service = MockUserService()
+    monkeypatch.setattr(
+        "app.service.repository_sync.user_service", user_service
+    )
+    return calls, user_service
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "synced_at,full_synced_at,expected",
+    [
+        # Never synced: fetch everything
+        (None, None, [("sync", None), ("set", NOW, True)]),
+        # Synced a moment ago: nothing to do
+        (NOW - timedelta(minutes=1), NOW - timedelta(hours=1), []),
+        # Synced a while ago: only repositories pushed to since then
+        (
+            NOW - timedelta(hours=1),
+            NOW - timedelta(hours=2),
+            [
+                ("sync", NOW - timedelta(hours=1, minutes=1)),
+                ("set", NOW, False),
+            ],
+        ),
+        # Last full sync is too old: fetch everything again
+        (
+            NOW - timedelta(hours=1),
+            NOW - timedelta(days=2),
+            [("sync", None), ("set", NOW, True)],
+        ),
+    ],
+)
+async def test_sync(sync_calls, synced_at, full_synced_at, expected):
+    calls, user_service = sync_calls
+    user_service.synced_at = (synced_at, full_synced_at)
+    repository_sync = UserRepositorySync(5 * 60, 24 * 60 * 60)
+
+    await repository_sync.sync(None, None, USER, NOW)
+
+    assert calls == expected
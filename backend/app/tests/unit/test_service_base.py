@@ -0,0 +1,92 @@
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.core.errors import CustomBaseError
+from app.service.base import decode_cursor, encode_cursor
+from app.service.jobs import jobs_service
+
+
+class RecordingQuery:
+    def __init__(self, items):
+        self.items = items
+        self.criteria = []
+
+    def options(self, *_):
+        return self
+
+    def filter(self, *criteria):
+        self.criteria.extend(criteria)
+        return self
+
+    def order_by(self, *_):
+        return self
+
+    def limit(self, limit):
+        self.items = self.items[:limit]
+        return self
+
+    def all(self):
+        return self.items
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+def test_cursor_round_trip():
+    created_at = datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+    assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, 42)
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+@pytest.mark.parametrize("cursor", ["", "not base64!", "WzFd"])
+def test_invalid_cursor(cursor):
+    with pytest.raises(CustomBaseError) as e:
+        decode_cursor(cursor)
+    assert e.value.status_code == 400
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+@pytest.mark.parametrize("job_count,has_next", [(1, False), (2, True)])
+def test_get_items_before(fake_data, job_count, has_next):
+    # GIVEN: A query that returns some jobs
+    job = fake_data.FAKE_JOB
+    query = RecordingQuery([job] * job_count)
+
+    class Session:
+        def query(self, *_):
+            return query
+
+    # WHEN: A page following a cursor is requested
+    cursor = encode_cursor(job.created_at, job.id + 1)
+    jobs, next_cursor = jobs_service.get_items_before(
+        Session(), before=cursor, limit=2
+    )
+
+    # THEN: Jobs are filtered by the (created_at, id) key of the cursor
+    criterion = query.criteria[0].compile(dialect=postgresql.dialect())
+    assert "(jobs.created_at, jobs.id) <" in str(criterion)
+    assert jobs == [job] * job_count
+    # AND: A next cursor pointing at the last job is returned on full pages
+    if has_next:
+        assert decode_cursor(next_cursor) == (job.created_at, job.id)
+    else:
+        assert next_cursor is None
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+def test_get_items_before_empty_page():
+    # GIVEN: A query without results
+    class Session:
+        def query(self, *_):
+            return RecordingQuery([])
+
+    # WHEN: An empty page is requested
+    jobs, next_cursor = jobs_service.get_items_before(Session(), limit=0)
+
+    # THEN: It is the last page
+    assert jobs == []
+    assert next_cursor is None
@@ -0,0 +1,151 @@
+import pytest
+
+from app.data_models.models import Role, UserSession
+from app.db.schema import Repository
+from app.github import GitHubRepo
+from app.service import repository as repository_module
+from app.service import user as user_module
+from app.service.repository import repository_service
+from app.service.user import user_service
+
+USER = UserSession(
+    id=1, token="fake", role=Role.USER, avatar_url="", name="TestUser"
+)
+
+
+def github_repo(database_id, permission="WRITE"):
+    return GitHubRepo(
+        name=f"osbooks-{database_id}",
+        database_id=str(database_id),
+        viewer_permission=permission,
+    )
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+def test_upsert_user_repositories(monkeypatch, mock_session):
+    # GIVEN: More permissions than fit in one statement
+    monkeypatch.setattr(user_module, "_UPSERT_CHUNK_SIZE", 2)
+    db = mock_session()
+    repos = [github_repo(i) for i in range(3)] + [github_repo(0, "ADMIN")]
+
+    # WHEN: They are stored without pruning
+    user_service.upsert_user_repositories(db, USER, repos)
+
+    # THEN: One upsert per chunk is sent, with one row per repository
+    assert len(db.calls) == 2
+    assert "ON CONFLICT (user_id, repository_id) DO UPDATE" in db.calls_str
+    assert "DELETE" not in db.calls_str
+    assert db.params[0]["permission_id_m0"] == 1
+    assert db.params[1]["repository_id_m0"] == 2
+    assert db.did_commit
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+def test_upsert_user_repositories_prunes(mock_session):
+    db = mock_session()
+
+    user_service.upsert_user_repositories(
+        db, USER, [github_repo(7)], prune=True
+    )
+
+    assert len(db.calls) == 2
+    assert "DELETE FROM user_repository" in str(db.calls[1])
+    assert db.params[1]["user_id_1"] == USER.id
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+def test_upsert_user_repositories_prunes_only_synced_permissions(database):
+    from app.db.schema import RepositoryPermission as PermissionSchema
+    from app.db.schema import UserRepository
+
+    # GIVEN: Permissions a sync of writable osbooks repositories does not
+    # list: one it lost, a read permission recorded by a job and one on a
+    # repository outside the prefix
+    database.seed(0)
+    with database.Session() as db:
+        db.add(PermissionSchema(id=3, name="READ"))
+        db.add(PermissionSchema(id=5, name="WRITE"))
+        for id, name, permission_id in (
+            (2, "osbooks-lost", 5),
+            (3, "osbooks-read", 3),
+            (4, "other-book", 5),
+        ):
+            db.add(Repository(id=id, name=name, owner="openstax"))
+            db.add(
+                UserRepository(
+                    user_id=USER.id,
+                    repository_id=id,
+                    permission_id=permission_id,
+                )
+            )
+        db.commit()
+
+    # WHEN: The sync prunes what it did not find
+    with database.Session() as db:
+        user_service.upsert_user_repositories(
+            db,
+            USER,
+            [github_repo(1, "ADMIN")],
+            prune=True,
+            prune_prefix="osbooks-",
+            prune_permissions=[
+                user_module.RepositoryPermission.ADMIN,
+                user_module.RepositoryPermission.WRITE,
+            ],
+        )
+
+    # THEN: Only the permission the sync is authoritative for is removed
+    with database.Session() as db:
+        repository_ids = db.query(UserRepository.repository_id).all()
+    assert sorted(id for (id,) in repository_ids) == [1, 3, 4]
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+def test_upsert_repositories(monkeypatch, mock_session):
+    monkeypatch.setattr(repository_module, "_UPSERT_CHUNK_SIZE", 2)
+    db = mock_session()
+    repos = [Repository(id=i, name=f"r{i}", owner="openstax") for i in range(3)]
+
+    repository_service.upsert_repositories(db, repos)
+
+    assert len(db.calls) == 2
+    assert "ON CONFLICT (id) DO UPDATE" in db.calls_str
+    assert db.did_commit
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+@pytest.mark.parametrize("changed", [False, True])
+def test_upsert_user(mock_session, changed):
+    # GIVEN: A user whose name or avatar did or did not change
+    db = mock_session(
+        lambda db: [USER.id] if changed and len(db.calls) == 1 else []
+    )
+
+    # WHEN: The user logs in
+    user_service.upsert_user(db, USER)
+
+    # THEN: Rendered jobs of the user are only dropped after a change
+    assert "ON CONFLICT (id) DO UPDATE" in str(db.calls[0])
+    assert ("DELETE FROM rendered_job" in db.calls_str) == changed
+    assert db.did_commit
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+def test_upsert_repositories_invalidates_jobs(mock_session):
+    # GIVEN: A repository that was renamed
+    db = mock_session(lambda db: [1] if len(db.calls) == 1 else [])
+
+    # WHEN: It is stored
+    repository_service.upsert_repositories(
+        db, [Repository(id=1, name="renamed", owner="openstax")]
+    )
+
+    # THEN: The rendered jobs built from it are dropped
+    assert "DELETE FROM rendered_job" in str(db.calls[1])
+    assert "commit.repository_id IN" in str(db.calls[1])
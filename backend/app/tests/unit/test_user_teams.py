@@ -0,0 +1,117 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.service.user_teams import UserTeamsCache
+
+
+class FakeClient:
+    def deferrable(self):
+        return self
+
+
+@pytest.fixture
+def teams_calls(monkeypatch):
+    calls = []
+
+    async def get_user_teams(client, name):
+        calls.append(("github", name))
+        return ["fresh-team"]
+
+    class MockUserService:
+        stored = None
+
+        def get_teams(self, db, user_id):
+            return self.stored
+
+        def set_teams(self, db, user_id, teams, synced_at):
+            calls.append(("store", user_id, teams))
+
+    class MockSession:
+        def __enter__(self):
+            return None
+
+        def __exit__(self, *_):
+            pass
+
+    user_service = MockUserService()
+    monkeypatch.setattr("app.service.user_teams.get_user_teams", get_user_teams)
+    monkeypatch.setattr("app.service.user_teams.user_service", user_service)
+    monkeypatch.setattr("app.service.user_teams.SessionFactory", MockSession)
+    monkeypatch.setattr(
+        "app.service.user_teams.release_connection",
+        lambda db: calls.append(("release",)),
+    )
+    return calls, user_service
+
+
+def stored(age):
+    return ["cached-team"], datetime.now(timezone.utc) - age
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+@pytest.mark.asyncio
+async def test_new_user_waits_for_github(teams_calls):
+    calls, _ = teams_calls
+    cache = UserTeamsCache(ttl=60, max_age=3600)
+
+    teams = await cache.get_teams(None, FakeClient(), 1, "user")
+
+    assert teams == ["fresh-team"]
+    assert calls == [
+        ("release",),
+        ("github", "user"),
+        ("store", 1, ["fresh-team"]),
+    ]
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+@pytest.mark.asyncio
+async def test_fresh_teams_are_used(teams_calls):
+    calls, user_service = teams_calls
+    user_service.stored = stored(timedelta(seconds=1))
+    cache = UserTeamsCache(ttl=60, max_age=3600)
+
+    teams = await cache.get_teams(None, FakeClient(), 1, "user")
+
+    assert teams == ["cached-team"]
+    assert calls == []
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+@pytest.mark.asyncio
+async def test_stale_teams_are_refreshed_in_background(teams_calls):
+    # GIVEN: Teams that are stale but not too old
+    calls, user_service = teams_calls
+    user_service.stored = stored(timedelta(minutes=5))
+    cache = UserTeamsCache(ttl=60, max_age=3600)
+
+    # WHEN: They are requested
+    teams = await cache.get_teams(None, FakeClient(), 1, "user")
+
+    # THEN: The stored teams are returned right away
+    assert teams == ["cached-team"]
+    # AND: They are refreshed afterwards
+    await asyncio.gather(*cache._refreshing.values())
+    assert calls == [
+        ("release",),
+        ("github", "user"),
+        ("store", 1, ["fresh-team"]),
+    ]
+
+
+@pytest.mark.unit
+@pytest.mark.nondestructive
+@pytest.mark.asyncio
+async def test_old_teams_are_not_trusted(teams_calls):
+    calls, user_service = teams_calls
+    user_service.stored = stored(timedelta(days=2))
+    cache = UserTeamsCache(ttl=60, max_age=3600)
+
+    teams = await cache.get_teams(None, FakeClient(), 1, "user")
+
+    assert teams == ["fresh-team"]